@@ -0,0 +1,70 @@
+"""
+Benchmark loading many mesh files with Figure#add_meshes.
+
+Run with:
+    python benchmarks/bench_add_meshes.py [meshes] [subdivisions]
+
+Writes `meshes` icosphere OBJ files (default 256, of 20 * 4^subdivisions
+faces, default 5) to a temporary directory, then times adding them all with
+repeated Figure#mesh(obj=path) calls, and with Figure#add_meshes using
+1, 2, 4... up to the number of CPUs worker processes.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import trimesh
+
+from pytri import Figure
+
+
+def write_meshes(directory: str, n: int, subdivisions: int):
+    paths = []
+    for i in range(n):
+        mesh = trimesh.creation.icosphere(subdivisions=subdivisions)
+        mesh.apply_translation((3 * i, 0, 0))
+        paths.append(os.path.join(directory, f"mesh{i:05d}.obj"))
+        mesh.export(paths[-1])
+    return paths
+
+
+def serial(paths) -> float:
+    fig = Figure()
+    t = time.perf_counter()
+    for path in paths:
+        fig.mesh(obj=path)
+    return time.perf_counter() - t
+
+
+def bulk(paths, workers: int) -> float:
+    fig = Figure()
+    t = time.perf_counter()
+    fig.add_meshes(paths, workers=workers)
+    return time.perf_counter() - t
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    subdivisions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    warnings.simplefilter("ignore")
+    paths = write_meshes(tempfile.mkdtemp(), n, subdivisions)
+    # Warm up imports and the page cache
+    bulk(paths[:2], 1)
+
+    baseline = serial(paths)
+    print(f"{'loader':>18} {'seconds':>10} {'speedup':>10}")
+    print(f"{'Figure#mesh':>18} {baseline:>10.3f} {1:>10.2f}")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        seconds = bulk(paths, workers)
+        print(f"{f'add_meshes x{workers}':>18} {seconds:>10.3f} {baseline / seconds:>10.2f}")
+        workers *= 2
+    for path in paths:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
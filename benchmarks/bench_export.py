@@ -0,0 +1,48 @@
+"""
+Benchmark exporting a mesh scene to GLB.
+
+Run with:
+    python benchmarks/bench_export.py [max_exponent]
+
+Exports a Figure holding one random mesh of N = 1e4 up to 1e{max_exponent}
+triangles (default 1e7) with Figure#export, and reports the wall-clock time
+and the file size relative to the raw float32 vertex and uint32 face
+buffers.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from pytri import Figure
+
+
+def bench(n: int, path: str):
+    vertices = np.random.random((n // 2, 3)).astype(np.float32)
+    faces = np.random.randint(0, len(vertices), (n, 3)).astype(np.uint32)
+    fig = Figure()
+    fig.mesh((vertices, faces))
+    t = time.perf_counter()
+    fig.export(path)
+    seconds = time.perf_counter() - t
+    return seconds, os.path.getsize(path) / (vertices.nbytes + faces.nbytes)
+
+
+def main():
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    warnings.simplefilter("ignore")
+    path = os.path.join(tempfile.mkdtemp(), "scene.glb")
+    print(f"{'triangles':>12} {'seconds':>10} {'size/raw':>10}")
+    for e in range(4, max_exponent + 1):
+        n = 10 ** e
+        seconds, ratio = bench(n, path)
+        print(f"{n:>12} {seconds:>10.4f} {ratio:>10.3f}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark Figure bookkeeping as the number of layers grows.
+
+Run with:
+    python benchmarks/bench_figure.py [max_exponent] [points]
+
+For L = 1 up to 10^max_exponent layers (default 1e3), each a scatter of
+`points` random points (default 1000), reports the time to add the layers,
+to build a view of the figure (Figure#view, as Figure#show does) and the
+widget state that first view sends, to build a second view and the state it
+adds on top of the first, and to remove every layer. No browser or kernel
+is needed.
+"""
+
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from pytri import Figure
+from bench_layers import widget_state_bytes
+
+
+def bench(n_layers: int, points: int):
+    data = np.random.random((points, 3)).astype(np.float32)
+    fig = Figure()
+    t = time.perf_counter()
+    for _ in range(n_layers):
+        fig.scatter(data)
+    add = time.perf_counter() - t
+
+    seen = set()
+    views = []
+    for _ in range(2):
+        t = time.perf_counter()
+        renderer = fig.view()
+        seconds = time.perf_counter() - t
+        views.append((seconds, widget_state_bytes(renderer, seen) / 2 ** 20))
+
+    t = time.perf_counter()
+    fig.clear()
+    remove = time.perf_counter() - t
+    return add, views, remove
+
+
+def main():
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    warnings.simplefilter("ignore")
+    print(
+        f"{'layers':>8} {'add s':>10} {'view s':>10} {'state MB':>10}"
+        f" {'2nd view s':>11} {'2nd MB':>10} {'remove s':>10}"
+    )
+    for e in range(max_exponent + 1):
+        n = 10 ** e
+        add, ((show, state), (again, extra)), remove = bench(n, points)
+        print(
+            f"{n:>8} {add:>10.4f} {show:>10.4f} {state:>10.2f}"
+            f" {again:>11.4f} {extra:>10.4f} {remove:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark `import pytri` startup time.
+
+Run with:
+    python benchmarks/bench_import.py [repeats] [max_seconds]
+
+Times `import pytri` in a fresh interpreter `repeats` times (default 5) and
+reports the fastest run next to a bare `import numpy` baseline. Fails (exit
+status 1) if importing pytri pulls in any of the heavy dependencies that are
+meant to load on first use, or if the fastest import takes longer than
+max_seconds (default 1.0).
+"""
+
+import subprocess
+import sys
+import time
+
+# Modules pytri should only import once a figure, layer or mesh needs them
+_LAZY_MODULES = ["pythreejs", "ipywidgets", "IPython", "networkx", "trimesh", "scipy"]
+
+_PROBE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+print(" ".join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+
+def bench(module: str):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, lazy=_LAZY_MODULES)],
+        check=True, capture_output=True, text=True,
+    ).stdout.splitlines()
+    return float(out[0]), out[1].split() if len(out) > 1 else []
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    max_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    t = time.perf_counter()
+    numpy_time = min(bench("numpy")[0] for _ in range(repeats))
+    runs = [bench("pytri") for _ in range(repeats)]
+    pytri_time = min(seconds for seconds, _ in runs)
+    loaded = sorted(set().union(*(modules for _, modules in runs)))
+    print(f"{'module':>8} {'seconds':>10}")
+    print(f"{'numpy':>8} {numpy_time:>10.4f}")
+    print(f"{'pytri':>8} {pytri_time:>10.4f}")
+    print(f"({repeats} runs each, {time.perf_counter() - t:.1f}s total)")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: import pytri loaded {', '.join(loaded)}")
+        failed = True
+    if pytri_time > max_seconds:
+        print(f"FAIL: import pytri took more than {max_seconds}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
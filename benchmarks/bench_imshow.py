@@ -0,0 +1,47 @@
+"""
+Benchmark sending large images with Figure#imshow.
+
+Run with:
+    python benchmarks/bench_imshow.py [max_side]
+
+Shows a random uint16 greyscale image of N x N pixels, for N = 1024 up to
+max_side (default 16384), and reports the time to build the layer and the
+texture bytes shown at the initial camera position, next to the bytes of
+the whole image as a float32 RGBA texture.
+"""
+
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from pytri import Figure
+
+
+def bench(n: int):
+    image = np.random.randint(0, 2 ** 16, (n, n), dtype=np.uint16)
+    fig = Figure()
+    t = time.perf_counter()
+    layer = fig.imshow(image)
+    seconds = time.perf_counter() - t
+    sent = sum(
+        obj.material.map.data.nbytes for obj in layer._objects  # pylint: disable=protected-access
+        if obj.visible
+    )
+    return seconds, sent
+
+
+def main():
+    max_side = int(sys.argv[1]) if len(sys.argv) > 1 else 16384
+    warnings.simplefilter("ignore")
+    print(f"{'side':>8} {'seconds':>10} {'sent MB':>10} {'float MB':>10}")
+    n = 1024
+    while n <= max_side:
+        seconds, sent = bench(n)
+        print(f"{n:>8} {seconds:>10.4f} {sent / 2 ** 20:>10.1f} {n * n * 16 / 2 ** 20:>10.1f}")
+        n *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Benchmark building every layer in pytri.layers.
+
+Run with:
+    python benchmarks/bench_layers.py [max_exponent] [layer ...]
+
+Builds each layer (or only the named ones) from random data of N = 1e3 up
+to 1e{max_exponent} elements (default 1e7), each in a fresh interpreter,
+and reports:
+
+    seconds     wall-clock construction time, including the bounding box
+    state MB    the widget state a notebook frontend would be sent for the
+                layer: JSON state plus binary buffers of every widget in
+                the layer's group
+    peak MB     the peak resident set size of the process
+    build MB    how far building the layer raised the peak, above the
+                interpreter and the input data
+
+No browser or kernel is needed. An element is a point, line segment, graph
+edge, SWC node, mesh face, image pixel, volume voxel or grid line.
+"""
+
+import json
+import resource
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+# Number of objects the merged layers' elements are split between
+_MERGED_OBJECTS = 100
+
+
+def _scatter(n):
+    from pytri.layers import ScatterLayer
+    points = np.random.random((n, 3)).astype(np.float32)
+    return lambda: ScatterLayer(points)
+
+
+def _lines(n):
+    from pytri.layers import LinesLayer
+    lines = np.random.random((n, 2, 3)).astype(np.float32)
+    colors = np.random.random((n, 3)).astype(np.float32)
+    return lambda: LinesLayer(lines, colors=colors)
+
+
+def _graph(n):
+    from pytri.layers import GraphLayer
+    pos = np.random.random((n, 3)).astype(np.float32)
+    edges = np.random.randint(0, n, (n, 2))
+    return lambda: GraphLayer(edges, pos=pos)
+
+
+def _swc(n):
+    from pytri.layers import NeuronMorphologyLayer
+    data = np.zeros((n, 7))
+    data[:, 0] = np.arange(1, n + 1)
+    data[:, 1] = 3
+    data[:, 2:5] = np.cumsum(np.random.randn(n, 3), axis=0)
+    data[:, 5] = 1
+    # A random tree: every node's parent is an earlier node
+    data[:, 6] = np.floor(np.random.random(n) * np.arange(n)) + 1
+    data[0, 6] = -1
+    return lambda: NeuronMorphologyLayer(data)
+
+
+def _mesh(n):
+    from pytri.layers import MeshLayer
+    vertices = np.random.random((max(n // 2, 3), 3)).astype(np.float32)
+    faces = np.random.randint(0, len(vertices), (n, 3)).astype(np.uint32)
+    return lambda: MeshLayer((vertices, faces))
+
+
+def _merged_mesh(n):
+    from pytri.layers import MergedMeshLayer
+    per = max(n // _MERGED_OBJECTS, 1)
+    meshes = [
+        (np.random.random((per, 3)).astype(np.float32),
+         np.random.randint(0, per, (per, 3)).astype(np.uint32))
+        for _ in range(_MERGED_OBJECTS)
+    ]
+    return lambda: MergedMeshLayer(meshes)
+
+
+def _merged_lines(n):
+    from pytri.layers import MergedLinesLayer
+    per = max(n // _MERGED_OBJECTS, 1)
+    lines = [np.random.random((per, 2, 3)).astype(np.float32) for _ in range(_MERGED_OBJECTS)]
+    return lambda: MergedLinesLayer(lines)
+
+
+def _imshow(n):
+    from pytri.layers import ImshowLayer
+    side = int(np.sqrt(n))
+    image = np.random.randint(0, 256, (side, side), dtype=np.uint8)
+    return lambda: ImshowLayer(image)
+
+
+def _volume(n):
+    from pytri.layers import VolumeLayer
+    side = int(round(n ** (1 / 3)))
+    volume = np.random.randint(0, 256, (side,) * 3, dtype=np.uint8)
+    return lambda: VolumeLayer(volume, prefetch=0)
+
+
+def _grid(n):
+    from pytri.layers import GridLayer
+    # Two sets of lines, 2 * radius / grid_size each
+    return lambda: GridLayer(radius=max(n // 4, 1), grid_size=1)
+
+
+LAYERS = {
+    "scatter": _scatter,
+    "lines": _lines,
+    "graph": _graph,
+    "swc": _swc,
+    "mesh": _mesh,
+    "merged_mesh": _merged_mesh,
+    "merged_lines": _merged_lines,
+    "imshow": _imshow,
+    "volume": _volume,
+    "grid": _grid,
+}
+
+
+def widget_state_bytes(root, seen: set = None) -> int:
+    """
+    The bytes of JSON state and binary buffers of root and every widget it
+    refers to, as they would be sent to a notebook frontend. Widgets whose
+    model ids are in seen are skipped as already sent, and seen is updated.
+    """
+    from ipywidgets import Widget
+    from ipywidgets.widgets.widget import _remove_buffers
+
+    total, stack = 0, [root]
+    seen = set() if seen is None else seen
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, Widget) and value.model_id not in seen:
+            seen.add(value.model_id)
+            state, _, buffers = _remove_buffers(value.get_state())
+            total += len(json.dumps(state, default=str))
+            total += sum(memoryview(b).nbytes for b in buffers)
+            stack.extend(getattr(value, key) for key in value.keys)
+    return total
+
+
+def _peak_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(name: str, n: int):
+    """
+    Build one layer and print its measurements as JSON. Run in a fresh
+    interpreter, so that the peak RSS is this layer's alone.
+    """
+    warnings.simplefilter("ignore")
+    build = LAYERS[name](n)
+    before = _peak_mb()
+    t = time.perf_counter()
+    layer = build()
+    layer.get_bounding_box()
+    seconds = time.perf_counter() - t
+    peak = _peak_mb()
+    print(json.dumps({
+        "seconds": seconds,
+        "state": widget_state_bytes(layer.group) / 2 ** 20,
+        "peak": peak,
+        "build": peak - before,
+    }))
+
+
+def bench(name: str, n: int):
+    out = subprocess.run(
+        [sys.executable, __file__, "--run", name, str(n)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main():
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], int(sys.argv[3]))
+        return
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    names = sys.argv[2:] or list(LAYERS)
+    print(f"{'layer':>13} {'elements':>10} {'seconds':>10} {'state MB':>10} {'peak MB':>10} {'build MB':>10}")
+    for name in names:
+        for e in range(3, max_exponent + 1):
+            n = 10 ** e
+            r = bench(name, n)
+            print(
+                f"{name:>13} {n:>10} {r['seconds']:>10.4f} {r['state']:>10.2f}"
+                f" {r['peak']:>10.1f} {r['build']:>10.1f}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Benchmark LinesLayer construction time.
+
+Run with:
+    python benchmarks/bench_lines.py [max_exponent]
+
+Builds a LinesLayer from an (N, 2, 3) float32 array with per-line colors for
+N = 1e4 up to 1e{max_exponent} segments (default 1e7), and reports the
+wall-clock construction time including the bounding-box computation.
+"""
+
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from pytri.layers import LinesLayer
+
+
+def bench(n: int) -> float:
+    lines = np.random.random((n, 2, 3)).astype(np.float32)
+    colors = np.random.random((n, 3)).astype(np.float32)
+    t = time.perf_counter()
+    layer = LinesLayer(lines, colors=colors)
+    layer.get_bounding_box()
+    return time.perf_counter() - t
+
+
+def main():
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    warnings.simplefilter("ignore")
+    print(f"{'segments':>12} {'seconds':>10}")
+    for e in range(4, max_exponent + 1):
+        n = 10 ** e
+        print(f"{n:>12} {bench(n):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark scrubbing through a memory-mapped volume with Figure#volume.
+
+Run with:
+    python benchmarks/bench_volume.py [side] [steps]
+
+Writes a random uint16 volume of side^3 voxels (default 512) to a
+temporary .npy file, opens it as a np.memmap, and times stepping the z, y
+and x slices forward `steps` times each (default 50), then back again
+through the cached slices.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from pytri import Figure
+
+
+def scrub(layer, axis: str, indices) -> float:
+    t = time.perf_counter()
+    for index in indices:
+        layer.set_slice(axis, index)
+    return (time.perf_counter() - t) / len(indices)
+
+
+def main():
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    warnings.simplefilter("ignore")
+    path = os.path.join(tempfile.mkdtemp(), "volume.npy")
+    volume = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint16, shape=(side,) * 3)
+    for z in range(side):
+        volume[z] = np.random.randint(0, 2 ** 16, (side, side), dtype=np.uint16)
+    volume.flush()
+    del volume
+
+    layer = Figure().volume(np.load(path, mmap_mode="r"), cache_size=2 * steps + 8)
+    print(f"{'axis':>6} {'ms/slice':>10} {'cached ms/slice':>16}")
+    for axis in "zyx":
+        start = layer.slices[axis]
+        indices = list(range(start, min(start + steps, side)))
+        forward = scrub(layer, axis, indices)
+        back = scrub(layer, axis, indices[::-1])
+        print(f"{axis:>6} {forward * 1e3:>10.3f} {back * 1e3:>16.3f}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
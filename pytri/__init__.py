@@ -14,29 +14,60 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import asyncio
+import functools
 import uuid
-from typing import Any, Iterable, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple, Union
 from warnings import warn
 
-import networkx as nx
 import numpy as np
-from IPython.display import display
-from ipywidgets import HTML
-from pythreejs import (
-    AmbientLight, AxesHelper, BufferAttribute, BufferGeometry, DataTexture,
-    DirectionalLight, Group, ImageTexture, LineMaterial, LineSegments2,
-    LineSegmentsGeometry, Mesh, MeshBasicMaterial, MeshLambertMaterial,
-    MeshNormalMaterial, OrbitControls, PerspectiveCamera, Picker,
-    PlaneGeometry, Points, PointsMaterial, Renderer, Scene)
-
-from pytri.layers import (AxesLayer, GraphLayer, GridLayer, ImshowLayer, Layer,
-                          LinesLayer, MeshLayer, ScatterLayer, NeuronMorphologyLayer)
+
+from pytri import stats
+
+if TYPE_CHECKING:
+    from pytri.layers import Layer
 
 _DEFAULT_FIGURE_WIDTH = 600
 _DEFAULT_FIGURE_HEIGHT = 400
 
 __version__ = "2.0.1"
 
+# The layer classes registered on every figure by default, by the name they
+# are registered under. They are looked up (and pytri.layers, with pythreejs
+# behind it, imported) on first use, which keeps `import pytri` fast.
+_DEFAULT_LAYERS = {
+    "mesh": "MeshLayer",
+    "scatter": "ScatterLayer",
+    "lines": "LinesLayer",
+    "axes": "AxesLayer",
+    "graph": "GraphLayer",
+    "imshow": "ImshowLayer",
+    "volume": "VolumeLayer",
+    "grid": "GridLayer",
+    "swc": "NeuronMorphologyLayer",
+    "merged_mesh": "MergedMeshLayer",
+    "merged_lines": "MergedLinesLayer",
+}
+
+_LAYER_CLASSES = set(_DEFAULT_LAYERS.values()) | {"Layer"}
+
+
+def __getattr__(name):
+    # pytri.MeshLayer and friends are re-exported from pytri.layers lazily
+    if name in _LAYER_CLASSES:
+        from pytri import layers  # pylint: disable=import-outside-toplevel
+        return getattr(layers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _LAYER_CLASSES)
+
+
+def _is_layer(obj) -> bool:
+    from pytri.layers import Layer  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    return isinstance(obj, Layer)
+
 class Figure:
     """
     Generic class for a new Pytri figure.
@@ -64,6 +95,8 @@ class Figure:
 
         self._layer_lookup = dict()
 
+        from pythreejs import (  # pylint: disable=import-outside-toplevel
+            DirectionalLight, OrbitControls, PerspectiveCamera)
         self._camera = PerspectiveCamera(
             position=tuple(np.array([0, 0, 5])),
             up=(0, 1, 0),
@@ -77,31 +110,61 @@ class Figure:
                 ),
             ],
         )
+        # The camera state layers were last updated for (see _camera_callback)
+        self._camera_key = None
+        self._camera.observe(self._camera_callback, names=["position", "quaternion"])
         self._click_callbacks = dict()
+        self._layers = dict()
+        # Per-layer bounding boxes, keyed by layer id, with the
+        # Layer#_bounds_key they were computed for
+        self._bounds = dict()
+        # The scene, the group of every layer's group, and the picker over
+        # them, built by the first Figure#show and shared by every view
+        self._scene = None
+        self._root = None
+        self._renderers = []
         self.controls = [OrbitControls(controlling=self._camera)]
         self._controllable_layers = []
         self.background = background
-        if register_default:
-            for layer in [MeshLayer,
-                    ScatterLayer,
-                    LinesLayer,
-                    AxesLayer,
-                    GraphLayer,
-                    ImshowLayer,
-                    GridLayer,
-                    NeuronMorphologyLayer]:
-                self.register_layer(layer)
+        # Default layers are registered by name and resolved on first access
+        # (see Figure#__getattr__)
+        self._default_layers = dict(_DEFAULT_LAYERS) if register_default else dict()
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that are not set on the figure, so an
+        # explicitly registered layer always takes precedence
+        defaults = self.__dict__.get("_default_layers", {})
+        if name not in defaults:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        from pytri import layers  # pylint: disable=import-outside-toplevel
+        self.register_layer(getattr(layers, defaults.pop(name)), name)
+        return self.__dict__[name]
+
+    def __dir__(self):
+        # Default layers are listed (e.g. for tab completion) before first use
+        return sorted(set(super().__dir__()) | set(self.__dict__.get("_default_layers", {})))
+
     @staticmethod
     def _new_id():
         return str(uuid.uuid4())
+    @staticmethod
+    def _build_layer(cls, args, kwargs) -> "Layer":
+        if not stats.is_enabled():
+            return cls(*args, **kwargs)
+        return stats.build(cls, args, kwargs)
+    def _attach_layer(self, inst: "Layer") -> "Layer":
+        inst._id = self._add_layer(inst)
+        if stats.is_enabled():
+            stats.report(stats.layer_stats(inst)[0])
+        return inst
     def _layer_decorator(self, cls):
         def fn(*args, **kwargs):
-            inst = cls(*args, **kwargs)
-            _id = self._add_layer(inst)
-            inst._id = _id
-            return inst
+            return self._attach_layer(self._build_layer(cls, args, kwargs))
+        fn._layer_class = cls
         return fn
-    def register_layer(self, cls:Layer, layername:str=None):
+    def register_layer(self, cls:"Layer", layername:str=None):
         """
         Registers the Layer class cls with the name layername such that
         calling fig.layername instantiates the class.
@@ -109,22 +172,108 @@ class Figure:
         layer = cls._LAYER_NAME if layername is None else layername
         self.__dict__[layer] = self._layer_decorator(cls)
 
-    def _add_layer(self, layer: Layer) -> str:
+    def _add_layer(self, layer: "Layer") -> str:
+        layer._on_camera_move(self._camera)
         object_set = layer.group
         _id = self._new_id()
         for c in object_set.children:
             c.name = _id
         self._click_callbacks[_id] = layer._on_click
         self._layer_lookup[_id] = object_set
+        self._layers[_id] = layer
+        if self._root is not None:
+            self._root.add(object_set)
         return _id
 
-    def recenter_camera(self, target:Union[Layer, Tuple[float, float, float], None]=None):
+    def _layer_bounds(self, layer: "Layer"):
+        _id = getattr(layer, "_id", None)
+        cached = self._bounds.get(_id)
+        key = layer._bounds_key()
+        if cached is None or cached[0] != key:
+            lo, hi = layer.world_bounding_box()
+            if not (np.all(np.isfinite(lo)) and np.all(np.isfinite(hi))):
+                lo = hi = None
+            cached = (key, lo, hi)
+            if _id in self._layers:
+                self._bounds[_id] = cached
+        return cached[1], cached[2]
+
+    def bounds(self, layers: Union["Layer", Iterable["Layer"], None] = None):
+        """
+        The bounding box of layers in scene coordinates.
+
+        Each layer's box is cached by the figure and only recomputed after
+        that layer's data or transform changes, so this is O(layers) rather
+        than O(vertices).
+
+        Arguments:
+            layers: A layer or layers to bound. Defaults to every layer
+                except decorations (axes and grids), or to every layer if
+                there are only decorations.
+
+        Returns:
+            (min, max) corners as arrays, or None if there is nothing to
+            bound
+
+        """
+        if layers is None:
+            layers = [l for l in self._layers.values() if not l._DECORATION]
+            layers = layers or list(self._layers.values())
+        elif _is_layer(layers):
+            layers = [layers]
+        boxes = [self._layer_bounds(l) for l in layers]
+        boxes = [b for b in boxes if b[0] is not None]
+        if not boxes:
+            return None
+        return (
+            np.min([lo for lo, _ in boxes], axis=0),
+            np.max([hi for _, hi in boxes], axis=0),
+        )
+
+    def fit_camera(self,
+        layers: Union["Layer", Iterable["Layer"], None] = None,
+        padding: float = 1.1,
+        ):
+        """
+        Frame layers: point the camera at the center of their bounding box,
+        and move it along its current viewing direction until the whole
+        box is in view.
+
+        Arguments:
+            layers: A layer or layers to frame. Defaults to every layer
+                except decorations (see Figure#bounds).
+            padding (float: 1.1): Extra room around the layers, as a
+                factor of the distance needed to fit them exactly
+
+        """
+        bounds = self.bounds(layers)
+        if bounds is None:
+            warn("No objects to frame")
+            return
+        lo, hi = bounds
+        center = (lo + hi) / 2
+        radius = max(float(np.linalg.norm(hi - lo)) / 2, np.finfo(np.float32).eps)
+        camera = self._camera
+        # The bounding sphere must fit in the narrower of the two fields of view
+        half_fov = np.radians(camera.fov) / 2
+        half_fov = min(half_fov, np.arctan(np.tan(half_fov) * camera.aspect))
+        distance = padding * radius / np.sin(half_fov)
+        direction = np.asarray(camera.position) - np.asarray(self.controls[0].target)
+        norm = np.linalg.norm(direction)
+        direction = direction / norm if norm > 0 else np.array([0., 0., 1.])
+        if camera.far < distance + radius:
+            camera.far = 2 * (distance + radius)
+        self.controls[0].target = tuple(center.tolist())
+        camera.position = tuple((center + direction * distance).tolist())
+
+    def recenter_camera(self, target:Union["Layer", Tuple[float, float, float], None]=None):
         """
         Re-orient the camera to view everything in the scene or a particular layer.
         Arguments:
 
-            target: Either a Layer, a vector, or None. If none, tries its best
-                to give the viewpoint of everything in the scene.
+            target: Either a Layer, a vector, or None. If none, points the
+                camera at the center of the bounding box of the scene (see
+                Figure#bounds); use Figure#fit_camera to also frame it.
 
                 If a layer, views the layer based on preferred camera view
 
@@ -132,20 +281,146 @@ class Figure:
 
         """
         if target is None:
-            try:
-                pcv = [l.get_preferred_camera_view() for l in self._layer_lookup.values()]
-                average_center = np.mean(pcv, axis=0)
-            except ValueError:
+            bounds = self.bounds()
+            if bounds is None:
                 warn("No objects to center around")
-                target = target or np.array(self.controls[0].target)
-            if target is None:
-                target = average_center
-        elif isinstance(target, Iterable):
-            target = tuple(target.astype(np.float32))
-        elif isinstance(target, Layer):
-            target = tuple(target.get_preferred_camera_view())
-        self.controls.target = target
-    def remove(self, layer: Union[Layer, Iterable[Layer]]) -> bool:
+                return
+            target = (bounds[0] + bounds[1]) / 2
+        elif _is_layer(target):
+            target = target.get_preferred_camera_view()
+        self.controls[0].target = tuple(np.asarray(target, dtype=np.float64).tolist())
+    def add_meshes(self,
+        meshes: Iterable,
+        colors: Union[str, Tuple[float, float, float], Iterable, None] = None,
+        *,
+        workers: int = None,
+        processes: bool = True,
+        max_in_flight: int = None,
+        transform=None,
+        normalize: bool = False,
+        compute_normals: bool = False,
+        cache=False,
+        **kwargs,
+        ) -> List["Layer"]:
+        """
+        Add many meshes, one MeshLayer each, reading and preparing them in
+        parallel.
+
+        Mesh files are parsed, transformed, normalized and converted to
+        float32 vertices and uint16/uint32 faces in a pool of worker
+        processes (or threads); the pythreejs objects are created on this
+        thread as each mesh arrives, in order. At most max_in_flight meshes
+        are held in memory at once.
+
+        Arguments:
+            meshes: Iterable of meshes in any form accepted by Figure#mesh,
+                e.g. paths to mesh files
+            colors: A single color, or one color per mesh. Defaults to
+                MeshLayer's color.
+            workers (int: None): Pool size. Defaults to the number of CPUs;
+                1 loads the meshes one after another on this thread.
+            processes (bool: True): Use processes, which parse in parallel
+                despite the GIL, rather than threads. transform must then
+                be picklable, e.g. a module-level function.
+            max_in_flight (int: None): Defaults to twice the pool size
+            transform, normalize, compute_normals, cache: As for
+                Figure#mesh, applied to every mesh
+            kwargs: Further MeshLayer arguments (alpha, lod, quantize...)
+
+        Returns:
+            The new layers, in the order of meshes
+
+        """
+        from pytri import layers  # pylint: disable=import-outside-toplevel
+        meshes = list(meshes)
+        colors = colors if colors is None or isinstance(colors, str) else list(colors)
+        if colors is None or isinstance(colors, str) or (
+                len(colors) and np.isscalar(colors[0]) and not isinstance(colors[0], str)):
+            # A single color for every mesh
+            colors = [colors] * len(meshes)
+        if len(colors) != len(meshes):
+            raise ValueError(f"Expected {len(meshes)} colors, but got {len(colors)}")
+        if not meshes:
+            return []
+        add = self._layer_decorator(layers.MeshLayer)
+        loaded = layers._load_meshes(
+            meshes, workers=workers, processes=processes, max_in_flight=max_in_flight,
+            cache=cache, transform=transform, normalize=normalize,
+            compute_normals=compute_normals,
+        )
+        return [
+            add(mesh, **kwargs) if color is None else add(mesh, color=color, **kwargs)
+            for mesh, color in zip(loaded, colors)
+        ]
+
+    async def add_async(self,
+        layer: Union[str, type],
+        *args,
+        bounds: Tuple[Tuple[float, float, float], Tuple[float, float, float]] = None,
+        executor=None,
+        **kwargs,
+        ) -> "Layer":
+        """
+        Add a layer without blocking the event loop while it is built.
+
+        A wireframe box is added at once where the layer will be, then the
+        layer's data is prepared (files read, arrays converted, levels of
+        detail simplified...) in a worker thread. Its widgets are created
+        back on the event loop, and the layer replaces the box. Meanwhile
+        the figure stays usable: the camera can be moved and other layers
+        added, including with more add_async calls.
+
+        Meshes, points given as one array and line segments are prepared
+        off the event loop; other layers are built entirely on it.
+
+        In a notebook, which already runs an event loop, load in the
+        background with
+
+            task = asyncio.ensure_future(fig.add_async("mesh", "brain.obj"))
+
+        or await the layer directly with `await fig.add_async(...)`.
+
+        Arguments:
+            layer: The name of a registered layer (e.g. "mesh", "scatter"),
+                or a Layer class
+            args, kwargs: The arguments to build the layer with, as for
+                Figure#mesh, Figure#scatter...
+            bounds: (min, max) corners of the box shown while loading.
+                Defaults to the bounds of in-memory arrays or meshes passed
+                in, where they are cheap to find; without them (e.g. for
+                file paths) no box is shown.
+            executor: concurrent.futures pool to prepare the layer's data
+                in. Defaults to the event loop's default thread pool. A
+                process pool needs picklable arguments, and then decimated
+                levels of detail are simplified again on the event loop.
+
+        Returns:
+            The new layer
+
+        """
+        from pytri import layers  # pylint: disable=import-outside-toplevel
+        cls = layer
+        if isinstance(layer, str):
+            cls = getattr(getattr(self, layer, None), "_layer_class", None)
+            if cls is None:
+                raise ValueError(f"No layer is registered as {layer!r}")
+        if bounds is None:
+            bounds = cls._placeholder_bounds(args, kwargs)
+        placeholder = None
+        if bounds is not None:
+            placeholder = layers._PlaceholderLayer(bounds)
+            placeholder._id = self._add_layer(placeholder)
+        try:
+            # Widgets (and so comms) are only created on the event loop
+            args, kwargs = await asyncio.get_running_loop().run_in_executor(
+                executor, functools.partial(cls._prepare, args, kwargs)
+            )
+            return self._attach_layer(self._build_layer(cls, args, kwargs))
+        finally:
+            if placeholder is not None:
+                self.remove(placeholder)
+
+    def remove(self, layer: Union["Layer", Iterable["Layer"]]) -> bool:
         """
         Remove a single layer from the scene.
 
@@ -159,10 +434,20 @@ class Figure:
             True, if successful
 
         """
-        if not isinstance(layer, list):
+        if _is_layer(layer):
             layer = [layer]
+        removed = set()
         for l in layer:
-            self._scene.remove(l.group)
+            if self._layers.pop(l._id, None) is not None:
+                l._on_remove()
+            for lookup in (self._layer_lookup, self._click_callbacks, self._bounds):
+                lookup.pop(l._id, None)
+            removed.add(id(l.group))
+        if self._root is not None:
+            # One update of the shared group, however many layers are removed
+            self._root.children = tuple(
+                c for c in self._root.children if id(c) not in removed
+            )
         return True
 
     def clear(self):
@@ -176,45 +461,155 @@ class Figure:
             None
 
         """
-        for layer in self._layer_lookup.values():
-            self.remove(layer)
+        self.remove(list(self._layers.values()))
+
+    def stats(self, by_buffer: bool = False) -> List[Dict]:
+        """
+        Performance statistics of every layer, as rows with the same keys,
+        e.g. for pandas.DataFrame(figure.stats()).
+
+        Each row has the layer's id, layer name and class; the seconds its
+        construction took, overall and in each phase (input, buffers,
+        bounds), or None unless pytri.stats was enabled when it was added;
+        its number of objects, buffers and bytes; and its number of points,
+        vertices, faces and segments (see Layer#element_counts).
+
+        Arguments:
+            by_buffer (bool: False): Instead, give a row per layer, buffer
+                attribute and dtype, with its number of buffers and bytes
+
+        """
+        return [
+            row for layer in self._layers.values()
+            for row in stats.layer_stats(layer, by_buffer)
+        ]
+
+    def export(self,
+        path: str,
+        layers: Union["Layer", Iterable["Layer"], None] = None,
+        **kwargs,
+        ):
+        """
+        Save the scene to a standalone file that can be viewed without a
+        kernel: a binary glTF (.glb) file, or a single HTML page (.html)
+        with the scene embedded. The HTML page loads three.js from a CDN,
+        so it needs network access to be viewed. See export#write_glb and
+        export#write_html for further keyword arguments.
+
+        Arguments:
+            path: The file to write. Its extension selects the format.
+            layers: A layer or layers to export. Defaults to every layer.
+
+        """
+        from pytri import export  # pylint: disable=import-outside-toplevel
+        suffix = path.lower().rsplit(".", 1)[-1]
+        if suffix == "glb":
+            export.write_glb(self, path, layers, **kwargs)
+        elif suffix in ("html", "htm"):
+            export.write_html(self, path, layers, **kwargs)
+        else:
+            raise ValueError(f"Cannot export to {path}: expected a .glb or .html file")
+
+    def _camera_callback(self, change):
+        # A camera sync from the frontend sets position and quaternion
+        # together, and each fires this; update the layers once per state
+        key = (self._camera.position, self._camera.quaternion)
+        if key == self._camera_key:
+            return
+        self._camera_key = key
+        for layer in self._layers.values():
+            layer._on_camera_move(self._camera)
+
     def _interact_callback(self, change):
         layer_id = change["owner"].object.name
 
         self.html.value = str(self._click_callbacks[layer_id](change["owner"]))
-    def show(self):
+    def _scene_graph(self):
         """
-        Render the scene for the viewer.
+        The figure's Scene, built on first use. Every view renders this one
+        scene, so layer geometry is only ever sent to the frontend once.
+        """
+        if self._scene is None:
+            # pylint: disable=import-outside-toplevel
+            from ipywidgets import HTML
+            from pythreejs import AmbientLight, Group, Picker, Scene
+
+            self._root = Group(children=tuple(self._layer_lookup.values()))
+            self._scene = Scene(
+                background=self.background,
+                children=[
+                    self._camera,
+                    AmbientLight(color="#cccccc"),
+                    self._root,
+                ],
+            )
+            picker = Picker(controlling=self._root, event='click')
+            picker.observe(self._interact_callback, names=["point"])
+            self.controls.append(picker)
+            self.html = HTML("")
+        return self._scene
+
+    def view(self, linked: bool = True):
+        """
+        Build a new view of the scene, without displaying it; Figure#show
+        displays one. Views share the scene, its geometry and the click
+        picker, so each new view only adds a renderer.
 
-        This method can be called serveral times in order to generate several
-        visualizations which are "yoked" together.
+        Arguments:
+            linked (bool: True): Whether the view is "yoked" to the
+                figure's camera. Otherwise it gets its own camera and orbit
+                controls, starting from the figure camera's viewpoint;
+                lighting and levels of detail still follow the figure's
+                camera.
 
-        """
-        scene = Scene(
-            background=self.background,
-            children=[
-                self._camera,
-                AmbientLight(color="#cccccc"),
-            ],
-        )
-        g = Group()
-        for _,v in self._layer_lookup.items():
-            g.add(v)
+        Returns:
+            pythreejs.Renderer
 
-        p = Picker(controlling=g,event='click')
-        p.observe(self._interact_callback, names=["point"])
-        self.html = HTML("")
-        scene.add(g)
-        self.controls.append(p)
+        """
+        # pylint: disable=import-outside-toplevel
+        from pythreejs import OrbitControls, PerspectiveCamera, Renderer
+
+        scene = self._scene_graph()
+        camera, controls = self._camera, self.controls
+        if not linked:
+            camera = PerspectiveCamera(
+                position=self._camera.position,
+                quaternion=self._camera.quaternion,
+                up=self._camera.up,
+                fov=self._camera.fov,
+                near=self._camera.near,
+                far=self._camera.far,
+                aspect=self._camera.aspect,
+            )
+            controls = [
+                OrbitControls(controlling=camera, target=self.controls[0].target),
+                *self.controls[1:],
+            ]
 
         self._renderer = Renderer(
             width=self._figsize[0],
             height=self._figsize[1],
-            camera=self._camera,
+            camera=camera,
             scene=scene,
             alpha=True,
             clearOpacity=0,
-            controls=self.controls,
+            controls=controls,
         )
-        self._scene = scene
-        display(self.html, self._renderer)
+        self._renderers.append(self._renderer)
+        return self._renderer
+
+    def show(self, linked: bool = True):
+        """
+        Render the scene for the viewer.
+
+        This method can be called serveral times in order to generate several
+        "yoked" views of the same scene (see Figure#view).
+
+        Arguments:
+            linked (bool: True): Whether the view follows the figure's
+                camera, or gets a camera of its own
+
+        """
+        from IPython.display import display  # pylint: disable=import-outside-toplevel
+        renderer = self.view(linked)
+        display(self.html, renderer)
@@ -0,0 +1,222 @@
+"""
+Copyright 2021 The Johns Hopkins University Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from typing import Dict, List
+
+import numpy as np
+
+from .utils import _index_dtype
+
+_DEFAULT_CACHE_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "pytri",
+    "meshes",
+)
+_DEFAULT_CACHE_BYTES = 10 * 2 ** 30
+
+_ARRAYS = ("vertices", "faces", "normals")
+
+CachedMesh = namedtuple("CachedMesh", ["vertices", "faces", "vertex_normals"])
+
+
+class MeshCache:
+    """
+    An on-disk cache of parsed mesh files.
+
+    Each mesh file is parsed with trimesh once; its vertices (float32),
+    faces (uint16 or uint32) and vertex normals (float32) are then stored as
+    .npy files and memory-mapped on every later load, without touching
+    trimesh. Entries are keyed by the file's path, modification time and
+    size, or by its content hash. The least-recently used entries are
+    evicted when the cache grows past max_bytes.
+
+    The cache keeps a running total of its size, read from disk once and
+    then updated as entries are added, so a miss does not list the whole
+    cache. Entries are only listed again when the total passes max_bytes;
+    that also accounts for entries added by other processes.
+
+    Arguments:
+        directory: Where to store the cache. Defaults to
+            $XDG_CACHE_HOME/pytri/meshes
+        max_bytes (10 GiB): The size bound of the cache
+        key (str: "stat"): "stat" to key on path, mtime and size, or
+            "content" to key on a hash of the file contents
+
+    """
+
+    def __init__(
+        self,
+        directory: str = None,
+        max_bytes: int = _DEFAULT_CACHE_BYTES,
+        key: str = "stat",
+    ):
+        """
+        Create a mesh cache.
+
+        Arguments:
+            directory: Where to store the cache. Defaults to
+                $XDG_CACHE_HOME/pytri/meshes
+            max_bytes (10 GiB): The size bound of the cache
+            key (str: "stat"): "stat" to key on path, mtime and size, or
+                "content" to key on a hash of the file contents
+
+        """
+        if key not in ("stat", "content"):
+            raise ValueError(f"Expected key to be 'stat' or 'content', but got {key}")
+        self.directory = directory or _DEFAULT_CACHE_DIRECTORY
+        self.max_bytes = max_bytes
+        self.key = key
+        # Bytes in the cache, as of the last listing plus the entries added
+        # since; None until the first miss
+        self._bytes = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _key(self, path: str) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        if self.key == "content":
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(2 ** 20), b""):
+                    h.update(chunk)
+        else:
+            stat = os.stat(path)
+            h.update(f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        return h.hexdigest()
+
+    def load(self, path: str) -> CachedMesh:
+        """
+        Get the vertices, faces and vertex normals of a mesh file.
+
+        Arguments:
+            path: The mesh file to load
+
+        Returns:
+            CachedMesh of read-only arrays memory-mapped from the cache
+
+        """
+        entry = os.path.join(self.directory, self._key(path))
+        if not os.path.isdir(entry):
+            stored = self._store(path, entry)
+            if self._bytes is None:
+                self._bytes = self.size()
+            else:
+                self._bytes += stored
+            if self._bytes > self.max_bytes:
+                self._evict(keep=entry)
+        # Touch the entry so that eviction is least-recently-used
+        os.utime(entry)
+        return CachedMesh(*(
+            np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+            for name in _ARRAYS
+        ))
+
+    def _store(self, path: str, entry: str) -> int:
+        """
+        Parse a mesh file into a new entry, and return its size in bytes.
+        """
+        import trimesh  # pylint: disable=import-outside-toplevel
+        mesh = trimesh.load(path)
+        if not (hasattr(mesh, "vertices") and hasattr(mesh, "faces")):
+            raise ValueError(f"Could not read {path} as a single mesh")
+        vertices = np.asarray(mesh.vertices, dtype=np.float32)
+        arrays = {
+            "vertices": vertices,
+            "faces": np.asarray(mesh.faces, dtype=_index_dtype(len(vertices))),
+            "normals": np.asarray(mesh.vertex_normals, dtype=np.float32),
+        }
+        # Write to a temporary directory and rename it into place, so that
+        # concurrent readers never see a partial entry.
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=".tmp")
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, f"{name}.npy"), array)
+            stored = _directory_bytes(tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(entry):
+                raise
+            # Another process stored the same entry first
+            stored = 0
+        return stored
+
+    def entries(self) -> List[Dict]:
+        """
+        List the cache entries, least-recently used first.
+
+        Returns:
+            A list of dicts with the key, size in bytes, and last access
+            time of each entry
+
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            entries.append({
+                "key": name,
+                "bytes": _directory_bytes(entry),
+                "accessed": os.path.getmtime(entry),
+            })
+        return sorted(entries, key=lambda e: e["accessed"])
+
+    def size(self) -> int:
+        """
+        The total size of the cache, in bytes.
+        """
+        return sum(e["bytes"] for e in self.entries())
+
+    def _evict(self, keep: str = None):
+        entries = self.entries()
+        total = sum(e["bytes"] for e in entries)
+        for e in entries:
+            if total <= self.max_bytes:
+                break
+            entry = os.path.join(self.directory, e["key"])
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= e["bytes"]
+        self._bytes = total
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        for e in self.entries():
+            shutil.rmtree(os.path.join(self.directory, e["key"]), ignore_errors=True)
+        self._bytes = 0
+
+
+def _directory_bytes(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+
+
+_DEFAULT_CACHE = None
+
+
+def default_mesh_cache() -> MeshCache:
+    """
+    Get the shared MeshCache in the default directory.
+    """
+    global _DEFAULT_CACHE # pylint: disable=global-statement
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = MeshCache()
+    return _DEFAULT_CACHE
@@ -0,0 +1,628 @@
+"""
+Copyright 2021 The Johns Hopkins University Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Export figures as standalone files that can be viewed without a kernel.
+
+write_glb writes a binary glTF (GLB) file, with every layer's geometry
+buffers copied straight from its numpy arrays into the binary chunk;
+write_html embeds that GLB in a single HTML page with a three.js viewer,
+which loads three.js itself from a CDN.
+Neither goes through the widgets' JSON state. Compact encodings are used
+where glTF allows them: uint16/uint32 indices, uint8 colors and (with
+KHR_mesh_quantization) int8 normals.
+"""
+
+import base64
+import html
+import json
+import struct
+import zlib
+from typing import Dict, Iterable, Union
+
+import numpy as np
+
+from .utils import (_as_contiguous, _as_index_buffer, _circle_map,
+                    _object_quaternion, _to_rgb, _vertex_normals)
+
+_COMPONENT_TYPES = {
+    np.dtype(np.int8): 5120,
+    np.dtype(np.uint8): 5121,
+    np.dtype(np.int16): 5122,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+    np.dtype(np.float32): 5126,
+}
+_ACCESSOR_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_POINTS, _LINES, _TRIANGLES = 0, 1, 4
+
+# The colors of the x, y and z axes of a three.js AxesHelper
+_AXES_COLORS = np.array(
+    [[1, 0, 0], [1, .6, 0], [0, 1, 0], [.6, 1, 0], [0, 0, 1], [0, .6, 1]],
+    dtype=np.float32,
+)
+
+# Bytes of binary data base64-encoded at a time; a multiple of 3, so that
+# chunks encode without padding
+_BASE64_CHUNK = 3 * 2 ** 20
+
+
+def _color_bytes(colors: np.ndarray) -> np.ndarray:
+    """
+    (N, 3) colors as (N, 4) normalized uint8 RGBA, opaque.
+    """
+    colors = np.asarray(colors).reshape(-1, 3)
+    rgba = np.full((len(colors), 4), 255, dtype=np.uint8)
+    if colors.dtype == np.uint8:
+        rgba[:, :3] = colors
+    else:
+        rgba[:, :3] = np.clip(colors, 0, 1) * 255 + .5
+    return rgba
+
+
+def _normal_bytes(normals: np.ndarray) -> np.ndarray:
+    """
+    (N, 3) unit normals as (N, 4) normalized int8, for KHR_mesh_quantization.
+
+    The fourth byte is padding, since vertex attributes must be aligned to
+    four bytes.
+    """
+    quantized = np.zeros((len(normals), 4), dtype=np.int8)
+    if normals.dtype == np.int8:
+        # Already quantized by the layer
+        quantized[:, :3] = normals
+    else:
+        quantized[:, :3] = np.round(np.clip(normals, -1, 1) * 127)
+    return quantized
+
+
+def _material_rgb(material):
+    try:
+        return [float(c) for c in _to_rgb(getattr(material, "color", None) or "#ffffff")]
+    except (TypeError, ValueError):
+        # A CSS color name, which three.js would parse
+        return [1., 1., 1.]
+
+
+def _png(image: np.ndarray) -> bytes:
+    """
+    Encode an (H, W), (H, W, 3) or (H, W, 4) image as PNG. Float images are
+    clipped to [0, 1], as they are when drawn.
+    """
+    image = np.asarray(image)
+    if image.dtype != np.uint8:
+        image = (np.clip(image, 0, 1) * 255 + .5).astype(np.uint8)
+    if image.ndim == 2:
+        image = image[:, :, None]
+    height, width, channels = image.shape
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    # Each row starts with its filter type, 0 (none)
+    rows = np.zeros((height, width * channels + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data)))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6))
+            + chunk(b"IEND", b""))
+
+
+def _transform(obj) -> Dict:
+    """
+    The glTF node translation, rotation and scale of a pythreejs object, or
+    its matrix if that is set directly (e.g. by Layer#set_affine).
+    """
+    if not obj.matrixAutoUpdate:
+        # Both three.js and glTF store matrices column-major
+        return {"matrix": [float(v) for v in obj.matrix]}
+    node = {}
+    if tuple(obj.position) != (0, 0, 0):
+        node["translation"] = [float(v) for v in obj.position]
+    quaternion = _object_quaternion(obj)
+    if quaternion != (0, 0, 0, 1):
+        node["rotation"] = [float(v) for v in quaternion]
+    if tuple(obj.scale) != (1, 1, 1):
+        node["scale"] = [float(v) for v in obj.scale]
+    return node
+
+
+class _GLTFBuilder:
+    """
+    Collects the glTF JSON and binary buffer of a scene.
+
+    Arrays are referenced, not copied, until the file is written.
+    """
+
+    def __init__(self):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "pytri"},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [],
+            "meshes": [],
+            "materials": [],
+            "textures": [],
+            "images": [],
+            "samplers": [],
+            "accessors": [],
+            "bufferViews": [],
+        }
+        self._chunks = []
+        self._length = 0
+        self._extensions = set()
+        self._required = set()
+
+    def _add(self, key: str, item: Dict) -> int:
+        self.gltf[key].append(item)
+        return len(self.gltf[key]) - 1
+
+    def use_extension(self, name: str, required: bool = False):
+        self._extensions.add(name)
+        if required:
+            self._required.add(name)
+
+    def buffer_view(self, data, target: int = None, stride: int = None) -> int:
+        """
+        Append data (an array, or bytes) to the binary buffer, 4-byte aligned.
+        """
+        padding = -self._length % 4
+        if padding:
+            self._chunks.append(bytes(padding))
+            self._length += padding
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        view = {"buffer": 0, "byteOffset": self._length, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        if stride is not None:
+            view["byteStride"] = stride
+        self._chunks.append(data)
+        self._length += len(data)
+        return self._add("bufferViews", view)
+
+    def accessor(self,
+        data: np.ndarray,
+        components: int = None,
+        normalized: bool = False,
+        bounds: bool = False,
+        target: int = _ARRAY_BUFFER,
+        ) -> int:
+        """
+        Add an accessor for an (N,) or (N, k) array, reading the first
+        `components` (default k) columns of each row.
+        """
+        data = np.ascontiguousarray(data)
+        if data.ndim == 1:
+            data = data[:, None]
+        width = data.shape[1]
+        components = width if components is None else components
+        stride = data.strides[0] if components != width else None
+        accessor = {
+            "bufferView": self.buffer_view(data, target, stride),
+            "componentType": _COMPONENT_TYPES[data.dtype],
+            "count": len(data),
+            "type": _ACCESSOR_TYPES[components],
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if bounds and len(data):
+            accessor["min"] = data[:, :components].min(axis=0).tolist()
+            accessor["max"] = data[:, :components].max(axis=0).tolist()
+        return self._add("accessors", accessor)
+
+    def material(self, material, unlit: bool = False, texture: int = None) -> int:
+        rgb = _material_rgb(material)
+        opacity = float(getattr(material, "opacity", 1.))
+        pbr = {"baseColorFactor": rgb + [opacity], "metallicFactor": 0., "roughnessFactor": 1.}
+        if texture is not None:
+            pbr["baseColorTexture"] = {"index": texture}
+        item = {"pbrMetallicRoughness": pbr}
+        if getattr(material, "transparent", False):
+            item["alphaMode"] = "BLEND"
+        if getattr(material, "side", None) == "DoubleSide":
+            item["doubleSided"] = True
+        if unlit:
+            self.use_extension("KHR_materials_unlit")
+            item["extensions"] = {"KHR_materials_unlit": {}}
+        if type(material).__name__ == "PointsMaterial":
+            # glTF has no point size; the HTML viewer reads it from here
+            item["extras"] = {
+                "pointSize": float(material.size),
+                "sizeAttenuation": bool(material.sizeAttenuation),
+                "round": material.map is _circle_map(),
+            }
+        return self._add("materials", item)
+
+    def texture(self, texture) -> Union[int, None]:
+        image = getattr(texture, "data", None)
+        if isinstance(image, np.ndarray):
+            source = {
+                "bufferView": self.buffer_view(np.frombuffer(_png(image), np.uint8)),
+                "mimeType": "image/png",
+            }
+        elif getattr(texture, "imageUri", None):
+            source = {"uri": texture.imageUri}
+        else:
+            return None
+        if not self.gltf["samplers"]:
+            self._add("samplers", {"magFilter": 9729, "minFilter": 9729})
+        return self._add("textures", {"source": self._add("images", source), "sampler": 0})
+
+    def mesh(self, attributes: Dict[str, int], mode: int, material: int,
+             indices: int = None, name: str = None) -> int:
+        primitive = {"attributes": attributes, "mode": mode, "material": material}
+        if indices is not None:
+            primitive["indices"] = indices
+        item = {"primitives": [primitive]}
+        if name:
+            item["name"] = name
+        return self._add("meshes", item)
+
+    def node(self, item: Dict, parent: Dict = None) -> int:
+        index = self._add("nodes", item)
+        if parent is None:
+            self.gltf["scenes"][0]["nodes"].append(index)
+        else:
+            parent.setdefault("children", []).append(index)
+        return index
+
+    def write(self, file):
+        """
+        Write the scene as GLB to a binary file object.
+        """
+        gltf = {k: v for k, v in self.gltf.items() if v != []}
+        if self._extensions:
+            gltf["extensionsUsed"] = sorted(self._extensions)
+        if self._required:
+            gltf["extensionsRequired"] = sorted(self._required)
+        padding = -self._length % 4
+        if self._length:
+            gltf["buffers"] = [{"byteLength": self._length + padding}]
+        content = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        content += b" " * (-len(content) % 4)
+        total = 12 + 8 + len(content) + (8 + self._length + padding if self._length else 0)
+        file.write(struct.pack("<4sII", b"glTF", 2, total))
+        file.write(struct.pack("<I4s", len(content), b"JSON"))
+        file.write(content)
+        if self._length:
+            file.write(struct.pack("<I4s", self._length + padding, b"BIN\x00"))
+            for chunk in self._chunks:
+                file.write(chunk)
+            file.write(bytes(padding))
+
+
+def _add_object(builder: _GLTFBuilder, obj, buffers: Dict[str, np.ndarray],
+                parent: Dict, normals: bool = True):
+    """
+    Add a pythreejs object, with its geometry's buffers, as a node of parent.
+    """
+    # pylint: disable=too-many-locals,too-many-branches
+    kind = type(obj).__name__
+    geometry = getattr(obj, "geometry", None)
+    material = getattr(obj, "material", None)
+    attributes, indices, instances = {}, None, None
+    colors = buffers.get("color")
+    texture = None
+    unlit = kind != "Mesh"
+    if kind == "AxesHelper":
+        size = float(obj.size)
+        positions = np.zeros((6, 3), dtype=np.float32)
+        positions[[1, 3, 5], [0, 1, 2]] = size
+        colors, mode = _AXES_COLORS, _LINES
+    elif kind == "LineSegments2":
+        positions = buffers["positions"].reshape(-1, 3)
+        colors = buffers.get("colors")
+        mode = _LINES
+    elif kind in ("LineSegments", "Points", "Mesh"):
+        mode = {"LineSegments": _LINES, "Points": _POINTS, "Mesh": _TRIANGLES}[kind]
+        if type(geometry).__name__ == "PlaneGeometry":
+            w, h = geometry.width / 2, geometry.height / 2
+            positions = np.array([[-w, h, 0], [w, h, 0], [-w, -h, 0], [w, -h, 0]], dtype=np.float32)
+            buffers = {"normal": np.tile(np.float32([0, 0, 1]), (4, 1)), "index": np.uint16([0, 2, 1, 2, 3, 1])}
+            uv = np.float32([[0, 1], [1, 1], [0, 0], [1, 0]])
+            map_ = getattr(material, "map", None)
+            if map_ is not None and getattr(map_, "flipY", False):
+                # three.js flips these on upload, so that their first row is
+                # drawn at the top, as glTF always does
+                uv[:, 1] = 1 - uv[:, 1]
+            if map_ is not None:
+                texture = builder.texture(map_)
+                attributes["TEXCOORD_0"] = builder.accessor(uv)
+            unlit = unlit or type(material).__name__ == "MeshBasicMaterial"
+        elif "offset" in buffers:
+            # An instanced glyph: one mesh, drawn at every offset
+            positions = buffers["position"]
+            instances = {
+                "TRANSLATION": builder.accessor(_as_contiguous(buffers["offset"], np.float32)),
+                "SCALE": builder.accessor(np.repeat(
+                    _as_contiguous(buffers["scale"], np.float32).reshape(-1, 1), 3, axis=1
+                )),
+            }
+            if buffers.get("instanceColor") is not None:
+                instances["_COLOR_0"] = builder.accessor(
+                    _as_contiguous(buffers["instanceColor"], np.float32)
+                )
+            builder.use_extension("EXT_mesh_gpu_instancing", required=True)
+        else:
+            positions = buffers["position"]
+            unlit = unlit or type(material).__name__ == "MeshBasicMaterial"
+        if buffers.get("index") is not None:
+            indices = _as_index_buffer(buffers["index"], len(positions))
+    else:
+        raise ValueError(f"Cannot export a {kind}")
+    if not len(positions):
+        return
+
+    if np.asarray(positions).dtype == np.int16:
+        # Quantized by the layer, and mapped back by the node's transform;
+        # padded to four bytes per component, as vertex attributes must be
+        positions = np.asarray(positions).reshape(-1, 3)
+        padded = np.zeros((len(positions), 4), dtype=np.int16)
+        padded[:, :3] = positions
+        builder.use_extension("KHR_mesh_quantization", required=True)
+        attributes["POSITION"] = builder.accessor(padded, components=3, bounds=True)
+    else:
+        positions = _as_contiguous(positions, np.float32).reshape(-1, 3)
+        attributes["POSITION"] = builder.accessor(positions, bounds=True)
+    if mode == _TRIANGLES and (normals or buffers.get("normal") is not None):
+        normal = buffers.get("normal")
+        if normal is None:
+            normal = _vertex_normals(
+                np.asarray(positions, dtype=np.float32), np.asarray(indices).reshape(-1, 3)
+            )
+        builder.use_extension("KHR_mesh_quantization", required=True)
+        attributes["NORMAL"] = builder.accessor(_normal_bytes(normal), components=3, normalized=True)
+    if colors is not None:
+        attributes["COLOR_0"] = builder.accessor(_color_bytes(colors), normalized=True)
+    if indices is not None:
+        indices = builder.accessor(indices, target=_ELEMENT_ARRAY_BUFFER)
+    node = {
+        "mesh": builder.mesh(
+            attributes, mode, builder.material(material, unlit, texture), indices, obj.name
+        ),
+        **_transform(obj),
+    }
+    if instances is not None:
+        node["extensions"] = {"EXT_mesh_gpu_instancing": {"attributes": instances}}
+    builder.node(node, parent)
+
+
+def _build(figure, layers: Iterable = None, normals: bool = True) -> _GLTFBuilder:
+    builder = _GLTFBuilder()
+    if layers is None:
+        layers = list(figure._layers.values())  # pylint: disable=protected-access
+    elif not isinstance(layers, Iterable):
+        layers = [layers]
+    for layer in layers:
+        group = {"name": layer._LAYER_NAME, **_transform(layer.group)}  # pylint: disable=protected-access
+        builder.node(group)
+        for obj, buffers in layer._export_objects():  # pylint: disable=protected-access
+            _add_object(builder, obj, buffers, group, normals)
+
+    camera = figure._camera  # pylint: disable=protected-access
+    background = figure.background
+    builder.gltf["scenes"][0]["extras"] = {
+        "camera": {
+            "position": list(camera.position),
+            "up": list(camera.up),
+            "target": list(figure.controls[0].target),
+            "fov": camera.fov,
+            "near": camera.near,
+            "far": camera.far,
+        },
+        "background": background if background is None or isinstance(background, str)
+                      else [float(c) for c in background],
+    }
+    return builder
+
+
+def write_glb(figure, file, layers: Iterable = None, normals: bool = True):
+    """
+    Write the layers of a figure to a binary glTF (.glb) file.
+
+    Every shown object of each layer becomes a node under one node per
+    layer, which carries the layer's transform. Geometry is written from
+    the layers' numpy buffers: positions as float32, indices as uint16 or
+    uint32, colors as uint8 and normals as int8, so the file is close to
+    the size of the raw buffers. Glyphs are written once, and instanced
+    with EXT_mesh_gpu_instancing. Point sizes, the camera and the
+    background are kept in extras, for write_html.
+
+    Arguments:
+        figure: The pytri#Figure to export
+        file: Path or binary file object to write to
+        layers: A layer or layers to export. Defaults to every layer.
+        normals (True): Compute vertex normals for meshes without them, so
+            that meshes are smoothly shaded in any viewer. Without them,
+            glTF viewers shade meshes flat.
+
+    """
+    builder = _build(figure, layers, normals)
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            builder.write(f)
+    else:
+        builder.write(file)
+
+
+class _Base64Writer:
+    """
+    A binary file-like object that writes base64 text to a text file.
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self._rest = b""
+
+    def write(self, data):
+        view = memoryview(data).cast("B")
+        if self._rest:
+            n = min(3 - len(self._rest), len(view))
+            self._rest += bytes(view[:n])
+            view = view[n:]
+            if len(self._rest) < 3:
+                return
+            self._file.write(base64.b64encode(self._rest).decode("ascii"))
+        whole = len(view) - len(view) % 3
+        for start in range(0, whole, _BASE64_CHUNK):
+            chunk = view[start:min(start + _BASE64_CHUNK, whole)]
+            self._file.write(base64.b64encode(chunk).decode("ascii"))
+        self._rest = bytes(view[whole:])
+
+    def close(self):
+        self._file.write(base64.b64encode(self._rest).decode("ascii"))
+        self._rest = b""
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>html, body { margin: 0; height: 100%; overflow: hidden; }</style>
+<script type="importmap">
+{"imports": {
+    "three": "https://unpkg.com/three@0.160.0/build/three.module.js",
+    "three/addons/": "https://unpkg.com/three@0.160.0/examples/jsm/"
+}}
+</script>
+</head>
+<body>
+<script id="pytri-scene" type="model/gltf-binary">"""
+
+_HTML_TAIL = """</script>
+<script type="module">
+import * as THREE from "three";
+import { GLTFLoader } from "three/addons/loaders/GLTFLoader.js";
+import { OrbitControls } from "three/addons/controls/OrbitControls.js";
+
+// Colors are drawn as given, as they are by the pytri widget
+THREE.ColorManagement.enabled = false;
+const renderer = new THREE.WebGLRenderer({ antialias: true, alpha: true });
+renderer.outputColorSpace = THREE.LinearSRGBColorSpace;
+renderer.useLegacyLights = true;
+renderer.setPixelRatio(window.devicePixelRatio);
+document.body.appendChild(renderer.domElement);
+
+const scene = new THREE.Scene();
+const camera = new THREE.PerspectiveCamera();
+const light = new THREE.DirectionalLight(0xffffff, 0.6);
+light.position.set(3, 5, 1);
+camera.add(light);
+scene.add(camera, new THREE.AmbientLight(0xcccccc));
+const controls = new OrbitControls(camera, renderer.domElement);
+
+function circle() {
+    const canvas = document.createElement("canvas");
+    canvas.width = canvas.height = 64;
+    const context = canvas.getContext("2d");
+    context.fillStyle = "#ffffff";
+    context.beginPath();
+    context.arc(32, 32, 32, 0, 2 * Math.PI);
+    context.fill();
+    return new THREE.CanvasTexture(canvas);
+}
+
+function resize() {
+    renderer.setSize(window.innerWidth, window.innerHeight);
+    camera.aspect = window.innerWidth / window.innerHeight;
+    camera.updateProjectionMatrix();
+}
+
+const data = document.getElementById("pytri-scene").textContent.trim();
+const buffer = await (await fetch("data:model/gltf-binary;base64," + data)).arrayBuffer();
+new GLTFLoader().parse(buffer, "", (gltf) => {
+    const extras = gltf.scene.userData;
+    gltf.scene.traverse((obj) => {
+        const material = obj.material;
+        if (!material) return;
+        if (material.map) material.map.colorSpace = THREE.NoColorSpace;
+        if (obj.isMesh && material.isMeshStandardMaterial) {
+            // pytri meshes are Lambert-shaded
+            obj.material = new THREE.MeshLambertMaterial({
+                color: material.color, map: material.map, vertexColors: material.vertexColors,
+                transparent: material.transparent, opacity: material.opacity, side: material.side,
+            });
+        }
+        if (obj.isPoints) {
+            material.size = material.userData.pointSize || 1;
+            material.sizeAttenuation = !!material.userData.sizeAttenuation;
+            if (material.userData.round) {
+                material.map = circle();
+                material.alphaTest = 0.5;
+            }
+        }
+    });
+    scene.add(gltf.scene);
+    if (extras.background) {
+        scene.background = new THREE.Color(...[].concat(extras.background));
+    }
+    const view = extras.camera;
+    camera.fov = view.fov;
+    camera.near = view.near;
+    camera.far = view.far;
+    camera.up.fromArray(view.up);
+    camera.position.fromArray(view.position);
+    controls.target.fromArray(view.target);
+    controls.update();
+    resize();
+    window.addEventListener("resize", resize);
+    renderer.setAnimationLoop(() => renderer.render(scene, camera));
+});
+</script>
+</body>
+</html>
+"""
+
+
+def write_html(figure, file, layers: Iterable = None, normals: bool = True,
+               title: str = "pytri"):
+    """
+    Write the layers of a figure to a single HTML page.
+
+    The scene is embedded as a base64-encoded GLB (see write_glb) and shown
+    with a three.js viewer with orbit controls. Base64 makes the page a
+    third larger than the GLB.
+
+    The page loads three.js (0.160.0) from unpkg.com, so it needs network
+    access to be viewed; only the scene is embedded. To view a scene
+    offline, export it with write_glb and open it in any glTF viewer.
+
+    Arguments:
+        figure: The pytri#Figure to export
+        file: Path or text file object to write to
+        layers: A layer or layers to export. Defaults to every layer.
+        normals (True): See write_glb
+        title ("pytri"): The page title
+
+    """
+    builder = _build(figure, layers, normals)
+    if isinstance(file, str):
+        with open(file, "w", encoding="utf-8") as f:
+            _write_html(builder, f, title)
+    else:
+        _write_html(builder, file, title)
+
+
+def _write_html(builder: _GLTFBuilder, file, title: str):
+    file.write(_HTML_HEAD.replace("$title", html.escape(title)))
+    encoder = _Base64Writer(file)
+    builder.write(encoder)
+    encoder.close()
+    file.write(_HTML_TAIL)
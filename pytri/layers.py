@@ -13,32 +13,268 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import os
+import sys
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from typing import Callable, Dict, Hashable, Iterable, Tuple, Union
 from warnings import warn
-import networkx as nx
 import numpy as np
-import trimesh
 from pythreejs import (
     AxesHelper, BufferAttribute, BufferGeometry, DataTexture,
-    Group, ImageTexture, LineMaterial, LineSegments2,
-    LineSegmentsGeometry, Mesh, MeshBasicMaterial, MeshLambertMaterial,
-    PlaneGeometry,
-    Points, PointsMaterial)
-
-from .utils import CIRCLE_MAP, _normalize_shift
+    Group, ImageTexture, InstancedBufferAttribute, InstancedBufferGeometry,
+    LineBasicMaterial, LineMaterial, LineSegments,
+    LineSegments2, LineSegmentsGeometry, Mesh, MeshBasicMaterial,
+    MeshLambertMaterial, PlaneGeometry,
+    Points, PointsMaterial, ShaderMaterial)
+
+from . import stats
+from .cache import CachedMesh, MeshCache, default_mesh_cache
+from .lod import PointOctree, _in_view, simplify_mesh
+from .spatial import PointIndex
+from .utils import (SWC_TYPE_COLORS, _as_contiguous, _circle_map,
+                    _as_index_buffer, _as_texture_image, _downsample, _as_line_segments,
+                    _broadcast_line_colors, _coord_metrics, _geometry_buffers,
+                    _index_dtype, _normalize_shift, _pad_rows,
+                    _point_triangle_distances, _quantization_frame, _color_scale,
+                    _quantize_colors, _quantize_positions, _scaled_colors,
+                    _euler_quaternion, _object_matrix, _quaternion_matrix, _stack_columns,
+                    _to_hex_color, _to_rgb, _vertex_normals, _xyz_fields,
+                    graph_to_arrays, swc_to_arrays)
 
 # pylint: disable=keyword-arg-before-vararg,attribute-defined-outside-init
 Coord3 = Tuple[float, float, float]
 ColorRGB = Tuple[float,float,float]
 Edge = Tuple[Coord3, Coord3]
 
+_MeshArrays = namedtuple("_MeshArrays", ["vertices", "faces"])
+
+# Bytes saved by sending a layer's buffers quantized rather than as float32,
+# and the largest distance between a position and its quantized value
+QuantizationReport = namedtuple("QuantizationReport", ["bytes_saved", "max_error"])
+
+# DataTexture formats of uint8 images by number of channels
+_TEXTURE_FORMATS = {
+    1: "LuminanceFormat",
+    2: "LuminanceAlphaFormat",
+    3: "RGBFormat",
+    4: "RGBAFormat",
+}
+
+def _data_texture(data: np.ndarray, flip: bool = False) -> DataTexture:
+    """
+    A texture of a uint8 image from utils#_as_texture_image. Unless
+    flipped on upload, like image files are, row 0 is drawn at the bottom.
+    """
+    channels = 1 if data.ndim == 2 else data.shape[2]
+    return DataTexture(
+        data=data,
+        format=_TEXTURE_FORMATS[channels],
+        type="UnsignedByteType",
+        flipY=flip,
+        unpackAlignment=1,
+        minFilter="LinearFilter",
+    )
+
+def _trimesh():
+    # trimesh (and scipy behind it) is slow to import; only load it for
+    # layers that actually read or build meshes
+    import trimesh  # pylint: disable=import-outside-toplevel
+    return trimesh
+
+def _is_instance(obj, module: str, name: str) -> bool:
+    """
+    Whether obj is an instance of module.name, without importing module.
+
+    If module was never imported, obj cannot be one of its instances.
+
+    """
+    mod = sys.modules.get(module)
+    return mod is not None and isinstance(obj, getattr(mod, name))
+
+def _array_bounds(points):
+    """
+    The (min, max) corners of an in-memory array of 3D points, of any shape
+    ending in 3, or None for anything else. Memory-mapped arrays are left
+    alone too, since finding their bounds would read them from disk.
+    """
+    if (not isinstance(points, np.ndarray) or isinstance(points, np.memmap)
+            or points.ndim < 2 or points.shape[-1] != 3 or points.size == 0):
+        return None
+    points = points.reshape(-1, 3)
+    return points.min(axis=0), points.max(axis=0)
+
+def _read_mesh(mesh, cache=None):
+    """
+    Resolve a mesh argument to an object with vertices and faces.
+
+    Arguments:
+        mesh: Mesh object, path to a mesh file, or (vertices, faces) tuple
+            of arrays, np.memmaps or .npy paths
+        cache: cache#MeshCache to load mesh files through, if any
+
+    """
+    if isinstance(mesh, str):
+        # perhaps this is a filename?
+        try:
+            return cache.load(mesh) if cache else _trimesh().load(mesh)
+        except Exception as e:
+            raise ValueError(
+                "Did not understand arguments to method Figure#mesh"
+            ) from e
+    if isinstance(mesh, tuple) and len(mesh) == 2:
+        return _MeshArrays(*(
+            np.load(a, mmap_mode="r") if isinstance(a, str) else a for a in mesh
+        ))
+    return mesh
+
+# A mesh's float32 vertices, (F, 3) faces in the index dtype for its vertex
+# count, and float32 vertex normals or None
+_PreparedMesh = namedtuple("_PreparedMesh", ["vertices", "faces", "normals"])
+
+def _prepare_mesh(mesh, transform: Callable = None, normalize: bool = False,
+                  compute_normals: bool = False) -> _PreparedMesh:
+    """
+    Convert a mesh object from _read_mesh into the arrays MeshLayer draws.
+    See MeshLayer for the arguments.
+    """
+    if isinstance(mesh, _PreparedMesh):
+        return mesh
+    # trimesh and the mesh cache store the normals of unmodified vertices
+    trimesh_normals = (
+        (isinstance(mesh, CachedMesh) or _is_instance(mesh, "trimesh", "Trimesh"))
+        and transform is None and not normalize
+    )
+    if transform is None:
+        transform = lambda x: x
+
+    verts = transform(mesh.vertices)
+
+    if normalize:
+        # Normalize the vertex indices to be between -1,1
+        # Shifting these does change the coordinate system,
+        # so visualizing multiple meshes won't work
+        verts = np.array(verts, dtype=np.float32)
+        verts[:, 0] = _normalize_shift(verts[:, 0])
+        verts[:, 1] = _normalize_shift(verts[:, 1])
+        verts[:, 2] = _normalize_shift(verts[:, 2])
+
+    verts = _as_contiguous(verts, np.float32)
+    faces = _as_contiguous(mesh.faces, _index_dtype(len(verts)))
+    normals = None
+    if compute_normals:
+        if trimesh_normals:
+            normals = mesh.vertex_normals
+        else:
+            normals = _vertex_normals(verts, faces)
+        normals = np.ascontiguousarray(normals, dtype=np.float32)
+    return _PreparedMesh(verts, faces, normals)
+
+def _load_mesh(mesh, cache=None, transform=None, normalize=False, compute_normals=False):
+    # Runs in the worker threads or processes of _load_meshes
+    return _prepare_mesh(_read_mesh(mesh, cache), transform, normalize, compute_normals)
+
+def _load_meshes(meshes: Iterable, workers: int = None, processes: bool = True,
+                 max_in_flight: int = None, **kwargs) -> Iterable[_PreparedMesh]:
+    """
+    Read and prepare meshes in a pool of worker processes (or threads),
+    yielding them in order.
+
+    At most max_in_flight meshes are loading or loaded but not yet
+    consumed at once, so memory stays bounded however many meshes there
+    are. Each is replaced in the pool before it is yielded, so the workers
+    keep loading while the caller builds widgets from it.
+
+    Arguments:
+        meshes: Iterable of meshes in any form accepted by MeshLayer
+        workers (int: None): Pool size. Defaults to the number of CPUs;
+            1 loads the meshes one at a time, without a pool.
+        processes (bool: True): Use processes rather than threads. Then
+            transform must be picklable (e.g. a module-level function).
+        max_in_flight (int: None): Defaults to twice the pool size
+        kwargs: cache, transform, normalize and compute_normals, as for
+            MeshLayer
+
+    """
+    if kwargs.get("cache") is True:
+        kwargs["cache"] = default_mesh_cache()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for mesh in meshes:
+            yield _load_mesh(mesh, **kwargs)
+        return
+    meshes = iter(meshes)
+    pool = (ProcessPoolExecutor if processes else ThreadPoolExecutor)(max_workers=workers)
+    pending = deque()
+    try:
+        for mesh in islice(meshes, max_in_flight or 2 * workers):
+            pending.append(pool.submit(_load_mesh, mesh, **kwargs))
+        while pending:
+            loaded = pending.popleft().result()
+            for mesh in islice(meshes, 1):
+                pending.append(pool.submit(_load_mesh, mesh, **kwargs))
+            yield loaded
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+# A point-budgeted scatter re-sends its points after a camera move only if
+# more than this fraction of the budget would move between octree leaves
+_RESELECT_FRACTION = 0.01
+
+_GLYPH_VERTEX_SHADER = """
+attribute vec3 offset;
+attribute float scale;
+attribute vec3 instanceColor;
+varying vec3 vColor;
+varying vec3 vNormal;
+void main() {
+    vColor = instanceColor;
+    vNormal = normalize(normalMatrix * normal);
+    gl_Position = projectionMatrix * modelViewMatrix * vec4(offset + position * scale, 1.0);
+}
+"""
+
+_GLYPH_FRAGMENT_SHADER = """
+varying vec3 vColor;
+varying vec3 vNormal;
+void main() {
+    // Light from the camera, so every glyph is shaded the same way
+    gl_FragColor = vec4(vColor * (0.4 + 0.6 * abs(vNormal.z)), 1.0);
+}
+"""
+
+def _glyph_mesh(glyph) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The vertices, faces and vertex normals of a glyph of unit size.
+
+    Arguments:
+        glyph: "sphere", "cube", or a mesh (anything accepted by MeshLayer)
+            to use as-is
+
+    """
+    if glyph in ("sphere", "o"):
+        mesh = _trimesh().creation.icosphere(subdivisions=2, radius=0.5)
+    elif glyph in ("cube", "square"):
+        mesh = _trimesh().creation.box(extents=(1, 1, 1))
+        # Unshared vertices, so each face is flat-shaded
+        mesh.unmerge_vertices()
+    else:
+        mesh = _read_mesh(glyph)
+    verts = _as_contiguous(mesh.vertices, np.float32)
+    return verts, mesh.faces, _vertex_normals(verts, mesh.faces)
+
 class Layer(ABC):
     """
     Abstract Layer class. Not meant to be used on its own.
     """
     
     _LAYER_NAME = "layer"
+    # Decorations (axes, grids) are left out of automatic camera framing
+    _DECORATION = False
     
     def __init__(self,*args, **kwargs) -> None:
         """
@@ -51,6 +287,10 @@ class Layer(ABC):
         self._id = None
         self._objects = []
         self._group = None
+        self._owned_buffers = {}
+        # Bumped whenever get_bounding_box may change, so that a figure can
+        # cache each layer's bounds
+        self._bounds_version = 0
     
     @abstractmethod
     def get_bounding_box(self) -> Tuple[Coord3, Coord3]:
@@ -78,6 +318,47 @@ class Layer(ABC):
 
         return self._group
     
+    def _bounds_key(self) -> Tuple:
+        """
+        Changes whenever the layer's bounds in the scene may have changed.
+        """
+        group = self.group
+        return (
+            self._bounds_version, group.position, group.quaternion, group.rotation,
+            group.scale, group.matrixAutoUpdate, group.matrix,
+        )
+
+    def _matrix(self) -> np.ndarray:
+        """
+        The 4x4 transform from layer to scene coordinates: the group's
+        position, rotation and scale, or its matrix after set_affine.
+        """
+        return _object_matrix(self.group)
+
+    def _to_local(self, point) -> np.ndarray:
+        """
+        Map a scene coordinate (e.g. a picked point) into the coordinates of
+        the layer's data, undoing the group's transform (see Layer#_matrix).
+        """
+        matrix = self._matrix()
+        return np.linalg.solve(matrix[:3, :3], np.asarray(point, dtype=np.float64) - matrix[:3, 3])
+
+    def world_bounding_box(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The layer's bounding box in scene coordinates, after the group's
+        transform is applied.
+        """
+        lo, hi = (np.asarray(c, dtype=np.float64) for c in self.get_bounding_box())
+        matrix = self._matrix()
+        if np.array_equal(matrix[:3, :3], np.eye(3)):
+            return lo + matrix[:3, 3], hi + matrix[:3, 3]
+        corners = np.array([
+            [(lo, hi)[i][0], (lo, hi)[j][1], (lo, hi)[k][2]]
+            for i, j, k in np.ndindex(2, 2, 2)
+        ])
+        corners = corners @ matrix[:3, :3].T + matrix[:3, 3]
+        return corners.min(axis=0), corners.max(axis=0)
+
     @property
     def affine(self) -> np.ndarray:
         """
@@ -87,10 +368,15 @@ class Layer(ABC):
 
     def set_affine(self, a: np.ndarray):
         """
-        Set affine transform for the entire layer
+        Set affine transform for the entire layer, as a 4x4 array, or as
+        the 16 values of a three.js matrix (column-major). It replaces the
+        position, rotation and scale.
         """
-        self._affine = a
+        if np.shape(a) == (4, 4):
+            a = np.asarray(a, dtype=np.float64).T.ravel()
+        self._affine = tuple(float(v) for v in a)
         sc = self.group
+        sc.matrixAutoUpdate = False
         sc.matrix = self._affine
     
     def rotate(self,
@@ -106,6 +392,7 @@ class Layer(ABC):
         """
         sc = self.group
         sc.rotation = (x,y,z,order)
+        sc.quaternion = tuple(float(v) for v in _euler_quaternion(sc.rotation))
     
     def translate(self, x,y,z):
         """
@@ -134,6 +421,140 @@ class Layer(ABC):
     def _on_click(self, picker):
         return self.on_click(picker)
 
+    def _on_camera_move(self, camera):
+        """
+        Called by the figure with its camera when the camera moves.
+        """
+
+    def _on_remove(self):
+        """
+        Called by the figure when the layer is removed from it, to release
+        what the layer holds on to besides its widgets (e.g. threads).
+        """
+
+    @classmethod
+    def _placeholder_bounds(cls, args, kwargs):
+        """
+        The bounding box of the layer cls(*args, **kwargs) would build, if
+        it can be found cheaply without building it, or None. Figure#add_async
+        outlines it while the layer is built.
+        """
+        return None
+
+    @classmethod
+    def _prepare(cls, args, kwargs):
+        """
+        Do the work of building a layer from these arguments that creates
+        no widgets (reading files, converting arrays...), and return the
+        (args, kwargs) to construct it with instead. Figure#add_async runs
+        this off the event loop; the widgets are then created on it.
+        """
+        return args, kwargs
+
+    def _phase(self, name: str):
+        """
+        A context timing a phase of building the layer ("buffers" or
+        "bounds"), for Figure#stats. A no-op unless stats are enabled.
+        """
+        return stats.phase(self, name)
+
+    def _write_buffer(self, owner, name: str, values, rows=None) -> np.ndarray:
+        """
+        Write values into the array attribute `name` of owner (usually a
+        widget), and sync just that attribute to the frontend.
+
+        rows selects the rows to overwrite; None replaces the whole array.
+        The first partial write copies the array, so that arrays passed in
+        by the user are never modified, and later ones write in place.
+        """
+        array = getattr(owner, name)
+        key = (id(owner), name)
+        if rows is None:
+            new = _as_contiguous(values, array.dtype)
+            if new.shape != array.shape:
+                raise ValueError(f"Expected shape {array.shape}, but got {new.shape}")
+            setattr(owner, name, new)
+            self._owned_buffers.pop(key, None)
+            return new
+        if self._owned_buffers.get(key) is not array:
+            array = np.array(array)
+            array[rows] = values
+            setattr(owner, name, array)
+            self._owned_buffers[key] = array
+        else:
+            array[rows] = values
+            if hasattr(owner, "send_state"):
+                owner.send_state(name)
+        return array
+
+    def _buffers(self, textures: bool = False) -> Iterable[Tuple[str, np.ndarray]]:
+        """
+        Yield (attribute name, array) for each geometry buffer of the
+        layer's objects, and with textures, ("map", data) for each data
+        texture. Buffers shared between objects are yielded once.
+        """
+        seen = set()
+        for obj in self._objects:
+            buffers = list(_geometry_buffers(getattr(obj, "geometry", None)))
+            texture = getattr(getattr(obj, "material", None), "map", None)
+            # The point sprite is shared by every scatter layer
+            if textures and isinstance(getattr(texture, "data", None), np.ndarray) \
+                    and texture is not _circle_map():
+                buffers.append(("map", texture.data))
+            for name, buf in buffers:
+                if id(buf) in seen:
+                    continue
+                seen.add(id(buf))
+                yield name, buf
+
+    def buffer_sizes(self) -> Dict[str, int]:
+        """
+        The number of bytes in each geometry buffer of the layer, summed
+        over its objects and keyed by attribute name. Buffers shared between
+        objects are counted once.
+        """
+        sizes = {}
+        for name, buf in self._buffers():
+            sizes[name] = sizes.get(name, 0) + buf.nbytes
+        return sizes
+
+    def element_counts(self) -> Dict[str, int]:
+        """
+        The number of points, vertices, faces and line segments in the
+        geometry of the layer's objects. Instanced glyphs count as points.
+        """
+        counts = {"points": 0, "vertices": 0, "faces": 0, "segments": 0}
+        for obj in self._objects:
+            buffers = dict(_geometry_buffers(getattr(obj, "geometry", None)))
+            kind = type(obj).__name__
+            if "offset" in buffers:
+                counts["points"] += len(buffers["offset"])
+            elif kind == "Points":
+                counts["points"] += len(buffers["position"])
+            elif kind == "LineSegments2":
+                counts["vertices"] += 2 * len(buffers["positions"])
+                counts["segments"] += len(buffers["positions"])
+            elif "position" in buffers:
+                n = len(buffers["position"])
+                per = 2 if kind == "LineSegments" else 3
+                counts["vertices"] += n
+                elements = buffers["index"].size if "index" in buffers else n
+                counts["segments" if per == 2 else "faces"] += elements // per
+        return counts
+
+    def _export_objects(self):
+        """
+        Yield (object, buffers) for each shown object of the layer, for
+        export#write_glb. buffers maps the object's geometry attribute
+        names to the arrays to write.
+        """
+        for obj in self._objects:
+            if getattr(obj, "visible", True):
+                yield obj, self._export_buffers(obj)
+
+    def _export_buffers(self, obj) -> Dict[str, np.ndarray]:
+        return dict(_geometry_buffers(getattr(obj, "geometry", None)))
+
 class AxesLayer(Layer):
     """
     Add a set of axes to the origin.
@@ -142,6 +563,7 @@ class AxesLayer(Layer):
         size (float: 20): The length of each axis into the positive values.
     """
     _LAYER_NAME = 'axes'
+    _DECORATION = True
     def __init__(self, size: float = 20, *args, **kwargs):
         """
         Add a set of axes to the origin.
@@ -166,15 +588,79 @@ class CoordinateLayer(Layer):
     """
     _LAYER_NAME = 'coordinate'
     #pylint: disable=attribute-defined-outside-init
-    def __init__(self,*args, **kwargs):
+    def __init__(self,*args, quantize: bool = False, **kwargs):
+        """
+        Arguments:
+            quantize (False): Send positions as int16 and colors as uint8
+                instead of float32, to cut the data sent to the browser.
+                Positions are quantized over the layer's bounding box, and
+                each object's transform maps them back, so the layer's
+                own transform (set_affine, rotate, translate) is unchanged.
+                See CoordinateLayer#quantization for the bytes saved and the
+                error introduced.
+        """
         super().__init__(*args, **kwargs)
         self._coords = [[0,0,0]]
+        self._quantize = quantize
+        self._quantization = None
+
+    @classmethod
+    def _placeholder_bounds(cls, args, kwargs):
+        # Positions given as one array
+        return _array_bounds(args[0]) if len(args) == 1 else None
 
     def _calc_coord_metrics(self):
-        coords = self._coords
-        self._coord_max = np.max(coords,axis=0)
-        self._coord_min = np.min(coords,axis=0)
-        self._mean_coords = np.mean(coords, axis=0)
+        with self._phase("bounds"):
+            self._coord_min, self._coord_max, self._mean_coords = _coord_metrics(self._coords)
+    def _invalidate_coord_metrics(self):
+        self._on_coords_changed()
+        for name in ('_coord_min', '_coord_max', '_mean_coords'):
+            self.__dict__.pop(name, None)
+    def _update_coord_metrics(self, old: np.ndarray, new: np.ndarray):
+        """
+        Keep the cached metrics consistent when the coordinate rows old are
+        about to be replaced by new. This is O(len(new)) unless the old rows
+        touched the bounding box, in which case metrics are recomputed
+        lazily.
+        """
+        self._on_coords_changed()
+        if not hasattr(self, '_mean_coords') or len(old) == 0:
+            return
+        old_min, old_max = old.min(axis=0), old.max(axis=0)
+        if (len(old) == len(self._coords)
+                or np.any(old_min <= self._coord_min)
+                or np.any(old_max >= self._coord_max)):
+            self._invalidate_coord_metrics()
+            return
+        self._coord_min = np.minimum(self._coord_min, new.min(axis=0))
+        self._coord_max = np.maximum(self._coord_max, new.max(axis=0))
+        self._mean_coords = self._mean_coords + (
+            new.sum(axis=0, dtype=np.float64) - old.sum(axis=0, dtype=np.float64)
+        ) / len(self._coords)
+    def _extend_coord_metrics(self, new: np.ndarray):
+        """
+        Keep the cached metrics consistent when rows new are about to be
+        appended to self._coords.
+        """
+        self._on_coords_changed()
+        if not hasattr(self, '_mean_coords') or len(new) == 0:
+            return
+        n = len(self._coords)
+        self._coord_min = np.minimum(self._coord_min, new.min(axis=0))
+        self._coord_max = np.maximum(self._coord_max, new.max(axis=0))
+        self._mean_coords = (
+            self._mean_coords * n + new.sum(axis=0, dtype=np.float64)
+        ) / (n + len(new))
+    def _rows(self, n: int, start: int, total: int, capacity: int = None):
+        """
+        The rows slice for an update of n rows at start, or None if the
+        update replaces the whole buffer (of capacity rows, if preallocated).
+        """
+        if start < 0 or start + n > total:
+            raise ValueError(f"Rows {start}:{start + n} out of range for {total}")
+        if start == 0 and n == total and capacity in (None, total):
+            return None
+        return slice(start, start + n)
     def get_bounding_box(self):
         if not (hasattr(self, '_coord_min') and hasattr(self, '_coord_max')):
             self._calc_coord_metrics()
@@ -183,59 +669,401 @@ class CoordinateLayer(Layer):
         if not hasattr(self, '_mean_coords'):
             self._calc_coord_metrics()
         return self._mean_coords
+    def _on_coords_changed(self):
+        self.__dict__.pop('_point_index', None)
+        self._bounds_version += 1
+
+    def nearest_vertex(self, point) -> int:
+        """
+        The index of the vertex nearest a point in layer coordinates.
+
+        The first query builds a spatial#PointIndex over the vertices; it
+        is cached until the vertices change, after which each query visits
+        only the few leaves that can hold the answer.
+        """
+        if getattr(self, '_point_index', None) is None:
+            self._point_index = PointIndex(np.asarray(self._coords, dtype=np.float32))
+        return self._point_index.nearest(point)[0]
+
+    def on_click(self, picker):
+        return f"""
+            layer: {self._LAYER_NAME}
+            vertex: {self.nearest_vertex(self._to_local(picker.point))}
+            point clicked: {picker.point}
+            """
+
+    def _position_attribute(self, positions: np.ndarray) -> BufferAttribute:
+        """
+        Get the position BufferAttribute for an array of vertices.
+
+        Objects in the same layer that draw the same vertex array share one
+        attribute, so the buffer is only sent to the frontend once.
+        """
+        with self._phase("buffers"):
+            shared = getattr(self, '_shared_positions', None)
+            if shared is None or shared[0] is not positions:
+                array = self._quantized(positions) if self._quantize else positions
+                shared = (positions, BufferAttribute(array=array, normalized=False))
+                self._shared_positions = shared
+            return shared[1]
+
+    def _color_attribute(self, colors: np.ndarray) -> BufferAttribute:
+        """
+        Get a color BufferAttribute, uint8 if the layer is quantized.
+        """
+        with self._phase("buffers"):
+            if colors.dtype == np.uint8 and not self._quantize:
+                # Already 8-bit, e.g. colors scaled from the positions
+                return BufferAttribute(array=colors, normalized=True)
+            if not self._quantize:
+                return BufferAttribute(array=colors)
+            return BufferAttribute(array=self._quantized_colors(colors), normalized=True)
+
+    @property
+    def quantization(self) -> Union[QuantizationReport, None]:
+        """
+        The bytes saved by quantizing the layer and the largest positional
+        error introduced, in layer coordinates; None if it is not quantized.
+        """
+        return self._quantization
+
+    def _report_quantization(self, bytes_saved: int, error: float = 0.):
+        report = self._quantization or QuantizationReport(0, 0.)
+        self._quantization = QuantizationReport(
+            report.bytes_saved + bytes_saved, max(report.max_error, error)
+        )
+
+    def _quantized(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Quantize positions to int16. Every object of the layer shares one
+        frame, taken from the first positions quantized unless it is set
+        beforehand.
+        """
+        if getattr(self, '_quantization_frame', None) is None:
+            self._quantization_frame = _quantization_frame(*_coord_metrics(positions)[:2])
+        quantized, error = _quantize_positions(positions, *self._quantization_frame)
+        self._report_quantization(quantized.size * 4 - quantized.nbytes, error)
+        return quantized
+
+    def _quantized_colors(self, colors: np.ndarray) -> np.ndarray:
+        colors = np.asarray(colors)
+        quantized = _quantize_colors(colors)
+        # Saved against the buffer sent otherwise: float32, or the colors
+        # themselves if they are already 8-bit
+        self._report_quantization(colors.size * min(colors.itemsize, 4) - quantized.nbytes)
+        return quantized
+
+    def _quantized_normals(self, normals: np.ndarray) -> np.ndarray:
+        """
+        Quantize unit normals to int8, in the quantized positions' frame.
+        """
+        # Normals scale inversely to the dequantizing object transform
+        normals = np.asarray(normals, dtype=np.float64) * self._quantization_frame[1]
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        np.divide(normals, lengths, out=normals, where=lengths > 0)
+        quantized = np.round(normals * 127).astype(np.int8)
+        self._report_quantization(quantized.size * 4 - quantized.nbytes)
+        return quantized
+
+    def _dequantize(self, obj):
+        """
+        Set the transform of an object that draws quantized positions, to
+        map them back into layer coordinates.
+        """
+        center, scale = self._quantization_frame
+        obj.position = tuple(center.tolist())
+        obj.scale = tuple(scale.tolist())
 class LinesLayer(CoordinateLayer):
     """
     Plots a series of line segments.
 
     Arguments:
         lines: Iterable of (u,v), where u,v are 3 tuples of float coordinates.
-            Lines are drawn between each u and v.
+            Lines are drawn between each u and v. An (N, 2, 3) float32 array
+            is used as-is, without copying.
         colors: Either
             * An iterable of (u,c), where u is a coordinate, and c is a color.
             * a list of c (3coord, RGB), the same length as lines
             * single 3 tuple (RGB) applied to all lines
+            * an (N, 2, 3), (N, 3) or (3,) array, broadcast to every vertex
+        indices: Optional (E, 2) array of vertex indices. If given, lines is
+            an (N, 3) array of vertices and each row of indices is drawn as a
+            segment, as indexed geometry that shares the vertex buffer. WebGL
+            draws indexed lines one pixel wide, ignoring width.
+        capacity: Preallocate room for this many segments, to stream more
+            in with append or extend
 
 
     """
     _LAYER_NAME = 'lines'
     def __init__(self,
-        lines: Iterable[Edge],
-        colors: Union[Iterable[Tuple[Coord3, ColorRGB]], Iterable[ColorRGB], ColorRGB, None] = None,
+        lines: Union[Iterable[Edge], np.ndarray],
+        colors: Union[Iterable[Tuple[Coord3, ColorRGB]], Iterable[ColorRGB], ColorRGB, np.ndarray, None] = None,
         width:int = 10,
         *args,
+        indices: Union[np.ndarray, None] = None,
+        capacity: int = None,
         **kwargs):
         """
         Plots a series of line segments.
 
         Arguments:
             lines: Iterable of (u,v), where u,v are 3 tuples of float coordinates.
-            Lines are drawn between each u and v.
+            Lines are drawn between each u and v. An (N, 2, 3) float32 array
+            is used as-is, without copying.
             colors: Either
                 * An iterable of (u,c), where u is a coordinate, and c is a color.
                 * a list of c (3coord, RGB), the same length as lines
                 * single 3 tuple (RGB) applied to all lines
+                * an (N, 2, 3), (N, 3) or (3,) array, broadcast to every vertex
+            indices: Optional (E, 2) array of vertex indices. If given, lines
+                is an (N, 3) array of vertices and each row of indices is
+                drawn as a segment, as indexed geometry that shares the vertex
+                buffer. WebGL draws indexed lines one pixel wide, ignoring
+                width.
+            capacity: Preallocate room for this many segments, so that
+                more can be streamed in with append or extend without
+                creating a new layer. The buffers grow geometrically when
+                full. Unused room is filled with copies of the first
+                segment, which draw over it.
+            quantize (False): Send positions as int16 and colors as uint8
+                (see CoordinateLayer). Wide lines can only be sent as
+                float32, so quantized lines are drawn one pixel wide, as
+                indexed lines are, and are recolored by vertex.
+
+
+        """
+        super().__init__(*args, **kwargs)
+        self._segment_capacity = None
+        if indices is not None or self._quantize:
+            if capacity is not None:
+                raise ValueError("Indexed or quantized lines cannot be preallocated")
+            if indices is None:
+                segments = _as_line_segments(lines)
+                colors = _broadcast_line_colors(colors, len(segments)).reshape(-1, 3)
+                lines = segments.reshape(-1, 3)
+            self._init_indexed(lines, indices, colors, width)
+            return
+        positions = _as_line_segments(lines)
+        colors = _broadcast_line_colors(colors, len(positions))
+        self._segment_count = len(positions)
+        if capacity is not None:
+            positions, colors = self._preallocate(
+                positions, colors, max(capacity, len(positions))
+            )
+        # A (2N, 3) view onto the segment buffer; bounds are computed from it
+        # directly rather than from a flattened Python list.
+        self._coords = positions[:self._segment_count].reshape(-1, 3)
+        with self._phase("buffers"):
+            geo = LineSegmentsGeometry(
+                positions=positions,
+                colors=colors,
+            )
+            if capacity is not None:
+                self._owned_buffers[(id(geo), "positions")] = geo.positions
+                self._owned_buffers[(id(geo), "colors")] = geo.colors
+            mat = LineMaterial(linewidth=width, vertexColors="VertexColors")
+            self._lines = LineSegments2(geo, mat)
+        self._objects.append(self._lines)
+
+    @classmethod
+    def _prepare(cls, args, kwargs):
+        if not args or kwargs.get("indices") is not None:
+            return args, kwargs
+        return (_as_line_segments(args[0]), *args[1:]), kwargs
+
+    def _init_indexed(self, vertices, indices, colors, width):
+        vertices = _as_contiguous(vertices, np.float32)
+        if vertices.ndim != 2 or vertices.shape[1] != 3:
+            raise ValueError(
+                f"Expected vertices of shape (N, 3), but got {vertices.shape}"
+            )
+        self._coords = vertices
+        with self._phase("buffers"):
+            attributes = {"position": self._position_attribute(vertices)}
+            if indices is not None:
+                attributes["index"] = BufferAttribute(array=_as_index_buffer(indices, len(vertices)))
+            if colors is None or isinstance(colors, str) or np.ndim(colors) == 1:
+                mat = LineBasicMaterial(
+                    color=_to_hex_color((0, 0, 0) if colors is None else colors),
+                    linewidth=width,
+                )
+            else:
+                attributes["color"] = self._color_attribute(
+                    np.ascontiguousarray(colors, dtype=np.float32)
+                )
+                mat = LineBasicMaterial(linewidth=width, vertexColors="VertexColors")
+            self._lines = LineSegments(BufferGeometry(attributes=attributes), mat)
+        if self._quantize:
+            self._dequantize(self._lines)
+        self._objects.append(self._lines)
+
+    @property
+    def _indexed(self) -> bool:
+        return isinstance(self._lines, LineSegments)
+
+    def on_click(self, picker):
+        vertex = self.nearest_vertex(self._to_local(picker.point))
+        return f"""
+            layer: {self._LAYER_NAME}
+            {"vertex" if self._indexed else "segment"}: {vertex if self._indexed else vertex // 2}
+            point clicked: {picker.point}
+            """
+
+    def _preallocate(self, positions: np.ndarray, colors: np.ndarray, capacity: int):
+        self._segment_capacity = capacity
+        return (
+            _pad_rows(positions, self._segment_count, capacity),
+            _pad_rows(colors, self._segment_count, capacity),
+        )
+
+    def append(self, lines: np.ndarray, colors=None):
+        """
+        Stream more segments into a layer created with a capacity.
 
+        The segments are written into the existing buffers; when they are
+        full, the capacity doubles.
+
+        Arguments:
+            lines: (M, 2, 3) segments to add
+            colors: Colors for the new segments, in any form accepted by the
+                constructor. Defaults to black.
 
         """
-        super().__init__(layer_name='lines',*args, **kwargs)
-        if isinstance(colors, tuple):
-            color = colors
-            colors = None
+        if self._segment_capacity is None:
+            raise ValueError("append needs a layer created with a capacity")
+        segments = _as_line_segments(lines)
+        m = len(segments)
+        if m == 0:
+            return
+        colors = _broadcast_line_colors(colors, m)
+        geo = self._lines.geometry
+        n = self._segment_count
+        if n + m > self._segment_capacity:
+            positions, old_colors = self._preallocate(
+                geo.positions, geo.colors, max(2 * self._segment_capacity, n + m)
+            )
+            self._owned_buffers[(id(geo), "positions")] = positions
+            self._owned_buffers[(id(geo), "colors")] = old_colors
+        else:
+            positions, old_colors = geo.positions, geo.colors
+        positions[n:n + m] = segments
+        old_colors[n:n + m] = colors
+        if n == 0:
+            positions[m:] = segments[0]
+            old_colors[m:] = colors[0]
+        self._segment_count = n + m
+        new_coords = segments.reshape(-1, 3)
+        if n == 0:
+            self._invalidate_coord_metrics()
         else:
-            color = [0,0,0]
-        colors = colors if (not colors is None) else [color for _ in lines]
-
-        colors = np.array([c if len(c) == 2 else [c, c] for c in colors],dtype=np.float32)
-        coords = []
-        for uv in lines:
-            coords.extend(uv)
-        self._coords = np.array(coords)
-        geo = LineSegmentsGeometry(
-            positions=np.array(lines,dtype=np.float32),
-            colors=colors,
+            self._extend_coord_metrics(new_coords)
+        self._coords = positions[:n + m].reshape(-1, 3)
+        for name, buf in (("positions", positions), ("colors", old_colors)):
+            if getattr(geo, name) is buf:
+                geo.send_state(name)
+            else:
+                setattr(geo, name, buf)
+
+    def extend(self, chunks: Iterable):
+        """
+        Stream chunks of segments into a layer created with a capacity.
+
+        Arguments:
+            chunks: Iterable (e.g. a generator) of (M, 2, 3) segment arrays,
+                or of (segments, colors) tuples
+
+        """
+        for chunk in chunks:
+            if isinstance(chunk, tuple):
+                self.append(*chunk)
+            else:
+                self.append(chunk)
+
+    def _write_segments(self, segments: np.ndarray, rows=None) -> np.ndarray:
+        return self._write_buffer(self._lines.geometry, "positions", segments, rows)
+
+    def update_positions(self, lines: np.ndarray, start: int = 0):
+        """
+        Move existing line segments in place. Only the position buffer is
+        re-sent.
+
+        Arguments:
+            lines: (M, 2, 3) segments replacing segments start to start + M,
+                or for indexed lines, (M, 3) vertices replacing vertices
+                start to start + M
+            start (int: 0): The first segment (or vertex) to replace
+
+        """
+        if self._quantize:
+            raise ValueError("Cannot update the positions of a quantized layer")
+        if self._indexed:
+            vertices = _as_contiguous(lines, np.float32).reshape(-1, 3)
+            rows = self._rows(len(vertices), start, len(self._coords))
+            self._update_coord_metrics(self._coords if rows is None else self._coords[rows], vertices)
+            self._coords = self._write_buffer(
+                self._lines.geometry.attributes["position"], "array", vertices, rows
+            )
+            return
+        segments = _as_line_segments(lines)
+        rows = self._rows(
+            len(segments), start, self._segment_count, self._segment_capacity
         )
-        mat = LineMaterial(linewidth=width, vertexColors="VertexColors")
-        self._objects.append(LineSegments2(geo, mat))
+        old = self._coords if rows is None else self._coords[2 * rows.start:2 * rows.stop]
+        self._update_coord_metrics(old, segments.reshape(-1, 3))
+        self._coords = self._write_segments(segments, rows)[:self._segment_count].reshape(-1, 3)
+
+    def update_colors(self, colors, start: int = 0):
+        """
+        Recolor existing line segments in place. Only the color buffer is
+        re-sent.
+
+        Arguments:
+            colors: Colors for segments start onward, in any form accepted
+                by the constructor. For indexed or quantized lines, a
+                single color or an (N, 3) array of vertex colors.
+            start (int: 0): The first segment to recolor
+
+        """
+        geo = self._lines.geometry
+        if not self._indexed:
+            n = self._segment_count - start
+            if np.ndim(colors) > 1:
+                n = len(colors)
+            self._write_buffer(
+                geo, "colors", _broadcast_line_colors(colors, n),
+                self._rows(n, start, self._segment_count, self._segment_capacity),
+            )
+            return
+        if isinstance(colors, str) or np.ndim(colors) == 1:
+            self._lines.material.color = _to_hex_color(colors)
+            self._lines.material.vertexColors = "NoColors"
+            return
+        colors = _as_contiguous(colors, np.float32)
+        if "color" in geo.attributes:
+            self._write_buffer(
+                geo.attributes["color"], "array",
+                _quantize_colors(colors) if self._quantize else colors,
+                self._rows(len(colors), start, len(self._coords)),
+            )
+        else:
+            if colors.shape != self._coords.shape:
+                raise ValueError(f"Expected colors of shape {self._coords.shape}")
+            geo.attributes = {**geo.attributes, "color": self._color_attribute(colors)}
+        self._lines.material.vertexColors = "VertexColors"
+
+    def _export_buffers(self, obj) -> Dict[str, np.ndarray]:
+        if obj is not getattr(self, "_lines", None) or self._indexed or self._segment_capacity is None:
+            return super()._export_buffers(obj)
+        # Only the segments appended so far, not the preallocated room
+        n = self._segment_count
+        return {"positions": obj.geometry.positions[:n], "colors": obj.geometry.colors[:n]}
+
+    def update_width(self, width: float):
+        """
+        Set the line width.
+        """
+        self._lines.material.linewidth = width
 
 class ScatterLayer(CoordinateLayer):
     """
@@ -244,6 +1072,10 @@ class ScatterLayer(CoordinateLayer):
     One positional array-like
         Figure#scatter(np.random.randint(0, 10, (10, 3)))
 
+    One structured array, record array or dataframe, using its x, y and z
+    columns (or its first three columns)
+        Figure#scatter(my_dataframe)
+
     Three positional list-likes
         Figure#scatter(xs, ys, zs)
 
@@ -253,9 +1085,24 @@ class ScatterLayer(CoordinateLayer):
     Three positional column names and a dataframe
         Figure#scatter("x", "y", "depth", my_dataframe)
 
+    One path to a .npy file, which is memory-mapped
+        Figure#scatter("points.npy")
+
+    Positions are stored as one (N, 3) float32 buffer. A C-contiguous (N, 3)
+    float32 array (or np.memmap) is used without copying; any other input,
+    including every columnar form, is copied exactly once into that buffer.
+    A single color is set on the material and never expanded per point.
+
     Arguments:
         attenuate_size (False): Whether items further from
             the camera should appear smaller
+        point_budget: If set and there are more points than this, show
+            only point_budget points chosen from an octree, refined toward
+            the camera's view as it moves
+        capacity: Preallocate room for this many points, to stream more in
+            with append or extend
+        glyph: Draw each point as an instance of a 3D glyph ("sphere",
+            "cube" or a mesh) with a world-space size
 
     """
     _LAYER_NAME = 'scatter'
@@ -266,6 +1113,10 @@ class ScatterLayer(CoordinateLayer):
         One positional array-like
             Figure#scatter(np.random.randint(0, 10, (10, 3)))
 
+        One structured array, record array or dataframe, using its x, y and z
+        columns (or its first three columns)
+            Figure#scatter(my_dataframe)
+
         Three positional list-likes
             Figure#scatter(xs, ys, zs)
 
@@ -275,146 +1126,657 @@ class ScatterLayer(CoordinateLayer):
         Three positional column names and a dataframe
             Figure#scatter("x", "y", "depth", my_dataframe)
 
+        One path to a .npy file, which is memory-mapped
+            Figure#scatter("points.npy")
+
+        Positions are stored as one (N, 3) float32 buffer. A C-contiguous
+        (N, 3) float32 array (or np.memmap) is used without copying; any
+        other input, including every columnar form, is copied exactly once
+        into that buffer, a chunk at a time. A single color is set on the
+        material and never expanded per point.
+
         Arguments:
             attenuate_size (False): Whether items further from
                 the camera should appear smaller
+            point_budget: If set and there are more points than this, build
+                a lod#PointOctree and show only point_budget points: a
+                uniform subsample at first, then, whenever the camera moves,
+                points from the octree leaves in view, densest nearest the
+                camera. Only the point_budget-sized buffers are re-sent.
+            octree_leaf_size (4096): Mean points per octree leaf
+            capacity: Preallocate room for this many points, so that more
+                can be streamed in with append or extend without creating a
+                new layer. The buffers grow geometrically when full, and
+                the geometry's draw range covers only the points added so
+                far. Cannot be combined with point_budget.
+            glyph: Draw each point as a 3D glyph: "sphere", "cube", or a
+                mesh of unit size in any form accepted by MeshLayer. Every
+                glyph is one instance of a single instanced geometry, with
+                per-instance offset, scale and color attributes, so all the
+                points are still drawn in one draw call. size is then the
+                glyph's width in world units, either one for every point or
+                an (N,) array. Colors must be RGB or hex strings. Cannot be
+                combined with point_budget or capacity.
+            quantize (False): Send positions as int16 and colors as uint8
+                (see CoordinateLayer). Cannot be combined with point_budget,
+                capacity or glyph.
 
         """
+        xs, ys, zs = kwargs.pop("xs", None), kwargs.pop("ys", None), kwargs.pop("zs", None)
+        color = kwargs.pop("c", None)
+        if color is None:
+            color = kwargs.pop("color", None)
+        else:
+            kwargs.pop("color", None)
+        size = kwargs.pop("size", 5)
+        marker = kwargs.pop("marker", None)
+        texture = kwargs.pop("map", None)
+        attenuate_size = kwargs.pop("attenuate_size", False)
+        point_budget = kwargs.pop("point_budget", None)
+        octree_leaf_size = kwargs.pop("octree_leaf_size", 4096)
+        capacity = kwargs.pop("capacity", None)
+        glyph = kwargs.pop("glyph", None)
+        if capacity is not None and point_budget is not None:
+            raise ValueError("capacity and point_budget cannot be combined")
+        if glyph is not None and (capacity is not None or point_budget is not None):
+            raise ValueError("glyph cannot be combined with capacity or point_budget")
         super().__init__(**kwargs)
+        if self._quantize and (capacity, point_budget, glyph) != (None, None, None):
+            raise ValueError("quantize cannot be combined with capacity, point_budget or glyph")
+
         pts = None
         if len(args) == 1:
-            if isinstance(args[0], (np.ndarray, Iterable)):
-                pts = np.asarray(args[0], dtype=np.float32)
-
-        if len(args) == 3 and isinstance(args[0], (list, np.ndarray)):
-            pts = np.asarray([i for i in zip(args[0], args[1], args[2])],dtype=np.float32)
+            data = args[0]
+            names = getattr(getattr(data, "dtype", None), "names", None)
+            if names is None and hasattr(data, "columns"):
+                names = list(data.columns)
+            if names is not None:
+                pts = _stack_columns([data[n] for n in _xyz_fields(names)])
+            elif isinstance(data, (np.ndarray, str, Iterable)):
+                pts = _as_contiguous(data, np.float32)
+        elif len(args) == 3 and isinstance(args[0], (list, np.ndarray, Iterable)):
+            pts = _stack_columns(args)
+        elif len(args) == 4 and all(isinstance(a, str) for a in args[:3]):
+            pts = _stack_columns([args[3][n] for n in args[:3]])
+        elif not args and xs is not None and ys is not None and zs is not None:
+            pts = _stack_columns([xs, ys, zs])
 
         if pts is None:
             raise ValueError("Unsupported arguments to scatter.")
+        if capacity is not None and pts.size == 0:
+            pts = pts.reshape(0, 3)
+        if pts.ndim != 2 or pts.shape[1] != 3:
+            raise ValueError(f"Expected points of shape (N, 3), but got {pts.shape}")
         self._coords = pts
-        color = kwargs.get("c") if "c" in kwargs else None
-        if color is None:
-            color = kwargs.get("color", None)
-        if color is None:
-            color = pts / pts.max()
-        if len(color) != len(pts):
-            color = [color for _ in pts]
-
-        colors = (
-            BufferAttribute(array=color, dtype=np.float32)
-            if color is not None
-            else BufferAttribute(array=np.asarray(pts / pts.max(), dtype=np.float32))
-        )
-        geometry = BufferGeometry(
-            attributes={
-                "position": BufferAttribute(array=np.asarray(pts, dtype=np.float32)),
-                "color": colors,
-            }
-        )
-
-        tex = CIRCLE_MAP
-        if kwargs.get("marker") in [".", "o", "circle"]:
-            tex = CIRCLE_MAP
-        elif kwargs.get("marker") in ["[]", "r", "q", "square"]:
+        self._point_count = len(pts)
+        self._point_capacity = None
+
+        self._color_scale = _color_scale(pts) if len(pts) else None
+        if color is None and len(pts) and glyph is None and capacity is None:
+            # Scaled from the positions, as 8-bit colors a chunk at a time
+            color = _scaled_colors(pts, self._color_scale)
+        elif color is None and len(pts):
+            color = pts / self._color_scale
+        elif color is None:
+            color = (1, 1, 1)
+        if isinstance(color, str) or np.ndim(color) == 1:
+            # A single color for every point lives on the material.
+            material_color = {"color": _to_hex_color(color), "vertexColors": "NoColors"}
+            self._colors = None
+            if glyph is not None:
+                # Glyphs always take their color from an instance attribute
+                self._colors = np.tile(_to_rgb(color), (len(pts), 1))
+        else:
+            if getattr(color, "dtype", None) != np.uint8:
+                color = np.ascontiguousarray(color, dtype=np.float32)
+            if color.shape != pts.shape:
+                raise ValueError(
+                    f"Expected colors of shape {pts.shape}, but got {color.shape}"
+                )
+            material_color = {"vertexColors": "VertexColors"}
+            self._colors = color
+
+        self._octree = None
+        self._point_budget = point_budget
+        self._glyph = glyph
+        if glyph is not None:
+            self._init_glyphs(glyph, size)
+            return
+        with self._phase("buffers"):
+            if point_budget is not None and len(pts) > point_budget:
+                # Send a coarse, fixed-size subsample; it is refined in place as
+                # the camera moves.
+                self._octree = PointOctree(pts, leaf_size=octree_leaf_size)
+                self._shown = self._octree.coarse(point_budget)
+                self._shown_leaves = None
+                attributes = {"position": BufferAttribute(array=pts[self._shown], dynamic=True)}
+                if self._colors is not None:
+                    attributes["color"] = BufferAttribute(
+                        array=self._colors[self._shown], dynamic=True,
+                        normalized=self._colors.dtype == np.uint8,
+                    )
+            elif capacity is not None:
+                attributes = self._preallocate(max(capacity, len(pts)))
+            else:
+                attributes = {"position": self._position_attribute(pts)}
+                if self._colors is not None:
+                    attributes["color"] = self._color_attribute(self._colors)
+                    self._colors = attributes["color"].array
+            geometry = BufferGeometry(attributes=attributes)
+
+        tex = _circle_map()
+        if marker in [".", "o", "circle"]:
+            tex = _circle_map()
+        elif marker in ["[]", "r", "q", "square"]:
             tex = None
-        elif "map" in kwargs:
-            tex = kwargs.get("map")
+        elif texture is not None:
+            tex = texture
 
         material = PointsMaterial(
-            vertexColors="VertexColors",
-            size=kwargs.get("size", 5),
-            sizeAttenuation=kwargs.get("attenuate_size", False),
+            size=size,
+            sizeAttenuation=attenuate_size,
+            **material_color,
             **({"map": tex} if tex else {}),
         )
         p = Points(geometry=geometry, material=material)
+        if capacity is not None:
+            # The frontend computes bounds once, before any points are appended
+            p.frustumCulled = False
+        if self._quantize:
+            self._dequantize(p)
+        self._points = p
         self._objects.append(p)
 
+    @classmethod
+    def _prepare(cls, args, kwargs):
+        # Only one array-like (or .npy path) of points is converted here
+        if len(args) != 1 or getattr(getattr(args[0], "dtype", None), "names", None) \
+                or hasattr(args[0], "columns"):
+            return args, kwargs
+        pts = _as_contiguous(args[0], np.float32)
+        if pts.ndim != 2 or pts.shape[1] != 3 or not len(pts):
+            return (pts,), kwargs
+        if all(kwargs.get(k) is None for k in ("c", "color", "glyph", "capacity")):
+            kwargs = {**kwargs, "color": _scaled_colors(pts, pts.max())}
+        return (pts,), kwargs
+
+    def _init_glyphs(self, glyph, size):
+        verts, faces, normals = _glyph_mesh(glyph)
+        with self._phase("buffers"):
+            geometry = InstancedBufferGeometry(
+                attributes={
+                    "position": BufferAttribute(array=verts),
+                    "normal": BufferAttribute(array=normals),
+                    "index": BufferAttribute(array=_as_index_buffer(faces, len(verts))),
+                    "offset": InstancedBufferAttribute(array=self._coords),
+                    "scale": InstancedBufferAttribute(array=self._glyph_scales(size)),
+                    "instanceColor": InstancedBufferAttribute(array=self._colors),
+                },
+                maxInstancedCount=len(self._coords),
+            )
+        material = ShaderMaterial(
+            vertexShader=_GLYPH_VERTEX_SHADER,
+            fragmentShader=_GLYPH_FRAGMENT_SHADER,
+        )
+        # The instanced mesh is drawn where self._points is drawn otherwise
+        self._points = Mesh(geometry=geometry, material=material)
+        # The frontend's bounds are those of a single glyph at the origin
+        self._points.frustumCulled = False
+        self._objects.append(self._points)
+
+    def _glyph_scales(self, size) -> np.ndarray:
+        return np.ascontiguousarray(
+            np.broadcast_to(np.asarray(size, dtype=np.float32), (len(self._coords),))
+        )
+
+    @property
+    def _position_key(self) -> str:
+        return "position" if self._glyph is None else "offset"
+
+    @property
+    def _color_key(self) -> str:
+        return "color" if self._glyph is None else "instanceColor"
+
+    def _preallocate(self, capacity: int) -> Dict[str, BufferAttribute]:
+        """
+        Copy positions (and colors) into dynamic buffers of capacity rows,
+        keeping self._coords and self._colors as views of the rows in use.
+        """
+        with self._phase("buffers"):
+            n = self._point_count
+            attributes = {}
+            for name, key in (("position", "_coords"), ("color", "_colors")):
+                data = getattr(self, key)
+                if data is None:
+                    continue
+                attr = BufferAttribute(array=_pad_rows(data, n, capacity), dynamic=True)
+                self._owned_buffers[(id(attr), "array")] = attr.array
+                setattr(self, key, attr.array[:n])
+                attributes[name] = attr
+            self._point_capacity = capacity
+            return attributes
+
+    def append(self, points: np.ndarray, colors=None):
+        """
+        Stream more points into a layer created with a capacity.
+
+        The points are written into the existing buffers and the draw range
+        is advanced; when the buffers are full, the capacity doubles.
+
+        Arguments:
+            points: (M, 3) points to add
+            colors: A single color or (M, 3) colors for the new points, if
+                the layer has per-point colors. Defaults to colors scaled
+                from the positions, as in the constructor.
+
+        """
+        if self._point_capacity is None:
+            raise ValueError("append needs a layer created with a capacity")
+        points = _as_contiguous(points, np.float32).reshape(-1, 3)
+        m = len(points)
+        if m == 0:
+            return
+        new = {"position": points}
+        if self._colors is not None:
+            if colors is None:
+                if self._color_scale is None:
+                    self._color_scale = _color_scale(points)
+                colors = points / self._color_scale
+            new["color"] = np.broadcast_to(np.asarray(colors, dtype=np.float32), points.shape)
+        elif colors is not None:
+            raise ValueError("The layer has a single color; use update_colors first")
+        n = self._point_count
+        geometry = self._points.geometry
+        if n + m > self._point_capacity:
+            attributes = self._preallocate(max(2 * self._point_capacity, n + m))
+        else:
+            attributes = geometry.attributes
+        for name, values in new.items():
+            buf = attributes[name].array
+            buf[n:n + m] = values
+            if n == 0:
+                buf[m:] = values[0]
+        if n == 0:
+            self._invalidate_coord_metrics()
+        else:
+            self._extend_coord_metrics(points)
+        self._point_count = n + m
+        self._coords = attributes["position"].array[:n + m]
+        if self._colors is not None:
+            self._colors = attributes["color"].array[:n + m]
+        if attributes is geometry.attributes:
+            for attr in attributes.values():
+                attr.send_state("array")
+        else:
+            geometry.attributes = attributes
+        geometry.exec_three_obj_method("setDrawRange", 0, n + m)
+
+    def extend(self, chunks: Iterable):
+        """
+        Stream chunks of points into a layer created with a capacity.
+
+        Arguments:
+            chunks: Iterable (e.g. a generator) of (M, 3) point arrays, or
+                of (points, colors) tuples
+
+        """
+        for chunk in chunks:
+            if isinstance(chunk, tuple):
+                self.append(*chunk)
+            else:
+                self.append(chunk)
+
+    def on_click(self, picker):
+        return f"""
+            layer: {self._LAYER_NAME}
+            point: {self.nearest_vertex(self._to_local(picker.point))}
+            point clicked: {picker.point}
+            """
+
+    def _export_buffers(self, obj) -> Dict[str, np.ndarray]:
+        if obj is not self._points or self._glyph is not None or self._quantize:
+            return super()._export_buffers(obj)
+        # Every point, rather than the octree's points in view or the
+        # preallocated room
+        buffers = {"position": self._coords}
+        if self._colors is not None:
+            buffers["color"] = self._colors
+        return buffers
+
+    def _on_camera_move(self, camera):
+        super()._on_camera_move(camera)
+        if self._octree is None:
+            return
+        take = self._octree.leaf_budget(camera, self._point_budget, self._matrix())
+        if self._shown_leaves is not None and (
+                np.abs(take - self._shown_leaves).sum() / 2 <= _RESELECT_FRACTION * self._point_budget):
+            # Nearly the same points; keep the ones already sent
+            return
+        self._shown_leaves = take
+        self._shown = self._octree.gather(take)
+        self._send_shown()
+
+    def _send_shown(self):
+        attributes = self._points.geometry.attributes
+        attributes["position"].array = self._coords[self._shown]
+        if self._colors is not None:
+            attributes["color"].array = self._colors[self._shown]
+
+    def update_positions(self, positions: np.ndarray, start: int = 0):
+        """
+        Move existing points in place. Only the position buffer is re-sent;
+        no new geometry or layer is created.
+
+        Arguments:
+            positions: (M, 3) positions replacing points start to start + M
+            start (int: 0): The first point to replace
+
+        """
+        if self._quantize:
+            raise ValueError("Cannot update the positions of a quantized layer")
+        positions = _as_contiguous(positions, np.float32).reshape(-1, 3)
+        rows = self._rows(len(positions), start, len(self._coords), self._point_capacity)
+        self._update_coord_metrics(
+            self._coords if rows is None else self._coords[rows], positions
+        )
+        if self._octree is None:
+            self._coords = self._write_buffer(
+                self._points.geometry.attributes[self._position_key], "array", positions, rows
+            )[:self._point_count]
+            return
+        # The octree is only valid for the old positions
+        self._coords = self._write_buffer(self, "_coords", positions, rows)
+        self._octree = PointOctree(self._coords, leaf_size=self._octree.leaf_size)
+        self._shown = self._octree.coarse(self._point_budget)
+        self._shown_leaves = None
+        self._send_shown()
+
+    def update_colors(self, colors, start: int = 0):
+        """
+        Recolor existing points in place. Only the color buffer is re-sent.
+
+        Arguments:
+            colors: A single color for every point, or (M, 3) colors for
+                points start to start + M
+            start (int: 0): The first point to recolor
+
+        """
+        material = self._points.material
+        geometry = self._points.geometry
+        if self._glyph is not None and (isinstance(colors, str) or np.ndim(colors) == 1):
+            colors = np.tile(_to_rgb(colors), (len(self._coords) - start, 1))
+        elif isinstance(colors, str) or np.ndim(colors) == 1:
+            material.color = _to_hex_color(colors)
+            material.vertexColors = "NoColors"
+            geometry.attributes = {
+                k: v for k, v in geometry.attributes.items() if k != "color"
+            }
+            self._colors = None
+            return
+        colors = _as_contiguous(colors, np.float32).reshape(-1, 3)
+        if self._colors is None:
+            if colors.shape != self._coords.shape:
+                raise ValueError(f"Expected colors of shape {self._coords.shape}")
+            self._colors = colors
+            if self._point_capacity is not None:
+                attr = BufferAttribute(
+                    array=_pad_rows(colors, self._point_count, self._point_capacity),
+                    dynamic=True,
+                )
+                self._owned_buffers[(id(attr), "array")] = attr.array
+                self._colors = attr.array[:self._point_count]
+            elif self._octree is None:
+                attr = self._color_attribute(colors)
+                self._colors = attr.array
+            else:
+                attr = BufferAttribute(array=colors[self._shown])
+            geometry.attributes = {**geometry.attributes, "color": attr}
+            material.vertexColors = "VertexColors"
+            return
+        rows = self._rows(len(colors), start, len(self._colors), self._point_capacity)
+        if self._colors.dtype == np.uint8:
+            colors = _quantize_colors(colors)
+        if self._octree is None:
+            self._colors = self._write_buffer(
+                geometry.attributes[self._color_key], "array", colors, rows
+            )[:self._point_count]
+        else:
+            self._colors = self._write_buffer(self, "_colors", colors, rows)
+            geometry.attributes["color"].array = self._colors[self._shown]
+
+    def update_size(self, size: Union[float, np.ndarray]):
+        """
+        Set the point size, or for glyphs, the size of every glyph or an
+        (N,) array of one size per glyph.
+        """
+        if self._glyph is not None:
+            self._write_buffer(
+                self._points.geometry.attributes["scale"], "array", self._glyph_scales(size)
+            )
+            return
+        self._points.material.size = size
+
 class GraphLayer(ScatterLayer,LinesLayer):
     """
-    Plot a networkx graph.
+    Plot a graph.
 
     Arguments:
-        graph: NetworkX graph
-        pos: positions to assign to each node.
+        graph: NetworkX graph, (E, 2) array of node indices, or a scipy
+            sparse adjacency matrix (every stored entry is drawn as an edge)
+        pos: positions to assign to each node. Required, as an (N, 3) array,
+            when graph is an edge array or sparse matrix.
         pos_attribute: The node attribute to use as a 3coord.
         edge_width: The line width to pass to layers#LineLayers
+        indexed_edges (False): Draw edges as indexed geometry over the node
+            position buffer instead of copying two coordinates per edge.
+            Halves the edge payload, but edges are drawn one pixel wide.
     """
     _LAYER_NAME = 'graph'
     def __init__(self,
-        graph : nx.Graph,
+        graph : Union["networkx.Graph", np.ndarray, "scipy.sparse.spmatrix"], # noqa: F821
         pos_attribute:str = None,
-        pos:Union[Iterable[Coord3], Dict[Hashable, Coord3]] = None,
-        node_size: float = 5.,
+        pos:Union[Iterable[Coord3], Dict[Hashable, Coord3], np.ndarray] = None,
+        node_size: Union[float, np.ndarray] = 5.,
         edge_width: float = 5,
+        indexed_edges: bool = False,
         **kwargs):
         """
-        Plot a networkx graph.
+        Plot a graph.
 
         Arguments:
-            graph: NetworkX graph
-            pos: positions to assign to each node.
+            graph: NetworkX graph, (E, 2) array of node indices, or a scipy
+                sparse adjacency matrix (every stored entry is drawn as an
+                edge)
+            pos: positions to assign to each node. Required, as an (N, 3)
+                array, when graph is an edge array or sparse matrix.
             pos_attribute: The node attribute to use as a 3coord.
+            node_size (5.): The node size. With glyph nodes (e.g.
+                glyph="sphere", see layers#ScatterLayer), the width of each
+                node in world units, or an (N,) array of one per node.
             edge_width: The line width to pass to layers#LineLayers
+            indexed_edges (False): Draw edges as indexed geometry over the
+                node position buffer instead of copying two coordinates per
+                edge. Halves the edge payload, but edges are drawn one pixel
+                wide.
+            quantize (False): Send node and edge positions as int16 and
+                colors as uint8 (see CoordinateLayer). Edges are then drawn
+                one pixel wide.
         """
-        if pos_attribute is not None:
-            attr = pos_attribute
-            pos = {n: a[attr] for n, a in graph.nodes(data=True)}
-        elif pos is not None:
-            if isinstance(pos, Iterable):
-                pos = {n: p for n, p in zip(graph.nodes(), pos)}
+        if _is_instance(graph, "networkx", "Graph"):
+            nodes, positions, edges = graph_to_arrays(
+                graph, pos_attribute=pos_attribute, pos=pos
+            )
         else:
-            try:
-                pos = {n: p["pos"] for n, p in graph.nodes(data=True)}
-            except Exception as e:
-                raise ValueError("You must pass a valid position argument.") from e
+            if pos is None:
+                raise ValueError("You must pass a valid position argument.")
+            positions = _as_contiguous(pos, np.float32)
+            if hasattr(graph, "tocoo"):
+                coo = graph.tocoo()
+                edges = np.stack([coo.row, coo.col], axis=1)
+            else:
+                edges = np.asarray(graph)
+            nodes = None
+        self._nodes = nodes
+        self._edges = edges.reshape(-1, 2)
+        if kwargs.get("quantize"):
+            # Nodes and edges share one frame, over the nodes' bounding box
+            self._quantization_frame = _quantization_frame(*_coord_metrics(positions)[:2])
+        if indexed_edges:
+            lines = dict(lines=positions, indices=self._edges)
+        else:
+            lines = dict(lines=positions[self._edges])
+        super().__init__(positions, size=node_size, width=edge_width, **lines, **kwargs)
+
+    @classmethod
+    def _placeholder_bounds(cls, args, kwargs):
+        return _array_bounds(kwargs.get("pos"))
+
+    @classmethod
+    def _prepare(cls, args, kwargs):
+        return args, kwargs
+
+    def update_positions(self, positions: np.ndarray, start: int = 0):
+        """
+        Move existing nodes, and the edges that touch them, in place. Only
+        the position buffers are re-sent; indexed edges share the node
+        buffer and need no update of their own.
+
+        Arguments:
+            positions: (M, 3) positions replacing nodes start to start + M
+            start (int: 0): The index of the first node to replace
+
+        """
+        positions = _as_contiguous(positions, np.float32).reshape(-1, 3)
+        ScatterLayer.update_positions(self, positions, start)
+        if self._indexed:
+            return
+        stop = start + len(positions)
+        touched = np.flatnonzero(((self._edges >= start) & (self._edges < stop)).any(axis=1))
+        segments = self._coords[self._edges[touched]]
+        if len(touched) == len(self._edges):
+            self._write_segments(segments)
+        elif len(touched):
+            self._write_segments(segments, touched)
+
+    def nearest_node(self, point) -> Hashable:
+        """
+        The node nearest a point in layer coordinates: its networkx key, or
+        its index for graphs given as arrays.
+        """
+        index = ScatterLayer.nearest_vertex(self, point)
+        return index if self._nodes is None else self._nodes[index]
 
-        scatter_points = [i for i in pos.values()]
-        lines = [[pos[u], pos[v]] for u, v in graph.edges()]
-        super().__init__(scatter_points,lines=lines, size=node_size,width=edge_width)
+    def on_click(self, picker):
+        return f"""
+            layer: {self._LAYER_NAME}
+            node: {self.nearest_node(self._to_local(picker.point))}
+            point clicked: {picker.point}
+            """
+
+    def update_edge_colors(self, colors, start: int = 0):
+        """
+        Recolor existing edges in place. See layers#LinesLayer.update_colors.
+        """
+        LinesLayer.update_colors(self, colors, start)
 
 
 class NeuronMorphologyLayer(GraphLayer):
     """
-    Plot a neuromorpholib.NeuronMorphology
+    Plot a neuron morphology.
 
     Arguments:
-        graph: NetworkX graph
-        pos: positions to assign to each node.
-        pos_attribute: The node attribute to use as a 3coord.
-        edge_width: The line width to pass to layers#LineLayers
+        swc: A neuromorpholib.NeuronMorphology, an SWC file path or text, an
+            (N, 7) array of id, type, x, y, z, radius, parent rows, or a
+            directory or list of any of these to draw as one layer.
+        color_by_type (False): Color nodes and edges by SWC structure type
+        radius_attribute (False): Attach each node's radius to the node
+            geometry as a per-vertex "radius" attribute
+        kwargs: Passed to layers#GraphLayer. With a glyph, nodes are sized
+            by their SWC radius unless node_size is given.
     """
     _LAYER_NAME = 'swc'
 
     def __init__(
         self,
-        swc: 'NeuronMorphology', # noqa: F821
+        swc: Union['NeuronMorphology', str, np.ndarray, Iterable], # noqa: F821
+        color_by_type: bool = False,
+        radius_attribute: bool = False,
         **kwargs
     ):
         """
         Plot a SWC morphology.
 
+        SWC files, text and arrays are parsed with NumPy and never go
+        through networkx; parent-child segments are found with a vectorized
+        index lookup.
+
         Arguments:
-            graph: NetworkX graph
-            pos: positions to assign to each node.
-            pos_attribute: The node attribute to use as a 3coord.
-            edge_width: The line width to pass to layers#LineLayers
+            swc: A neuromorpholib.NeuronMorphology, an SWC file path or text,
+                an (N, 7) array of id, type, x, y, z, radius, parent rows, or
+                a directory or list of any of these to draw as one layer.
+            color_by_type (False): Color nodes and edges by SWC structure type
+            radius_attribute (False): Attach each node's radius to the node
+                geometry as a per-vertex "radius" attribute
+            kwargs: Passed to layers#GraphLayer. With a glyph (e.g.
+                glyph="sphere"), nodes are drawn at their SWC diameter
+                unless node_size is given.
         """
-
-        super().__init__(graph=swc.get_graph(), pos_attribute='xyz', **kwargs)
+        if hasattr(swc, "get_graph"):
+            if color_by_type or radius_attribute:
+                raise ValueError(
+                    "color_by_type and radius_attribute need an SWC file, text or array"
+                )
+            super().__init__(graph=swc.get_graph(), pos_attribute='xyz', **kwargs)
+            return
+
+        data, edges = swc_to_arrays(swc)
+        self.swc = data
+        if color_by_type:
+            node_colors = SWC_TYPE_COLORS[
+                np.clip(data[:, 1].astype(np.int64), 0, len(SWC_TYPE_COLORS) - 1)
+            ]
+            kwargs["c"] = node_colors
+            kwargs["colors"] = (
+                node_colors if kwargs.get("indexed_edges") else node_colors[edges]
+            )
+        if kwargs.get("glyph") is not None:
+            kwargs.setdefault("node_size", 2 * data[:, 5])
+        super().__init__(graph=edges, pos=data[:, 2:5], **kwargs)
+        if radius_attribute:
+            geometry = self._points.geometry
+            attribute = BufferAttribute if self._glyph is None else InstancedBufferAttribute
+            geometry.attributes = {
+                **geometry.attributes,
+                "radius": attribute(
+                    array=np.ascontiguousarray(data[:, 5], dtype=np.float32)
+                ),
+            }
 
 class ImshowLayer(Layer):
     """
     Plot an image as a plane.
 
+    Array images are sent as uint8 textures: one byte per pixel for
+    greyscale images. Images larger than tile_size on a side are cut into
+    tiles over a pyramid of downsampled levels, and only the tiles in view,
+    at the coarsest level that still has a texel per screen pixel, are sent.
+
     Arguments:
         image (Union[str, np.ndarray]): The image to plot. This can be a
             URL, a blob, or a numpy array. If it is a numpy array, it must
-            be either 2D (greyscale), 3D (RGB), or 4D (RGBA).
+            be either 2D (greyscale), or 3D with 1 to 4 channels
+            (greyscale, greyscale and alpha, RGB or RGBA).
         center_pos: Center pos
         rotation: Rotation of the img
             plane, in radians
         width (float: 10): The width of the final rendered plane
         height (float: 10): The height of the final rendered plane
+        vmin, vmax (float: None): The values shown as black and white.
+            Default to 0 and 1 for float images, and to the range of the
+            data for integer images other than uint8.
+        tile_size (int: 2048): The largest texture to send, in pixels
+        screen_height (int: 1024): The height of the view, in pixels, used
+            to pick the level of the pyramid to show
     """
     _LAYER_NAME = 'imshow'
     def __init__(
@@ -425,6 +1787,10 @@ class ImshowLayer(Layer):
         width: float = 10,
         height: float = 10,
         *args,
+        vmin: float = None,
+        vmax: float = None,
+        tile_size: int = 2048,
+        screen_height: int = 1024,
         **kwargs
         ):
         """
@@ -433,44 +1799,401 @@ class ImshowLayer(Layer):
         Arguments:
             image (Union[str, np.ndarray]): The image to plot. This can be a
                 URL, a blob, or a numpy array. If it is a numpy array, it must
-                be either 2D (greyscale), 3D (RGB), or 4D (RGBA).
+                be either 2D (greyscale), or 3D with 1 to 4 channels
+                (greyscale, greyscale and alpha, RGB or RGBA).
             center_pos: Center pos
             rotation: Rotation of the img
                 plane, in radians
             width (float: 10): The width of the final rendered plane
             height (float: 10): The height of the final rendered plane
+            vmin, vmax (float: None): The values shown as black and white.
+                Default to 0 and 1 for float images, and to the range of
+                the data for integer images other than uint8.
+            tile_size (int: 2048): The largest texture to send, in pixels
+            screen_height (int: 1024): The height of the view, in pixels,
+                used to pick the level of the pyramid to show
 
         """
         super().__init__(*args, **kwargs)
-        if isinstance(image, str):
-            tex = ImageTexture(imageUri=image)
-        elif isinstance(image, (list, np.ndarray)):
-            if len(image.shape) == 2:
-                # handle 2D (grayscale).
-                # broadcast to rgba channels:
-                image = np.array([image, image, image, np.ones(image.shape)]).T
-            elif image.shape[-1] == 3:
-                # handle RGB:
-                image = np.dstack([image, np.ones(image.shape)])
-
-            tex = DataTexture(data=image.astype(np.float32), type="FloatType")
-        else:
-            raise ValueError(f"Expected string or array, but got {type(image)}")
-        plane = PlaneGeometry(width=width, height=height)
-        mat = MeshBasicMaterial(map=tex)
-        mesh = Mesh(geometry=plane, material=mat, position=center_pos)
-        mesh.rotation = rotation if len(rotation) == 4 else [*rotation, "XYZ"]
         self.center = center_pos
         self.size = (width,height)
-        self._objects.append(mesh)
+        self._rotation = tuple(rotation) if len(rotation) == 4 else (*rotation, "XYZ")
+        self._rotation_matrix = _quaternion_matrix(_euler_quaternion(self._rotation))
+        if isinstance(image, str):
+            self._objects.append(self._plane(ImageTexture(imageUri=image), width, height))
+            return
+        if not isinstance(image, (list, np.ndarray)):
+            raise ValueError(f"Expected string or array, but got {type(image)}")
+        image = _as_texture_image(image, vmin, vmax)
+        self._tile_size = int(tile_size)
+        self._screen_height = screen_height
+        # Level k of the pyramid is the image downsampled 2**k times; the
+        # last level fits in a single tile. Levels are computed on first use
+        self._pyramid = [image]
+        self._levels = 1 + max(0, int(np.ceil(np.log2(max(image.shape[:2]) / self._tile_size))))
+        self._tiles = {}
+        self._show_tiles(self._levels - 1)
+
+    def _plane(self, texture, width: float, height: float, offset=(0, 0)) -> Mesh:
+        """
+        A width by height plane showing texture, offset from the center of
+        the image in the image's plane.
+        """
+        position = np.asarray(self.center, dtype=np.float64) + self._rotation_matrix @ [*offset, 0]
+        with self._phase("buffers"):
+            return Mesh(
+                geometry=PlaneGeometry(width=width, height=height),
+                material=MeshBasicMaterial(map=texture),
+                position=tuple(position.tolist()),
+                rotation=self._rotation,
+            )
+
+    def _level(self, level: int) -> np.ndarray:
+        while len(self._pyramid) <= level:
+            self._pyramid.append(_downsample(self._pyramid[-1]))
+        return self._pyramid[level]
+
+    def _tile_grid(self, level: int):
+        """
+        The (row, column) of each tile of a level, and the centers of the
+        tiles in scene coordinates.
+        """
+        h, w = self._level(level).shape[:2]
+        t = self._tile_size
+        rows, cols = np.meshgrid(np.arange(-(-h // t)), np.arange(-(-w // t)), indexing="ij")
+        rows, cols = rows.ravel(), cols.ravel()
+        width, height = self.size
+        offsets = np.zeros((len(rows), 3))
+        offsets[:, 0] = (np.minimum((cols + 1) * t, w) + cols * t) / 2 * (width / w) - width / 2
+        offsets[:, 1] = height / 2 - (np.minimum((rows + 1) * t, h) + rows * t) / 2 * (height / h)
+        centers = np.asarray(self.center, dtype=np.float64) + offsets @ self._rotation_matrix.T
+        return rows, cols, centers
+
+    def _tile(self, level: int, row: int, col: int) -> Mesh:
+        key = (level, row, col)
+        if key not in self._tiles:
+            image = self._level(level)
+            h, w = image.shape[:2]
+            t = self._tile_size
+            data = np.ascontiguousarray(image[row * t:(row + 1) * t, col * t:(col + 1) * t])
+            th, tw = data.shape[:2]
+            width, height = self.size
+            # The world size of a texel of this level
+            sx, sy = width / w, height / h
+            offset = ((col * t + tw / 2) * sx - width / 2, height / 2 - (row * t + th / 2) * sy)
+            with self._phase("buffers"):
+                self._tiles[key] = self._plane(_data_texture(data, flip=True), tw * sx, th * sy, offset)
+        return self._tiles[key]
+
+    def _show_tiles(self, level: int, camera=None):
+        """
+        Show the tiles of a level that are in the camera's view, or all of
+        them without a camera, and hide every other tile.
+        """
+        rows, cols, centers = self._tile_grid(level)
+        if camera is not None and len(rows) > 1:
+            h, w = self._level(level).shape[:2]
+            t = min(self._tile_size, max(h, w))
+            radius = np.hypot(t * self.size[0] / w, t * self.size[1] / h) / 2
+            visible, _ = _in_view(camera, centers, radius, self._matrix())
+            rows, cols = rows[visible], cols[visible]
+        shown = [self._tile(level, r, c) for r, c in zip(rows.tolist(), cols.tolist())]
+        for tile in shown:
+            if tile not in self._objects:
+                if self._id is not None:
+                    tile.name = self._id
+                self._objects.append(tile)
+                if self._group is not None:
+                    self._group.add(tile)
+        shown = set(map(id, shown))
+        for tile in self._tiles.values():
+            tile.visible = id(tile) in shown
+
+    def _on_camera_move(self, camera):
+        if not hasattr(self, "_pyramid") or self._levels == 1:
+            return
+        # The distance from the camera to the nearest point of the image
+        width, height = self.size
+        local = self._rotation_matrix.T @ (
+            self._to_local(camera.position) - np.asarray(self.center, dtype=np.float64)
+        )
+        nearest = np.clip(local, [-width / 2, -height / 2, 0], [width / 2, height / 2, 0])
+        distance = max(float(np.linalg.norm(local - nearest)), np.finfo(np.float32).eps)
+        half_height = np.tan(np.radians(camera.fov) / 2) / getattr(camera, "zoom", 1)
+        pixels_per_unit = self._screen_height / (2 * distance * half_height)
+        texels_per_unit = self._pyramid[0].shape[1] / width
+        level = int(np.clip(np.floor(np.log2(texels_per_unit / pixels_per_unit)), 0, self._levels - 1))
+        self._show_tiles(level, camera)
+
+    def _export_objects(self):
+        if not hasattr(self, "_pyramid"):
+            yield from super()._export_objects()
+            return
+        # The coarsest level, a single tile, whichever tiles are shown
+        tile = self._tile(self._levels - 1, 0, 0)
+        yield tile, self._export_buffers(tile)
+
     def get_bounding_box(self):
-        x,y,z = self.center
-        h,w = self.size
-        return ((x-w/2.,y-h/2.,z),(x+w/2.,y+h/2.,z))
+        w, h = self.size
+        corners = np.array([[-w, -h, 0], [-w, h, 0], [w, -h, 0], [w, h, 0]]) / 2
+        corners = np.asarray(self.center, dtype=np.float64) + corners @ self._rotation_matrix.T
+        return tuple(corners.min(axis=0)), tuple(corners.max(axis=0))
     def get_preferred_camera_view(self):
         return self.center
 
 
+class VolumeLayer(Layer):
+    """
+    Show orthogonal slice planes through a 3D image volume.
+
+    Slices are read from the volume and encoded as uint8 textures only when
+    they are shown, or prefetched next to a shown slice in a background
+    thread, so a np.memmap volume is only read where it is displayed. The
+    most recently used slices are kept, with their textures, in an LRU
+    cache: scrubbing back to a cached slice sends nothing new. Removing the
+    layer from its figure stops the thread and drops the slices not shown.
+
+    Arguments:
+        volume (np.ndarray): (Z, Y, X) array or np.memmap. Voxel (z, y, x)
+            is drawn at x, y and z in the scene.
+        slices (dict: None): The slice shown on each axis, as
+            {axis: index} with axes "x", "y" and "z". Defaults to the
+            middle slice of every axis.
+        spacing (Coord3: (1, 1, 1)): The x, y and z size of a voxel
+        origin (Coord3: (0, 0, 0)): The x, y and z corner of voxel 0
+        vmin, vmax (float: None): The values shown as black and white.
+            Default to 0 and 1 for float volumes, and to the range of the
+            slices first shown for integer volumes other than uint8.
+        cache_size (int: 64): The number of slices to keep
+        prefetch (int: 2): The slices to read ahead on either side of
+            each slice shown
+        opacity (float: 1): The opacity of the slice planes
+
+    """
+    _LAYER_NAME = 'volume'
+    _AXES = "zyx"
+    # The Euler rotation of the PlaneGeometry of each axis's slices, which
+    # lays texture columns and rows along the next two array axes
+    _ROTATIONS = {
+        "z": (0, 0, 0, "XYZ"),
+        "y": (np.pi / 2, 0, 0, "XYZ"),
+        "x": (np.pi / 2, 0, np.pi / 2, "ZYX"),
+    }
+    def __init__(
+        self,
+        volume: np.ndarray,
+        slices: Dict[str, int] = None,
+        spacing: Coord3 = (1, 1, 1),
+        origin: Coord3 = (0, 0, 0),
+        *args,
+        vmin: float = None,
+        vmax: float = None,
+        cache_size: int = 64,
+        prefetch: int = 2,
+        opacity: float = 1,
+        **kwargs
+        ):
+        """
+        Show orthogonal slice planes through a 3D image volume.
+
+        Arguments:
+            volume (np.ndarray): (Z, Y, X) array or np.memmap. Voxel
+                (z, y, x) is drawn at x, y and z in the scene.
+            slices (dict: None): The slice shown on each axis, as
+                {axis: index} with axes "x", "y" and "z". Defaults to the
+                middle slice of every axis.
+            spacing (Coord3: (1, 1, 1)): The x, y and z size of a voxel
+            origin (Coord3: (0, 0, 0)): The x, y and z corner of voxel 0
+            vmin, vmax (float: None): The values shown as black and white.
+                Default to 0 and 1 for float volumes, and to the range of
+                the slices first shown for integer volumes other than uint8.
+            cache_size (int: 64): The number of slices to keep
+            prefetch (int: 2): The slices to read ahead on either side of
+                each slice shown
+            opacity (float: 1): The opacity of the slice planes
+
+        """
+        super().__init__(*args, **kwargs)
+        if not hasattr(volume, "shape"):
+            volume = np.asarray(volume)
+        if volume.ndim != 3:
+            raise ValueError(f"Expected a (Z, Y, X) volume, but got {volume.shape}")
+        self._volume = volume
+        self._spacing = np.asarray(spacing, dtype=np.float64)
+        self._origin = np.asarray(origin, dtype=np.float64)
+        if slices is None:
+            slices = {axis: n // 2 for axis, n in zip(self._AXES, volume.shape)}
+        if (
+            (vmin is None or vmax is None)
+            and np.issubdtype(volume.dtype, np.integer) and volume.dtype != np.uint8
+        ):
+            # Fix the window from the slices shown rather than the volume
+            samples = [self._read(self._axis(a), int(i)) for a, i in slices.items()]
+            samples = samples or [self._read("z", volume.shape[0] // 2)]
+            vmin = min(s.min() for s in samples) if vmin is None else vmin
+            vmax = max(s.max() for s in samples) if vmax is None else vmax
+        self._window = (vmin, vmax)
+        self._cache_size = max(int(cache_size), 3)
+        self._prefetch = int(prefetch)
+        self._opacity = opacity
+        # (axis, index) -> Future of the slice's uint8 image, in LRU order
+        self._slices = OrderedDict()
+        # (axis, index) -> DataTexture, for cached slices that were shown
+        self._textures = {}
+        self._planes = {}
+        self._shown = {}
+        # Started on the first request, and shut down when the layer is
+        # removed from its figure
+        self._executor = None
+        for axis, index in slices.items():
+            self.set_slice(axis, index)
+
+    def _axis(self, axis: Union[str, int]) -> str:
+        if axis in (0, 1, 2):
+            return self._AXES[axis]
+        if axis not in self._AXES:
+            raise ValueError(f"Expected an axis in 'x', 'y', 'z', 0, 1 or 2, but got {axis!r}")
+        return axis
+
+    def _read(self, axis: str, index: int) -> np.ndarray:
+        return self._volume[(slice(None),) * self._AXES.index(axis) + (index,)]
+
+    def _encode(self, axis: str, index: int) -> np.ndarray:
+        return _as_texture_image(self._read(axis, index), *self._window)
+
+    def _request(self, axis: str, index: int):
+        """
+        The Future of a slice's uint8 image, read in the background if it
+        is not cached.
+        """
+        key = (axis, index)
+        if key in self._slices:
+            self._slices.move_to_end(key)
+            return self._slices[key]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._slices[key] = self._executor.submit(self._encode, axis, index)
+        shown = set(self._shown.items())
+        for old in list(self._slices):
+            if len(self._slices) <= self._cache_size:
+                break
+            if old == key or old in shown:
+                continue
+            self._slices.pop(old).cancel()
+            texture = self._textures.pop(old, None)
+            if texture is not None:
+                texture.close()
+        return self._slices[key]
+
+    def _plane(self, axis: str) -> Mesh:
+        if axis not in self._planes:
+            width, height = [
+                n * s for n, s in zip(self._extent(axis), self._spacing[list(self._world_axes(axis))])
+            ]
+            plane = Mesh(
+                geometry=PlaneGeometry(width=width, height=height),
+                material=MeshBasicMaterial(
+                    side="DoubleSide",
+                    transparent=self._opacity < 1,
+                    opacity=self._opacity,
+                ),
+                rotation=self._ROTATIONS[axis],
+            )
+            if self._id is not None:
+                plane.name = self._id
+            self._planes[axis] = plane
+            self._objects.append(plane)
+            if self._group is not None:
+                self._group.add(plane)
+        return self._planes[axis]
+
+    def _world_axes(self, axis: str) -> Tuple[int, int]:
+        """
+        The scene axes of the columns and rows of a slice's image.
+        """
+        return {"z": (0, 1), "y": (0, 2), "x": (1, 2)}[axis]
+
+    def _extent(self, axis: str) -> Tuple[int, int]:
+        """
+        The columns and rows of a slice's image.
+        """
+        shape = [n for a, n in zip(self._AXES, self._volume.shape) if a != axis]
+        return shape[1], shape[0]
+
+    @property
+    def slices(self) -> Dict[str, int]:
+        """
+        The slice shown on each axis, as {axis: index}.
+        """
+        return dict(self._shown)
+
+    def set_slice(self, axis: Union[str, int], index: int):
+        """
+        Show a slice of the volume, adding a plane for its axis if there is
+        none yet. Only the slice's texture is sent, unless it is cached.
+
+        Arguments:
+            axis: "x", "y" or "z", or the axis of the (Z, Y, X) volume
+            index (int): The slice to show along that axis
+
+        """
+        axis = self._axis(axis)
+        n = self._volume.shape[self._AXES.index(axis)]
+        index = int(index)
+        if not 0 <= index < n:
+            raise IndexError(f"Slice {index} is out of range for the {n} slices along {axis}")
+        key = (axis, index)
+        image = self._request(axis, index).result()
+        self._shown[axis] = index
+        with self._phase("buffers"):
+            if key not in self._textures:
+                self._textures[key] = _data_texture(image)
+            plane = self._plane(axis)
+        plane.material.map = self._textures[key]
+        position = self._origin + self._spacing * np.array(self._volume.shape[::-1]) / 2
+        world_axis = "xyz".index(axis)
+        position[world_axis] = self._origin[world_axis] + (index + .5) * self._spacing[world_axis]
+        plane.position = tuple(position.tolist())
+        plane.visible = True
+        for step in range(1, self._prefetch + 1):
+            for neighbor in (index + step, index - step):
+                if 0 <= neighbor < n:
+                    self._request(axis, neighbor)
+
+    def hide_slice(self, axis: Union[str, int]):
+        """
+        Hide the slice plane of an axis, until the next set_slice on it.
+        """
+        axis = self._axis(axis)
+        if axis in self._planes:
+            self._planes[axis].visible = False
+            self._shown.pop(axis, None)
+
+    def _on_remove(self):
+        # Stop prefetching, and drop the cached slices that are not shown
+        for future in self._slices.values():
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        shown = set(self._shown.items())
+        for key in list(self._slices):
+            if key not in shown:
+                del self._slices[key]
+                texture = self._textures.pop(key, None)
+                if texture is not None:
+                    texture.close()
+
+    def get_bounding_box(self):
+        return (
+            tuple(self._origin),
+            tuple(self._origin + self._spacing * np.array(self._volume.shape[::-1])),
+        )
+    def get_preferred_camera_view(self):
+        lo, hi = self.get_bounding_box()
+        return tuple((np.asarray(lo) + hi) / 2)
+
+
 class GridLayer(LinesLayer):
     """
     Add a grid to the scene to help with orienting the viewer.
@@ -483,6 +2206,7 @@ class GridLayer(LinesLayer):
 
     """
     _LAYER_NAME = 'grid'
+    _DECORATION = True
     def __init__(
         self,
         plane: str = "xz",
@@ -523,54 +2247,118 @@ class GridLayer(LinesLayer):
                     ],
                 )
         super().__init__(all_children, colors=color, width=0.5,)
+
+    @classmethod
+    def _prepare(cls, args, kwargs):
+        return args, kwargs
+
+class _PlaceholderLayer(LinesLayer):
+    """
+    The wireframe bounding box of a layer that is still being built, shown
+    by Figure#add_async until the layer replaces it.
+
+    Arguments:
+        bounds: (min, max) corners of the box
+        color: The color of the box
+
+    """
+    _LAYER_NAME = 'placeholder'
+    def __init__(self, bounds, color: ColorRGB = (0.6, 0.6, 0.6)):
+        corners = np.array(bounds, dtype=np.float32)
+        # Each corner picks min or max along each axis by the bits of i;
+        # an edge joins two corners that differ in one bit
+        box = np.array([
+            [corners[(i >> axis) & 1, axis] for axis in range(3)] for i in range(8)
+        ], dtype=np.float32)
+        edges = [(i, i | 1 << axis) for i in range(8) for axis in range(3) if not i >> axis & 1]
+        super().__init__(box[np.array(edges)], colors=color, width=1)
 class MeshLayer(CoordinateLayer):
     """
     Add a mesh to the scene.
 
     Arguments:
-        mesh: Mesh object, with attributes verticies, faces
+        mesh: Mesh object, with attributes verticies, faces, or a
+            (vertices, faces) tuple of arrays, np.memmaps or .npy paths
         obj: object filename
         normalize : Normalize the coordinates of the vertices
             to be between -1 and 1
         color: Color for the mesh
         alpha: transparency of the mesh
+        compute_normals (False): Compute vertex normals in Python and send
+            them with the mesh, instead of having the browser compute them
+        lod (0): Number of decimated levels of detail to add, switched
+            between by camera distance
+        cache (False): Load mesh files through an on-disk cache#MeshCache
 
     """
     _LAYER_NAME = 'mesh'
     # pylint: disable=unused-variable,too-many-locals,too-many-branches
     def __init__(self,
-        mesh: trimesh.Trimesh = None,
+        mesh: Union["trimesh.Trimesh", str, Tuple[np.ndarray, np.ndarray]] = None, # noqa: F821
         obj: str = None,
         normalize: bool =False,
         color: Union[str,ColorRGB] ="#00bbee",
         alpha: float=1.,
         transform: Union[Callable, None] = None,
         *args,
+        compute_normals: bool = False,
+        lod: int = 0,
+        lod_ratio: float = 0.25,
+        lod_distances: Iterable[float] = None,
+        lod_method: str = None,
+        cache: Union[bool, MeshCache] = False,
         **kwargs
         ):
         """
         Add a mesh to the scene.
 
+        Faces are sent as uint16 indices when the mesh has at most 65536
+        vertices, and as uint32 otherwise.
+
         Arguments:
-            mesh: Mesh object, with attributes verticies, faces
+            mesh: Mesh object, with attributes verticies, faces, or a
+                (vertices, faces) tuple of arrays, np.memmaps or .npy paths.
+                Large vertex arrays are converted to float32 chunk by chunk.
             obj: object filename
             normalize : Normalize the coordinates of the vertices
                 to be between -1 and 1
             color: Color for the mesh
             alpha: transparency of the mesh
             transform: a function to transform the vertices
+            compute_normals (False): Compute vertex normals in Python and
+                send them with the mesh, instead of having the browser
+                compute them. Normals of an untransformed trimesh.Trimesh
+                come from trimesh's own cache.
+            lod (0): Number of decimated levels of detail to add. The figure
+                shows the level matching the camera's distance from the mesh.
+            lod_ratio (0.25): Fraction of the faces kept by each successive
+                level
+            lod_distances: Camera distance at which each decimated level is
+                shown. Defaults to 1, 2, 4... times the mesh's bounding-box
+                diagonal.
+            lod_method: Decimation method passed to lod#simplify_mesh.
+                Decimated meshes are cached, so repeated figures of the same
+                mesh don't simplify it again.
+            cache (False): Load mesh files through an on-disk cache#MeshCache,
+                so that reopening a file skips trimesh. True uses the default
+                cache directory.
+            quantize (False): Send vertices as int16, and computed normals
+                as int8, instead of float32 (see CoordinateLayer). Cannot be
+                combined with lod.
 
         """
+        super().__init__(*args, **kwargs)
+        if self._quantize and lod:
+            raise ValueError("quantize cannot be combined with lod")
         if mesh is not None and obj is not None:
             raise ValueError('Received both mesh and obj')
-        if isinstance(mesh, str):
-            # perhaps this is a filename?
-            try:
-                mesh = trimesh.load(args[0])
-            except Exception as e:
-                raise ValueError(
-                    "Did not understand arguments to method Figure#mesh"
-                ) from e
+        if isinstance(mesh, _PreparedMesh):
+            # Already read and prepared, e.g. by Figure#add_meshes
+            compute_normals = mesh.normals is not None
+        if cache is True:
+            cache = default_mesh_cache()
+        if mesh is not None:
+            mesh = _read_mesh(mesh, cache)
         if isinstance(obj, np.ndarray):
             obj_data = obj
         elif isinstance(obj, list):
@@ -583,46 +2371,456 @@ class MeshLayer(CoordinateLayer):
             else:
                 try:
                     # open the mesh file
-                    mesh = trimesh.load(obj)
+                    mesh = cache.load(obj) if cache else _trimesh().load(obj)
 
                 except Exception as e:
                     raise ValueError("Could not read file as OBJ") from e
-        assert hasattr(mesh, "vertices") and hasattr(mesh, "faces"), "Invalid mesh object"
         if mesh is None:
             raise ValueError("Could not understand how to parse mesh.")
+        assert hasattr(mesh, "vertices") and hasattr(mesh, "faces"), "Invalid mesh object"
 
-        if transform is None:
-            transform = lambda x: x
-
-        verts = transform(mesh.vertices)
-        faces = mesh.faces
-
-        if normalize:
-            # Normalize the vertex indices to be between -1,1
-            # Shifting these does change the coordinate system,
-            # so visualizing multiple meshes won't work
-            verts[:, 0] = _normalize_shift(verts[:, 0])
-            verts[:, 1] = _normalize_shift(verts[:, 1])
-            verts[:, 2] = _normalize_shift(verts[:, 2])
-
-        geo = BufferGeometry(
-            attributes={
-                "position": BufferAttribute(
-                    array=verts.astype("float32"),
-                    normalized=False,
-                    # dtype=np.float64
-                ),
-                "index": BufferAttribute(
-                    array=faces.astype("uint64").ravel(),
-                    normalized=False,
-                    # dtype=np.float64,
-                ),
-            }
-        )
+        verts, faces, self._normals = _prepare_mesh(mesh, transform, normalize, compute_normals)
         self._coords = verts
+        self._faces = faces
         transparent = alpha != 1.
-        mat = MeshLambertMaterial(color=color, opacity=alpha, transparent=transparent)
-        mesh = Mesh(geometry=geo, material=mat)
-        geo.exec_three_obj_method("computeVertexNormals")
+        mat = MeshLambertMaterial(color=_to_hex_color(color), opacity=alpha, transparent=transparent)
+        with self._phase("buffers"):
+            if self._quantize:
+                geometry = self._geometry(
+                    self._quantized(verts), faces,
+                    None if self._normals is None else self._quantized_normals(self._normals),
+                )
+            else:
+                geometry = self._geometry(verts, faces, self._normals)
+            mesh = Mesh(geometry=geometry, material=mat)
+        if self._quantize:
+            self._dequantize(mesh)
+        self._mesh = mesh
+        if not lod:
+            self._objects.append(mesh)
+            return
+
+        if lod_distances is None:
+            diagonal = float(np.linalg.norm(verts.max(axis=0) - verts.min(axis=0)))
+            lod_distances = [diagonal * 2 ** i for i in range(lod)]
+        if len(lod_distances) != lod:
+            raise ValueError(f"Expected {lod} LOD distances, but got {len(lod_distances)}")
+        self._material = mat
+        self._lod_distances = [0.] + list(lod_distances)
+        self._lod_data = [(verts, faces, self._normals)]
+        for level in range(1, lod + 1):
+            lod_verts, lod_faces = simplify_mesh(
+                verts, faces, lod_ratio ** level, method=lod_method
+            )
+            normals = _vertex_normals(lod_verts, lod_faces) if compute_normals else None
+            self._lod_data.append((lod_verts, lod_faces, normals))
+        # Only the coarsest level is built up front; finer levels are built
+        # and sent the first time the camera comes close enough to need them.
+        self._lod_meshes = {0: mesh}
+        self._lod_level = None
+        self._show_lod_level(lod)
+
+    @classmethod
+    def _prepare(cls, args, kwargs):
+        if len(args) > 1:
+            # Options given positionally; left to the constructor
+            return args, kwargs
+        kwargs = dict(kwargs)
+        mesh = args[0] if args else kwargs.pop("mesh", None)
+        if mesh is None and isinstance(kwargs.get("obj"), str) and "\n" not in kwargs["obj"]:
+            mesh = kwargs.pop("obj")
+        if mesh is None:
+            return args, kwargs
+        cache = kwargs.pop("cache", False)
+        mesh = _load_mesh(
+            mesh, default_mesh_cache() if cache is True else cache,
+            kwargs.pop("transform", None), kwargs.pop("normalize", False),
+            kwargs.pop("compute_normals", False),
+        )
+        # Decimated levels are cached by content, so the constructor finds
+        # them already simplified (when prepared in the same process)
+        for level in range(1, kwargs.get("lod", 0) + 1):
+            simplify_mesh(
+                mesh.vertices, mesh.faces, kwargs.get("lod_ratio", 0.25) ** level,
+                method=kwargs.get("lod_method"),
+            )
+        return (mesh,), kwargs
+
+    @classmethod
+    def _placeholder_bounds(cls, args, kwargs):
+        if len(args) > 2 or kwargs.get("normalize") or kwargs.get("transform") is not None:
+            return None
+        mesh = args[0] if args else kwargs.get("mesh")
+        if _is_instance(mesh, "trimesh", "Trimesh"):
+            # Cached by trimesh; None for an empty mesh
+            return mesh.bounds
+        if isinstance(mesh, tuple) and len(mesh) == 2:
+            return _array_bounds(mesh[0])
+        return None
+
+    def _show_lod_level(self, level: int):
+        if level == self._lod_level:
+            return
+        if level not in self._lod_meshes:
+            with self._phase("buffers"):
+                verts, faces, normals = self._lod_data[level]
+                lod_mesh = Mesh(geometry=self._geometry(verts, faces, normals), material=self._material)
+            self._lod_meshes[level] = lod_mesh
+        lod_mesh = self._lod_meshes[level]
+        if lod_mesh not in self._objects:
+            if self._id is not None:
+                lod_mesh.name = self._id
+            self._objects.append(lod_mesh)
+            if self._group is not None:
+                self._group.add(lod_mesh)
+        for other_level, other in self._lod_meshes.items():
+            other.visible = other_level == level
+        self._lod_level = level
+
+    def _on_camera_move(self, camera):
+        if not hasattr(self, "_lod_distances"):
+            return
+        # Levels are chosen by distance in the mesh's own units
+        distance = np.linalg.norm(self._to_local(camera.position) - self.get_preferred_camera_view())
+        level = int(np.searchsorted(self._lod_distances, distance, side="right")) - 1
+        self._show_lod_level(level)
+
+    def _export_objects(self):
+        if not hasattr(self, "_lod_data"):
+            yield from super()._export_objects()
+            return
+        # The full-resolution mesh, whichever level of detail is shown
+        yield self._mesh, self._export_buffers(self._mesh)
+
+    def update_positions(self, vertices: np.ndarray, start: int = 0):
+        """
+        Move existing vertices in place. Only the position (and, if they
+        were computed in Python, normal) buffers are re-sent.
+
+        Arguments:
+            vertices: (M, 3) positions replacing vertices start to start + M
+            start (int: 0): The first vertex to replace
+
+        """
+        if hasattr(self, "_lod_data"):
+            raise ValueError("Cannot update the vertices of a mesh with levels of detail")
+        if self._quantize:
+            raise ValueError("Cannot update the positions of a quantized layer")
+        vertices = _as_contiguous(vertices, np.float32).reshape(-1, 3)
+        rows = self._rows(len(vertices), start, len(self._coords))
+        self._update_coord_metrics(
+            self._coords if rows is None else self._coords[rows], vertices
+        )
+        geometry = self._mesh.geometry
+        self._coords = self._write_buffer(
+            geometry.attributes["position"], "array", vertices, rows
+        )
+        if self._normals is None:
+            geometry.exec_three_obj_method("computeVertexNormals")
+        else:
+            self._normals = self._write_buffer(
+                geometry.attributes["normal"], "array",
+                _vertex_normals(self._coords, self._faces),
+            )
+
+    def _on_coords_changed(self):
+        super()._on_coords_changed()
+        self.__dict__.pop('_face_index', None)
+
+    def nearest_face(self, point) -> int:
+        """
+        The index of the face nearest a point in layer coordinates.
+
+        Faces are indexed by a spatial#PointIndex over their centroids,
+        built on the first query and cached until the vertices change; only
+        faces in leaves that can hold the answer are measured exactly.
+        Faces always index the full-resolution mesh, whichever level of
+        detail is shown.
+        """
+        if getattr(self, '_face_index', None) is None:
+            coords = np.asarray(self._coords, dtype=np.float32)
+            faces = np.asarray(self._faces)
+            corners = [coords[faces[:, i]] for i in range(3)]
+            centroids = (corners[0] + corners[1] + corners[2]) / 3
+            # No point of a face is farther than this from its centroid
+            pad = max(float(np.linalg.norm(c - centroids, axis=1).max()) for c in corners)
+            # Small leaves, since each face costs more to measure than a point
+            self._face_index = (coords, faces, PointIndex(centroids, leaf_size=128), pad)
+        coords, faces, index, pad = self._face_index
+        point = np.asarray(point, dtype=np.float64)
+        return index.nearest(
+            point,
+            distance=lambda idx: _point_triangle_distances(point, coords[faces[idx]]),
+            pad=pad,
+        )[0]
+
+    def on_click(self, picker):
+        return f"""
+            layer: {self._LAYER_NAME}
+            face: {self.nearest_face(self._to_local(picker.point))}
+            point clicked: {picker.point}
+            """
+
+    def update_colors(self, color: Union[str, ColorRGB]):
+        """
+        Set the mesh color.
+        """
+        self._mesh.material.color = _to_hex_color(color)
+
+    @staticmethod
+    def _geometry(verts: np.ndarray, faces: np.ndarray, normals: np.ndarray = None):
+        attributes = {
+            "position": BufferAttribute(array=verts, normalized=False),
+            "index": BufferAttribute(
+                array=_as_index_buffer(faces, len(verts)),
+                normalized=False,
+            ),
+        }
+        if normals is not None:
+            # Quantized (int8) normals are normalized to [-1, 1]
+            attributes["normal"] = BufferAttribute(
+                array=normals, normalized=normals.dtype == np.int8
+            )
+        geo = BufferGeometry(attributes=attributes)
+        if normals is None:
+            geo.exec_three_obj_method("computeVertexNormals")
+        return geo
+
+def _per_object_colors(colors, n_objects: int) -> np.ndarray:
+    """
+    Broadcast a single color, or a list of one color per object, to an
+    (n_objects, 3) float32 array.
+    """
+    if isinstance(colors, str) or np.isscalar(colors[0]) and not isinstance(colors[0], str):
+        return np.tile(_to_rgb(colors), (n_objects, 1))
+    out = np.array([_to_rgb(c) for c in colors], dtype=np.float32).reshape(-1, 3)
+    if len(out) != n_objects:
+        raise ValueError(f"Expected {n_objects} colors, but got {len(out)}")
+    return out
+
+class MergedMeshLayer(CoordinateLayer):
+    """
+    Draw many meshes as a single mesh, in one draw call.
+
+    Arguments:
+        meshes: Iterable of meshes, each in any form accepted by MeshLayer
+        colors: A single color, or one color per mesh
+        keys: A label for each mesh, reported on click. Defaults to the
+            index of each mesh.
+        alpha: transparency of the meshes
+
+    """
+    _LAYER_NAME = 'merged_mesh'
+
+    def __init__(
+        self,
+        meshes: Iterable,
+        colors: Union[str, ColorRGB, Iterable] = "#00bbee",
+        keys: Iterable[Hashable] = None,
+        alpha: float = 1.,
+        *args,
+        compute_normals: bool = False,
+        cache: Union[bool, MeshCache] = False,
+        **kwargs
+    ):
+        """
+        Draw many meshes as a single mesh, in one draw call.
+
+        The vertices of every mesh are concatenated into one buffer, and
+        their faces offset into one index buffer, so that a figure of
+        thousands of small meshes (e.g. one per segmented cell) needs one
+        geometry, one material and one draw call rather than thousands.
+        Each mesh keeps its own color through a per-vertex color attribute,
+        and a per-vertex object id maps a clicked face back to its mesh.
+
+        Arguments:
+            meshes: Iterable of meshes, each a mesh object with vertices
+                and faces, a path to a mesh file, or a (vertices, faces)
+                tuple
+            colors: A single color, or one color per mesh
+            keys: A label for each mesh, reported on click and accepted by
+                update_colors. Defaults to the index of each mesh.
+            alpha: transparency of the meshes
+            compute_normals (False): Compute vertex normals in Python and
+                send them with the mesh, instead of having the browser
+                compute them
+            cache (False): Load mesh files through an on-disk
+                cache#MeshCache. True uses the default cache directory.
+
+        """
         super().__init__(*args, **kwargs)
-        self._objects.append(mesh)
+        if self._quantize:
+            raise ValueError("Merged meshes cannot be quantized")
+        if cache is True:
+            cache = default_mesh_cache()
+        meshes = [_read_mesh(m, cache) for m in meshes]
+        if not meshes:
+            raise ValueError("Expected at least one mesh")
+        verts = [_as_contiguous(m.vertices, np.float32) for m in meshes]
+        sizes = np.array([len(v) for v in verts])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        faces = np.concatenate([
+            np.asarray(m.faces, dtype=np.int64) + offset
+            for m, offset in zip(meshes, offsets)
+        ])
+        verts = np.concatenate(verts)
+
+        self._keys = list(range(len(meshes))) if keys is None else list(keys)
+        if len(self._keys) != len(meshes):
+            raise ValueError(f"Expected {len(meshes)} keys, but got {len(self._keys)}")
+        self._key_index = {k: i for i, k in enumerate(self._keys)}
+        self._object_ids = np.repeat(
+            np.arange(len(meshes), dtype=_index_dtype(len(meshes))), sizes
+        )
+        self._object_colors = _per_object_colors(colors, len(meshes))
+
+        normals = _vertex_normals(verts, faces) if compute_normals else None
+        with self._phase("buffers"):
+            geometry = MeshLayer._geometry(verts, faces, normals)
+            geometry.attributes = {
+                **geometry.attributes,
+                "color": BufferAttribute(array=self._object_colors[self._object_ids]),
+            }
+        self._coords = verts
+        self._faces = faces
+        mat = MeshLambertMaterial(
+            vertexColors="VertexColors", opacity=alpha, transparent=alpha != 1.
+        )
+        self._mesh = Mesh(geometry=geometry, material=mat)
+        self._objects.append(self._mesh)
+
+    def object_at(self, picker):
+        """
+        The key of the mesh under a picker, or None if nothing was picked.
+        """
+        if not picker.indices:
+            return None
+        return self._keys[self._object_ids[picker.indices[0]]]
+
+    def on_click(self, picker):
+        return f"""
+            layer: {self._LAYER_NAME}
+            object: {self.object_at(picker)}
+            point clicked: {picker.point}
+            """
+
+    def update_colors(self, colors, keys: Iterable[Hashable] = None):
+        """
+        Recolor meshes in place. Only the color buffer is re-sent.
+
+        Arguments:
+            colors: A single color, or one color per mesh being recolored
+            keys: The meshes to recolor. Defaults to all of them.
+
+        """
+        if keys is None:
+            rows = slice(None)
+            n = len(self._keys)
+        else:
+            rows = [self._key_index[k] for k in keys]
+            n = len(rows)
+        self._object_colors[rows] = _per_object_colors(colors, n)
+        self._write_buffer(
+            self._mesh.geometry.attributes["color"], "array",
+            self._object_colors[self._object_ids],
+        )
+
+
+class MergedLinesLayer(LinesLayer):
+    """
+    Draw many sets of line segments as one, in one draw call.
+
+    Arguments:
+        lines: Iterable of (N, 2, 3) segment arrays, one per object
+        colors: A single color, or one color per object
+        keys: A label for each object, reported on click. Defaults to the
+            index of each object.
+        width: The line width
+
+    """
+    _LAYER_NAME = 'merged_lines'
+
+    def __init__(
+        self,
+        lines: Iterable[np.ndarray],
+        colors: Union[str, ColorRGB, Iterable] = (0, 0, 0),
+        keys: Iterable[Hashable] = None,
+        width: int = 10,
+        *args,
+        **kwargs
+    ):
+        """
+        Draw many sets of line segments as one, in one draw call.
+
+        The segments of every object are concatenated into one buffer, with
+        per-segment colors taken from each object's color, and a
+        per-segment object id maps a clicked segment back to its object.
+
+        Arguments:
+            lines: Iterable of (N, 2, 3) segment arrays, one per object
+            colors: A single color, or one color per object
+            keys: A label for each object, reported on click and accepted
+                by update_colors. Defaults to the index of each object.
+            width: The line width
+
+        """
+        if kwargs.get("quantize"):
+            raise ValueError("Merged lines cannot be quantized")
+        segments = [_as_line_segments(segments) for segments in lines]
+        if not segments:
+            raise ValueError("Expected at least one set of lines")
+        self._keys = list(range(len(segments))) if keys is None else list(keys)
+        if len(self._keys) != len(segments):
+            raise ValueError(f"Expected {len(segments)} keys, but got {len(self._keys)}")
+        self._key_index = {k: i for i, k in enumerate(self._keys)}
+        self._object_ids = np.repeat(
+            np.arange(len(segments), dtype=_index_dtype(len(segments))),
+            [len(s) for s in segments],
+        )
+        self._object_colors = _per_object_colors(colors, len(segments))
+        super().__init__(
+            np.concatenate(segments),
+            self._object_colors[self._object_ids],
+            width,
+            *args,
+            **kwargs,
+        )
+
+    @classmethod
+    def _prepare(cls, args, kwargs):
+        if not args:
+            return args, kwargs
+        return ([_as_line_segments(lines) for lines in args[0]], *args[1:]), kwargs
+
+    def object_at(self, picker):
+        """
+        The key of the object under a picker, or None if nothing was picked.
+        """
+        if picker.faceIndex is None or not len(self._object_ids):
+            return None
+        return self._keys[self._object_ids[picker.faceIndex]]
+
+    def on_click(self, picker):
+        return f"""
+            layer: {self._LAYER_NAME}
+            object: {self.object_at(picker)}
+            point clicked: {picker.point}
+            """
+
+    def update_colors(self, colors, keys: Iterable[Hashable] = None):
+        """
+        Recolor objects in place. Only the color buffer is re-sent.
+
+        Arguments:
+            colors: A single color, or one color per object being recolored
+            keys: The objects to recolor. Defaults to all of them.
+
+        """
+        if keys is None:
+            rows = slice(None)
+            n = len(self._keys)
+        else:
+            rows = [self._key_index[k] for k in keys]
+            n = len(rows)
+        self._object_colors[rows] = _per_object_colors(colors, n)
+        super().update_colors(self._object_colors[self._object_ids])
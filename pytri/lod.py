@@ -0,0 +1,326 @@
+"""
+Copyright 2021 The Johns Hopkins University Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Tuple
+
+import numpy as np
+
+_DECIMATION_CACHE_SIZE = 64
+_DECIMATION_CACHE = OrderedDict()
+
+
+def _mesh_digest(vertices: np.ndarray, faces: np.ndarray) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for a in (vertices, faces):
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype, a.shape)).encode())
+        h.update(a.data)
+    return h.hexdigest()
+
+
+def _cluster_vertices(
+    vertices: np.ndarray, faces: np.ndarray, fraction: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decimate a mesh by merging all vertices that fall in the same grid cell.
+
+    The cell size is chosen from the surface area so that roughly
+    fraction * len(vertices) cells are occupied.
+    """
+    corners = vertices[faces]
+    area = 0.5 * np.linalg.norm(
+        np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]),
+        axis=1,
+    ).sum()
+    target = max(4, fraction * len(vertices))
+    cell = np.sqrt(area / target) if area > 0 else 1.0
+
+    keys = np.floor((vertices - vertices.min(axis=0)) / cell).astype(np.int64)
+    _, cluster, counts = np.unique(
+        keys, axis=0, return_inverse=True, return_counts=True
+    )
+    cluster = cluster.ravel()
+    merged = np.empty((len(counts), 3), dtype=np.float32)
+    for axis in range(3):
+        merged[:, axis] = np.bincount(
+            cluster, weights=vertices[:, axis], minlength=len(counts)
+        ) / counts
+
+    remapped = cluster[faces]
+    keep = (
+        (remapped[:, 0] != remapped[:, 1])
+        & (remapped[:, 1] != remapped[:, 2])
+        & (remapped[:, 0] != remapped[:, 2])
+    )
+    remapped = remapped[keep]
+    _, first = np.unique(np.sort(remapped, axis=1), axis=0, return_index=True)
+    return merged, remapped[np.sort(first)]
+
+
+def simplify_mesh(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    fraction: float,
+    method: str = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decimate a mesh to roughly a fraction of its faces.
+
+    Results are cached in memory by mesh content, so simplifying the same
+    mesh again (for example, in a new Figure) is free.
+
+    Arguments:
+        vertices (np.ndarray): (N, 3) vertex positions
+        faces (np.ndarray): (F, 3) vertex indices
+        fraction (float): Fraction of the faces to keep, in (0, 1]
+        method (str): "quadric" for quadric error decimation (needs the
+            fast_simplification package), or "cluster" for vertex
+            clustering. Defaults to quadric if it is available.
+
+    Returns:
+        vertices (np.ndarray): (N', 3) float32 vertex positions
+        faces (np.ndarray): (F', 3) vertex indices
+
+    """
+    if method is None:
+        try:
+            import fast_simplification  # noqa: F401 pylint: disable=import-outside-toplevel,unused-import
+            method = "quadric"
+        except ImportError:
+            method = "cluster"
+    key = (_mesh_digest(vertices, faces), float(fraction), method)
+    if key in _DECIMATION_CACHE:
+        _DECIMATION_CACHE.move_to_end(key)
+        return _DECIMATION_CACHE[key]
+
+    if method == "quadric":
+        import trimesh  # pylint: disable=import-outside-toplevel
+        simple = trimesh.Trimesh(vertices, faces, process=False).simplify_quadric_decimation(
+            face_count=max(1, int(len(faces) * fraction))
+        )
+        result = (np.asarray(simple.vertices, dtype=np.float32), np.asarray(simple.faces))
+    elif method == "cluster":
+        result = _cluster_vertices(np.asarray(vertices), np.asarray(faces), fraction)
+    else:
+        raise ValueError(f"Unknown simplification method {method}")
+
+    _DECIMATION_CACHE[key] = result
+    if len(_DECIMATION_CACHE) > _DECIMATION_CACHE_SIZE:
+        _DECIMATION_CACHE.popitem(last=False)
+    return result
+
+
+def clear_decimation_cache():
+    """
+    Forget all cached mesh simplifications.
+    """
+    _DECIMATION_CACHE.clear()
+
+
+def _interleave_bits(q: np.ndarray, depth: int) -> np.ndarray:
+    """
+    Morton-encode (N, 3) integer cell coordinates with depth bits per axis.
+    """
+    codes = np.zeros(len(q), dtype=np.uint64)
+    for bit in range(depth):
+        for axis in range(3):
+            codes |= ((q[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return codes
+
+
+def _in_view(camera, centers: np.ndarray, radius: float,
+             matrix: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Which spheres of a radius around centers intersect the camera's view
+    cone, and the distances of their centers from the camera.
+
+    Arguments:
+        camera: A pythreejs PerspectiveCamera
+        centers (np.ndarray): (N, 3) sphere centers
+        radius (float): The radius of every sphere
+        matrix (np.ndarray: None): 4x4 transform from the centers'
+            coordinates (e.g. a layer's) to the camera's scene
+
+    Returns:
+        (N,) bool np.ndarray, (N,) np.ndarray
+
+    """
+    if matrix is not None:
+        centers = centers @ matrix[:3, :3].T + matrix[:3, 3]
+        # The transform stretches a sphere by at most its largest singular value
+        radius = radius * float(np.linalg.norm(matrix[:3, :3], 2))
+    x, y, z, w = camera.quaternion
+    # The camera looks down its local -z axis
+    forward = -np.array([
+        2 * (x * z + w * y),
+        2 * (y * z - w * x),
+        1 - 2 * (x * x + y * y),
+    ])
+    offsets = centers - np.asarray(camera.position)
+    depth = offsets @ forward
+    lateral = np.linalg.norm(offsets - depth[:, np.newaxis] * forward, axis=1)
+    half_height = np.tan(np.radians(camera.fov) / 2) / getattr(camera, "zoom", 1)
+    spread = half_height * np.sqrt(1 + camera.aspect ** 2)
+    visible = (depth > -radius) & (
+        lateral <= depth * spread + radius * np.sqrt(1 + spread ** 2)
+    )
+    return visible, np.linalg.norm(offsets, axis=1)
+
+
+class PointOctree:
+    """
+    An octree over a point cloud, for progressive level-of-detail rendering.
+
+    Points are sorted into the leaves of a fixed-depth octree (by Morton
+    code) and shuffled within each leaf, so that any prefix of a leaf is a
+    uniform random subsample of it. A selection is then a prefix of each
+    leaf, sized by how much of the point budget that leaf deserves.
+
+    Arguments:
+        points (np.ndarray): (N, 3) point coordinates
+        leaf_size (int: 4096): Target mean number of points per leaf
+        seed (int: 0): Seed for the within-leaf shuffle
+
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 4096, seed: int = 0):
+        """
+        Build an octree over a point cloud.
+
+        Arguments:
+            points (np.ndarray): (N, 3) point coordinates
+            leaf_size (int: 4096): Target mean number of points per leaf
+            seed (int: 0): Seed for the within-leaf shuffle
+
+        """
+        n = len(points)
+        self.leaf_size = leaf_size
+        depth = int(np.clip(np.ceil(np.log(max(n / leaf_size, 1)) / np.log(8)), 1, 10))
+        lo = points.min(axis=0)
+        extent = np.maximum(points.max(axis=0) - lo, np.finfo(np.float32).tiny)
+        cells = 2 ** depth
+        q = np.minimum(((points - lo) / extent * cells).astype(np.uint64), cells - 1)
+        codes = _interleave_bits(q, depth)
+        # Codes use at most 30 bits, so the low 32 bits of the sort key can
+        # hold a random tiebreak that shuffles points within each leaf.
+        shuffle = np.random.default_rng(seed).integers(0, 2 ** 32, n, dtype=np.uint64)
+        order = np.argsort((codes << np.uint64(32)) | shuffle)
+        leaf_codes, self.starts, self.counts = np.unique(
+            codes[order], return_index=True, return_counts=True
+        )
+        self.order = order.astype(np.uint32 if n < 2 ** 32 else np.int64)
+
+        # Leaf bounding spheres, from the leaf's cell in the grid
+        leaf_cells = np.zeros((len(leaf_codes), 3), dtype=np.float64)
+        for bit in range(depth):
+            for axis in range(3):
+                leaf_cells[:, axis] += (
+                    (leaf_codes >> np.uint64(3 * bit + axis)) & np.uint64(1)
+                ).astype(np.float64) * 2 ** bit
+        cell_size = extent / cells
+        self.centers = lo + (leaf_cells + 0.5) * cell_size
+        self.radius = float(np.linalg.norm(cell_size)) / 2
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _visible(self, camera, matrix: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Which leaves intersect the camera's view cone, and their distances.
+        """
+        return _in_view(camera, self.centers, self.radius, matrix)
+
+    def _prefixes(self, weights: np.ndarray, budget: int) -> np.ndarray:
+        """
+        Split a point budget across leaves in proportion to weights, without
+        giving any leaf more points than it has.
+        """
+        take = np.zeros(len(self.counts), dtype=np.int64)
+        remaining = min(budget, len(self))
+        open_leaves = weights > 0
+        # Water-fill: leaves that are capped return their excess to the rest
+        while remaining > 0 and open_leaves.any():
+            share = np.where(open_leaves, weights, 0)
+            share = np.floor(remaining * share / share.sum()).astype(np.int64)
+            if not share.any():
+                break
+            share = np.minimum(share, self.counts - take)
+            take += share
+            remaining -= int(share.sum())
+            open_leaves &= take < self.counts
+        # Hand out the rounding remainder by priority, then to any leaf
+        for mask in (weights > 0, np.ones_like(open_leaves)):
+            if remaining <= 0:
+                break
+            priority = np.argsort(-np.where(mask, weights, 0), kind="stable")
+            room = (self.counts - take)[priority]
+            room = np.where(mask[priority], room, 0)
+            give = np.minimum(room, np.maximum(remaining - (np.cumsum(room) - room), 0))
+            take[priority] += give
+            remaining -= int(give.sum())
+        return take
+
+    def gather(self, take: np.ndarray) -> np.ndarray:
+        """
+        The points of a selection given as a number of points per leaf (see
+        PointOctree#leaf_budget), as indices into the original points.
+        """
+        total = int(take.sum())
+        offsets = np.cumsum(take) - take
+        index = np.arange(total) - np.repeat(offsets, take) + np.repeat(self.starts, take)
+        return self.order[index]
+
+    def coarse(self, budget: int) -> np.ndarray:
+        """
+        A uniform subsample of at most budget points, as indices into the
+        original points.
+        """
+        return self.gather(self._prefixes(self.counts.astype(np.float64), budget))
+
+    def leaf_budget(self, camera, budget: int, matrix: np.ndarray = None) -> np.ndarray:
+        """
+        How many points of each leaf to select for a camera, at most budget
+        in all. Leaves in view get points in proportion to their size over
+        their squared distance; the rest of the budget is spread uniformly.
+
+        Arguments:
+            camera: A pythreejs PerspectiveCamera
+            budget (int): The maximum number of points to select
+            matrix (np.ndarray: None): 4x4 transform from the points'
+                coordinates to the camera's scene, e.g. Layer#_matrix
+
+        Returns:
+            np.ndarray
+
+        """
+        visible, distance = self._visible(camera, matrix)
+        # Leaf radii in the camera's units
+        radius = self.radius if matrix is None else self.radius * float(np.linalg.norm(matrix[:3, :3], 2))
+        weights = np.where(
+            visible, self.counts / np.maximum(distance, radius) ** 2, 0
+        )
+        take = self._prefixes(weights, budget)
+        if take.sum() < min(budget, len(self)):
+            take = self._prefixes(weights + self.counts * 1e-12, budget)
+        return take
+
+    def select(self, camera, budget: int, matrix: np.ndarray = None) -> np.ndarray:
+        """
+        At most budget points for a camera, as indices into the original
+        points. See PointOctree#leaf_budget.
+        """
+        return self.gather(self.leaf_budget(camera, budget, matrix))
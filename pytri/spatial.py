@@ -0,0 +1,141 @@
+"""
+Copyright 2021 The Johns Hopkins University Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from typing import Callable, Tuple
+
+import numpy as np
+
+
+def _spread_bits(x: np.ndarray) -> np.ndarray:
+    """
+    Spread the low 21 bits of each integer two bits apart, for Morton codes.
+    """
+    x = x & np.uint64(0x1FFFFF)
+    for shift, mask in (
+            (32, 0x1F00000000FFFF), (16, 0x1F0000FF0000FF),
+            (8, 0x100F00F00F00F00F), (4, 0x10C30C30C30C30C3),
+            (2, 0x1249249249249249)):
+        x = (x | (x << np.uint64(shift))) & np.uint64(mask)
+    return x
+
+
+def _morton_codes(points: np.ndarray) -> np.ndarray:
+    """
+    63-bit Morton codes of points, on a grid spanning their bounding box.
+    """
+    lo = points.min(axis=0).astype(np.float64)
+    extent = np.maximum(points.max(axis=0) - lo, np.finfo(np.float32).tiny)
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for axis in range(3):
+        q = ((points[:, axis] - lo[axis]) * ((2 ** 21 - 1) / extent[axis])).astype(np.uint64)
+        codes |= _spread_bits(q) << np.uint64(axis)
+    return codes
+
+
+class PointIndex:
+    """
+    A bounding volume hierarchy over a point cloud, for nearest-point
+    queries such as picking.
+
+    Points are sorted once along a Morton (Z-order) curve and cut into
+    leaves of leaf_size consecutive points, so leaves are small in dense
+    regions and large in sparse ones. Each leaf is a contiguous run of a
+    reordered copy of the points with a tight bounding box; a query
+    measures every leaf's box in one vectorized pass, then scans only the
+    few leaves that can hold the answer.
+
+    Arguments:
+        points (np.ndarray): (N, 3) point coordinates
+        leaf_size (int: 1024): Points per leaf
+
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 1024):
+        """
+        Build an index over a point cloud.
+
+        Arguments:
+            points (np.ndarray): (N, 3) point coordinates
+            leaf_size (int: 1024): Points per leaf
+
+        """
+        points = np.asarray(points)
+        n = len(points)
+        self.leaf_size = leaf_size
+        self.order = np.argsort(_morton_codes(points)) if n else np.zeros(0, dtype=np.int64)
+        self.points = np.ascontiguousarray(points[self.order])
+        self.starts = np.arange(0, n, leaf_size)
+        self.counts = np.diff(np.append(self.starts, n))
+        if n:
+            self.lo = np.minimum.reduceat(self.points, self.starts).astype(np.float64)
+            self.hi = np.maximum.reduceat(self.points, self.starts).astype(np.float64)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def nearest(
+        self,
+        query,
+        distance: Callable[[np.ndarray], np.ndarray] = None,
+        pad: float = 0.,
+    ) -> Tuple[int, float]:
+        """
+        The point nearest a query point.
+
+        Arguments:
+            query: The 3-coordinate to search from
+            distance: Optional function from an array of point indices to
+                their distances from query, used instead of the distance to
+                the points themselves (e.g. to measure the distance to the
+                triangles whose centroids were indexed). It must never be
+                less than the distance to the point minus pad.
+            pad (float: 0.): See distance
+
+        Returns:
+            (index, distance) of the nearest point, or (-1, inf) if there
+            are no points
+
+        """
+        if not len(self):
+            return -1, np.inf
+        query = np.asarray(query, dtype=np.float64)
+        outside = np.maximum(self.lo - query, query - self.hi)
+        np.maximum(outside, 0, out=outside)
+        bounds = np.sqrt(np.einsum("ij,ij->i", outside, outside)) - pad
+        best, best_distance = -1, np.inf
+
+        def scan(leaf):
+            nonlocal best, best_distance
+            rows = slice(self.starts[leaf], self.starts[leaf] + self.counts[leaf])
+            if distance is None:
+                offsets = self.points[rows] - query
+                d = np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+            else:
+                d = distance(self.order[rows])
+            i = int(np.argmin(d))
+            if d[i] < best_distance:
+                best, best_distance = int(self.order[rows][i]), float(d[i])
+
+        # The nearest leaf gives an upper bound, so only the leaves that
+        # could beat it need sorting.
+        first = int(np.argmin(bounds))
+        scan(first)
+        candidates = np.flatnonzero(bounds <= best_distance)
+        for leaf in candidates[np.argsort(bounds[candidates])]:
+            if bounds[leaf] > best_distance:
+                break
+            if leaf != first:
+                scan(leaf)
+        return best, best_distance
@@ -0,0 +1,161 @@
+"""
+Copyright 2021 The Johns Hopkins University Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List
+
+# Layers are timed only while enabled; otherwise every timing point is a
+# shared no-op context
+_enabled = False
+_hooks: List[Callable[[Dict], None]] = []
+_NO_PHASE = nullcontext()
+
+# The phases of building a layer. "input" is every part of construction
+# outside the others: parsing, converting and normalizing the data
+PHASES = ("input", "buffers", "bounds")
+
+
+def enable(hook: Callable[[Dict], None] = None):
+    """
+    Start timing the layers added to figures, for Figure#stats.
+
+    Arguments:
+        hook: Called with the Figure#stats row of every layer added to a
+            figure while stats are enabled, e.g. to send it to telemetry
+
+    """
+    global _enabled  # pylint: disable=global-statement
+    _enabled = True
+    if hook is not None:
+        _hooks.append(hook)
+
+
+def disable():
+    """
+    Stop timing layers, and forget every hook.
+    """
+    global _enabled  # pylint: disable=global-statement
+    _enabled = False
+    _hooks.clear()
+
+
+def is_enabled() -> bool:
+    """
+    Whether layers added to figures are being timed.
+    """
+    return _enabled
+
+
+@contextmanager
+def recording(hook: Callable[[Dict], None] = None):
+    """
+    Time the layers added to figures inside a with block, then restore the
+    previous state.
+    """
+    global _enabled  # pylint: disable=global-statement
+    was_enabled, hooks = _enabled, list(_hooks)
+    enable(hook)
+    try:
+        yield
+    finally:
+        _enabled = was_enabled
+        _hooks[:] = hooks
+
+
+class _Phase:
+    """
+    Add the time spent in a with block to a phase of a layer. Phases nested
+    inside another are counted once, in the outermost.
+    """
+    def __init__(self, layer, name: str):
+        self._layer = layer
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        if not self._layer.__dict__.get("_timing_phase"):
+            self._layer._timing_phase = True  # pylint: disable=protected-access
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            seconds = self._layer.__dict__.setdefault("_phase_seconds", {})
+            seconds[self._name] = seconds.get(self._name, 0.) + time.perf_counter() - self._start
+            self._layer._timing_phase = False  # pylint: disable=protected-access
+        return False
+
+
+def phase(layer, name: str):
+    """
+    A context timing a phase of building layer, while stats are enabled.
+    """
+    return _Phase(layer, name) if _enabled else _NO_PHASE
+
+
+def build(cls, args, kwargs):
+    """
+    Construct a layer and compute its bounds, recording how long each phase
+    took in the layer's _build_seconds.
+    """
+    start = time.perf_counter()
+    layer = cls(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    phases = layer.__dict__.setdefault("_phase_seconds", {})
+    timed = sum(phases.get(name, 0.) for name in PHASES[1:])
+    # Bounds are usually computed lazily; compute them now to time them
+    with _Phase(layer, "bounds"):
+        layer.get_bounding_box()
+    layer._build_seconds = {  # pylint: disable=protected-access
+        "input": max(seconds - timed, 0.),
+        **{name: phases.get(name, 0.) for name in PHASES[1:]},
+    }
+    return layer
+
+
+def report(row: Dict):
+    """
+    Send a layer's Figure#stats row to every hook.
+    """
+    for hook in _hooks:
+        hook(row)
+
+
+def layer_stats(layer, by_buffer: bool = False) -> List[Dict]:
+    """
+    The Figure#stats rows of a layer.
+    """
+    row = {"id": layer._id, "layer": layer._LAYER_NAME, "class": type(layer).__name__}  # pylint: disable=protected-access
+    buffers = list(layer._buffers(textures=True))  # pylint: disable=protected-access
+    if by_buffer:
+        table = {}
+        for name, buf in buffers:
+            key = (name, str(buf.dtype))
+            count, nbytes = table.get(key, (0, 0))
+            table[key] = (count + 1, nbytes + buf.nbytes)
+        return [
+            {**row, "attribute": name, "dtype": dtype, "buffers": count, "bytes": nbytes}
+            for (name, dtype), (count, nbytes) in table.items()
+        ]
+    seconds = layer.__dict__.get("_build_seconds")
+    row["seconds"] = None if seconds is None else sum(seconds.values())
+    for name in PHASES:
+        row[f"{name}_seconds"] = None if seconds is None else seconds[name]
+    row["objects"] = len(layer._objects)  # pylint: disable=protected-access
+    row["buffers"] = len(buffers)
+    row["bytes"] = sum(buf.nbytes for _, buf in buffers)
+    row.update(layer.element_counts())
+    return [row]
@@ -14,8 +14,14 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import io
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+from glob import glob
+from itertools import chain
+
 import numpy as np
-from pythreejs import DataTexture
 
 
 def _circle_mask(h, w):
@@ -31,12 +37,46 @@ def _circle_mask(h, w):
     return mask
 
 
-CIRCLE_MAP = DataTexture(
-    data=np.array([_circle_mask(64, 64).astype("float32")] * 4).T.astype("float32"),
-    type="FloatType",
-    format="RGBAFormat",
+@lru_cache(maxsize=None)
+def _circle_map():
+    """
+    The round point-sprite texture, built (with pythreejs) on first use.
+
+    """
+    from pythreejs import DataTexture  # pylint: disable=import-outside-toplevel
+    return DataTexture(
+        data=np.array([_circle_mask(64, 64).astype("float32")] * 4).T.astype("float32"),
+        type="FloatType",
+        format="RGBAFormat",
+    )
+
+
+def __getattr__(name):
+    # CIRCLE_MAP is created lazily so that importing pytri.utils does not
+    # import pythreejs (and with it ipywidgets and IPython)
+    if name == "CIRCLE_MAP":
+        return _circle_map()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# RGB colors for the standard SWC structure types: undefined, soma, axon,
+# basal dendrite, apical dendrite, and custom (types 5 and up).
+SWC_TYPE_COLORS = np.array(
+    [
+        [0.5, 0.5, 0.5],
+        [0.0, 0.0, 0.0],
+        [0.2, 0.4, 1.0],
+        [1.0, 0.2, 0.2],
+        [1.0, 0.0, 1.0],
+        [0.2, 0.8, 0.2],
+    ],
+    dtype=np.float32,
 )
 
+# Rows converted or reduced at a time when streaming over large arrays, so
+# that temporaries stay small regardless of the input size.
+_CHUNK_ROWS = 2 ** 20
+
 
 def _normalize_shift(x):
     """
@@ -50,3 +90,760 @@ def _normalize_shift(x):
 
     """
     return (x - np.mean(x)) / np.max(x)
+
+
+def _as_contiguous(array, dtype, chunk_rows=_CHUNK_ROWS):
+    """
+    Get a C-contiguous array of the given dtype.
+
+    Arrays (including np.memmap) that already match are returned without
+    copying, and a path to a .npy file is memory-mapped. Other arrays are
+    converted chunk by chunk into a single output buffer, so peak memory is
+    one copy of the data rather than one per intermediate dtype.
+
+    Arguments:
+        array: Array-like, np.memmap, or path to a .npy file
+        dtype: The dtype to convert to
+        chunk_rows (int): Rows to convert at a time
+
+    Returns:
+        np.ndarray
+
+    """
+    if isinstance(array, str):
+        array = np.load(array, mmap_mode="r")
+    if not isinstance(array, np.ndarray) or array.ndim == 0:
+        return np.ascontiguousarray(array, dtype=dtype)
+    if array.dtype == dtype and array.flags.c_contiguous:
+        # A plain ndarray view; widget traits would otherwise re-wrap (and
+        # warn about) subclasses like np.memmap.
+        return np.asarray(array)
+    out = np.empty(array.shape, dtype=dtype)
+    for start in range(0, len(array), chunk_rows):
+        out[start:start + chunk_rows] = array[start:start + chunk_rows]
+    return out
+
+
+def _coord_metrics(coords, chunk_rows=_CHUNK_ROWS):
+    """
+    Compute the per-axis minimum, maximum and mean of (N, 3) coordinates.
+
+    The array is read once, a chunk at a time, so memory-mapped inputs are
+    paged in a single pass and never copied whole.
+
+    Arguments:
+        coords: (N, 3) array-like of coordinates
+        chunk_rows (int): Rows to reduce at a time
+
+    Returns:
+        Tuple of np.ndarray: minimum, maximum, mean (all NaN if there are no
+        coordinates)
+
+    """
+    if not isinstance(coords, np.ndarray):
+        coords = np.asarray(coords)
+    if len(coords) == 0:
+        nan = np.full(3, np.nan)
+        return nan, nan, nan
+    if len(coords) <= chunk_rows:
+        return coords.min(axis=0), coords.max(axis=0), coords.mean(axis=0)
+    lo = hi = None
+    total = np.zeros(coords.shape[1], dtype=np.float64)
+    for start in range(0, len(coords), chunk_rows):
+        chunk = coords[start:start + chunk_rows]
+        chunk_lo, chunk_hi = chunk.min(axis=0), chunk.max(axis=0)
+        lo = chunk_lo if lo is None else np.minimum(lo, chunk_lo)
+        hi = chunk_hi if hi is None else np.maximum(hi, chunk_hi)
+        total += chunk.sum(axis=0, dtype=np.float64)
+    return lo, hi, total / len(coords)
+
+
+def _as_line_segments(lines):
+    """
+    Coerce line segments to a contiguous (N, 2, 3) float32 array.
+
+    Arrays that are already float32 and C-contiguous are returned without
+    copying; anything else is converted in a single vectorized pass.
+
+    Arguments:
+        lines: (N, 2, 3) array-like of (u, v) coordinate pairs
+
+    Returns:
+        np.ndarray
+
+    """
+    positions = _as_contiguous(lines, np.float32)
+    if positions.size == 0:
+        return positions.reshape(0, 2, 3)
+    if positions.ndim != 3 or positions.shape[1:] != (2, 3):
+        raise ValueError(
+            f"Expected lines of shape (N, 2, 3), but got {positions.shape}"
+        )
+    return positions
+
+
+def _broadcast_line_colors(colors, n):
+    """
+    Broadcast a color specification to one RGB color per segment vertex.
+
+    Arguments:
+        colors: None (black), a single RGB color, an (N, 3) array of one
+            color per segment, or an (N, 2, 3) array of one color per vertex
+        n (int): The number of segments
+
+    Returns:
+        np.ndarray of shape (N, 2, 3), float32
+
+    """
+    if colors is None:
+        return np.zeros((n, 2, 3), dtype=np.float32)
+    try:
+        arr = np.asarray(colors, dtype=np.float32)
+    except ValueError:
+        # A ragged mix of per-segment and per-vertex colors
+        arr = np.asarray(
+            [c if len(c) == 2 else [c, c] for c in colors], dtype=np.float32
+        )
+    if arr.shape == (n, 2, 3):
+        return np.ascontiguousarray(arr)
+    out = np.empty((n, 2, 3), dtype=np.float32)
+    if arr.shape == (3,):
+        out[:] = arr
+    elif arr.shape == (n, 3):
+        out[:] = arr[:, np.newaxis, :]
+    else:
+        raise ValueError(
+            f"Could not broadcast colors of shape {arr.shape} to {n} lines"
+        )
+    return out
+
+
+def _pad_rows(data, n, capacity):
+    """
+    Copy the first n rows of data into a new float32 buffer of capacity rows.
+
+    The spare rows repeat row 0, so that drawing them only overdraws an
+    existing point or segment; they are zero if there are no rows yet.
+
+    Arguments:
+        data: Array of at least n rows
+        n (int): The number of rows in use
+        capacity (int): The number of rows to allocate
+
+    Returns:
+        np.ndarray
+
+    """
+    buf = np.empty((capacity,) + tuple(data.shape[1:]), dtype=np.float32)
+    buf[:n] = data[:n]
+    buf[n:] = data[0] if n else 0
+    return buf
+
+
+def _xyz_fields(names):
+    """
+    Pick the coordinate columns out of a list of column or field names.
+
+    Uses "x", "y" and "z" if they are all present, else the first three.
+
+    Arguments:
+        names (List[str])
+
+    Returns:
+        List[str]
+
+    """
+    names = list(names)
+    if all(n in names for n in ("x", "y", "z")):
+        return ["x", "y", "z"]
+    if len(names) < 3:
+        raise ValueError(f"Expected at least three columns, but got {names}")
+    return names[:3]
+
+
+def _stack_columns(columns):
+    """
+    Stack 1D columns into a single (N, len(columns)) float32 array.
+
+    Each column is written directly into the output buffer, so this makes
+    exactly one copy regardless of the input dtype.
+
+    Arguments:
+        columns: Sequence of equal-length 1D array-likes
+
+    Returns:
+        np.ndarray
+
+    """
+    columns = [np.asarray(c) for c in columns]
+    n = len(columns[0])
+    if any(len(c) != n for c in columns):
+        raise ValueError("Expected all columns to have the same length")
+    out = np.empty((n, len(columns)), dtype=np.float32)
+    for i, c in enumerate(columns):
+        out[:, i] = c
+    return out
+
+
+def _to_hex_color(color):
+    """
+    Convert an RGB color with components in [0, 1] to a hex string.
+
+    Strings are assumed to already be valid colors and are returned as-is.
+
+    Arguments:
+        color: str or RGB 3-tuple
+
+    Returns:
+        str
+
+    """
+    if isinstance(color, str):
+        return color
+    rgb = np.clip(np.asarray(color, dtype=np.float64)[:3], 0, 1)
+    return "#" + "".join(f"{int(round(v * 255)):02x}" for v in rgb)
+
+
+# The CSS color names three.js (and so a material's color) understands
+_CSS_COLORS = {
+    "aliceblue": 0xf0f8ff, "antiquewhite": 0xfaebd7, "aqua": 0x00ffff,
+    "aquamarine": 0x7fffd4, "azure": 0xf0ffff, "beige": 0xf5f5dc,
+    "bisque": 0xffe4c4, "black": 0x000000, "blanchedalmond": 0xffebcd,
+    "blue": 0x0000ff, "blueviolet": 0x8a2be2, "brown": 0xa52a2a,
+    "burlywood": 0xdeb887, "cadetblue": 0x5f9ea0, "chartreuse": 0x7fff00,
+    "chocolate": 0xd2691e, "coral": 0xff7f50, "cornflowerblue": 0x6495ed,
+    "cornsilk": 0xfff8dc, "crimson": 0xdc143c, "cyan": 0x00ffff,
+    "darkblue": 0x00008b, "darkcyan": 0x008b8b, "darkgoldenrod": 0xb8860b,
+    "darkgray": 0xa9a9a9, "darkgreen": 0x006400, "darkgrey": 0xa9a9a9,
+    "darkkhaki": 0xbdb76b, "darkmagenta": 0x8b008b, "darkolivegreen": 0x556b2f,
+    "darkorange": 0xff8c00, "darkorchid": 0x9932cc, "darkred": 0x8b0000,
+    "darksalmon": 0xe9967a, "darkseagreen": 0x8fbc8f,
+    "darkslateblue": 0x483d8b, "darkslategray": 0x2f4f4f,
+    "darkslategrey": 0x2f4f4f, "darkturquoise": 0x00ced1,
+    "darkviolet": 0x9400d3, "deeppink": 0xff1493, "deepskyblue": 0x00bfff,
+    "dimgray": 0x696969, "dimgrey": 0x696969, "dodgerblue": 0x1e90ff,
+    "firebrick": 0xb22222, "floralwhite": 0xfffaf0, "forestgreen": 0x228b22,
+    "fuchsia": 0xff00ff, "gainsboro": 0xdcdcdc, "ghostwhite": 0xf8f8ff,
+    "gold": 0xffd700, "goldenrod": 0xdaa520, "gray": 0x808080,
+    "green": 0x008000, "greenyellow": 0xadff2f, "grey": 0x808080,
+    "honeydew": 0xf0fff0, "hotpink": 0xff69b4, "indianred": 0xcd5c5c,
+    "indigo": 0x4b0082, "ivory": 0xfffff0, "khaki": 0xf0e68c,
+    "lavender": 0xe6e6fa, "lavenderblush": 0xfff0f5, "lawngreen": 0x7cfc00,
+    "lemonchiffon": 0xfffacd, "lightblue": 0xadd8e6, "lightcoral": 0xf08080,
+    "lightcyan": 0xe0ffff, "lightgoldenrodyellow": 0xfafad2,
+    "lightgray": 0xd3d3d3, "lightgreen": 0x90ee90, "lightgrey": 0xd3d3d3,
+    "lightpink": 0xffb6c1, "lightsalmon": 0xffa07a, "lightseagreen": 0x20b2aa,
+    "lightskyblue": 0x87cefa, "lightslategray": 0x778899,
+    "lightslategrey": 0x778899, "lightsteelblue": 0xb0c4de,
+    "lightyellow": 0xffffe0, "lime": 0x00ff00, "limegreen": 0x32cd32,
+    "linen": 0xfaf0e6, "magenta": 0xff00ff, "maroon": 0x800000,
+    "mediumaquamarine": 0x66cdaa, "mediumblue": 0x0000cd,
+    "mediumorchid": 0xba55d3, "mediumpurple": 0x9370db,
+    "mediumseagreen": 0x3cb371, "mediumslateblue": 0x7b68ee,
+    "mediumspringgreen": 0x00fa9a, "mediumturquoise": 0x48d1cc,
+    "mediumvioletred": 0xc71585, "midnightblue": 0x191970,
+    "mintcream": 0xf5fffa, "mistyrose": 0xffe4e1, "moccasin": 0xffe4b5,
+    "navajowhite": 0xffdead, "navy": 0x000080, "oldlace": 0xfdf5e6,
+    "olive": 0x808000, "olivedrab": 0x6b8e23, "orange": 0xffa500,
+    "orangered": 0xff4500, "orchid": 0xda70d6, "palegoldenrod": 0xeee8aa,
+    "palegreen": 0x98fb98, "paleturquoise": 0xafeeee,
+    "palevioletred": 0xdb7093, "papayawhip": 0xffefd5, "peachpuff": 0xffdab9,
+    "peru": 0xcd853f, "pink": 0xffc0cb, "plum": 0xdda0dd,
+    "powderblue": 0xb0e0e6, "purple": 0x800080, "rebeccapurple": 0x663399,
+    "red": 0xff0000, "rosybrown": 0xbc8f8f, "royalblue": 0x4169e1,
+    "saddlebrown": 0x8b4513, "salmon": 0xfa8072, "sandybrown": 0xf4a460,
+    "seagreen": 0x2e8b57, "seashell": 0xfff5ee, "sienna": 0xa0522d,
+    "silver": 0xc0c0c0, "skyblue": 0x87ceeb, "slateblue": 0x6a5acd,
+    "slategray": 0x708090, "slategrey": 0x708090, "snow": 0xfffafa,
+    "springgreen": 0x00ff7f, "steelblue": 0x4682b4, "tan": 0xd2b48c,
+    "teal": 0x008080, "thistle": 0xd8bfd8, "tomato": 0xff6347,
+    "turquoise": 0x40e0d0, "violet": 0xee82ee, "wheat": 0xf5deb3,
+    "white": 0xffffff, "whitesmoke": 0xf5f5f5, "yellow": 0xffff00,
+    "yellowgreen": 0x9acd32,
+}
+
+
+def _to_rgb(color):
+    """
+    Convert a "#rrggbb" or "#rgb" string, a CSS color name such as "red",
+    or an RGB color, to a float32 RGB array with components in [0, 1].
+
+    Arguments:
+        color: str or RGB 3-tuple
+
+    Returns:
+        np.ndarray of shape (3,)
+
+    """
+    if isinstance(color, str):
+        name = color.strip().lower()
+        if name in _CSS_COLORS:
+            return np.array(
+                [(_CSS_COLORS[name] >> shift) & 0xff for shift in (16, 8, 0)], dtype=np.float32
+            ) / 255
+        digits = color.lstrip("#")
+        if len(digits) == 3:
+            digits = "".join(d * 2 for d in digits)
+        if len(digits) != 6 or any(d not in "0123456789abcdefABCDEF" for d in digits):
+            raise ValueError(f"Expected a hex color or CSS color name, but got {color!r}")
+        return np.array(
+            [int(digits[i:i + 2], 16) for i in (0, 2, 4)], dtype=np.float32
+        ) / 255
+    return np.asarray(color, dtype=np.float32)[:3]
+
+
+# Quantized positions span [-_QUANTIZE_STEPS, _QUANTIZE_STEPS] on each axis
+_QUANTIZE_STEPS = 32767
+
+
+def _color_scale(points):
+    """
+    The scale default point colors divide positions by: the largest
+    coordinate, or 1 if that is zero or not finite (e.g. every point at the
+    origin), which would make every color NaN.
+    """
+    scale = np.max(points)
+    return scale if np.isfinite(scale) and scale != 0 else 1
+
+
+def _scaled_colors(points, scale, chunk_rows=_CHUNK_ROWS):
+    """
+    Colors for points from their positions divided by scale, as uint8 RGB.
+
+    Converted chunk by chunk, so that a memory-mapped point cloud is never
+    copied in full as float32. A zero or non-finite scale is taken as 1.
+    """
+    if not (np.isfinite(scale) and scale != 0):
+        scale = 1
+    out = np.empty((len(points), 3), dtype=np.uint8)
+    for i in range(0, len(points), chunk_rows):
+        # One float32 temporary per chunk, scaled in place
+        chunk = np.divide(points[i:i + chunk_rows], scale, dtype=np.float32)
+        np.clip(chunk, 0, 1, out=chunk)
+        chunk *= 255
+        out[i:i + chunk_rows] = np.rint(chunk, out=chunk)
+    return out
+
+
+def _quantization_frame(lo, hi):
+    """
+    The center and per-axis scale that map int16 quantized positions back
+    onto the box lo..hi, as center + scale * quantized.
+    """
+    lo, hi = np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+    scale = (hi - lo) / (2 * _QUANTIZE_STEPS)
+    scale[~(scale > 0)] = 1
+    return (lo + hi) / 2, scale
+
+
+def _quantize_positions(coords, center, scale, chunk_rows=_CHUNK_ROWS):
+    """
+    Quantize (N, 3) positions to int16 in a frame from _quantization_frame.
+
+    Arguments:
+        coords: (N, 3) array-like of positions inside the frame's box
+        center, scale: The quantization frame
+        chunk_rows (int): Rows to quantize at a time
+
+    Returns:
+        (N, 3) int16 np.ndarray, and the largest distance between a
+        position and its dequantized value
+
+    """
+    quantized = np.empty((len(coords), 3), dtype=np.int16)
+    error = 0.
+    for start in range(0, len(coords), chunk_rows):
+        chunk = np.asarray(coords[start:start + chunk_rows], dtype=np.float64)
+        q = np.clip(np.round((chunk - center) / scale), -_QUANTIZE_STEPS, _QUANTIZE_STEPS)
+        quantized[start:start + chunk_rows] = q
+        if len(q):
+            error = max(error, float(np.linalg.norm(q * scale + center - chunk, axis=1).max()))
+    return quantized, error
+
+
+def _quantize_colors(colors):
+    """
+    Quantize RGB colors with components in [0, 1] to uint8.
+    """
+    colors = np.asarray(colors)
+    if colors.dtype == np.uint8:
+        return colors
+    return np.round(np.clip(colors, 0, 1) * 255).astype(np.uint8)
+
+
+def _as_texture_image(image, vmin=None, vmax=None, chunk_rows=_CHUNK_ROWS):
+    """
+    Convert an (H, W) or (H, W, channels) image to C-contiguous uint8.
+
+    uint8 images are used as they are unless a window is given. Other
+    images map vmin..vmax onto 0..255: floats default to 0..1, and integers
+    to the range of their data.
+
+    Arguments:
+        image: Array-like image with 1 to 4 channels
+        vmin, vmax (float: None): The values shown as black and white
+        chunk_rows (int): Pixels to convert at a time
+
+    Returns:
+        (H, W) or (H, W, channels) uint8 np.ndarray
+
+    """
+    if not hasattr(image, "shape"):
+        image = np.asarray(image)
+    if image.ndim == 3 and image.shape[2] == 1:
+        image = image[:, :, 0]
+    if image.ndim not in (2, 3) or (image.ndim == 3 and image.shape[2] > 4):
+        raise ValueError(f"Expected an (H, W) or (H, W, 1-4) image, but got {image.shape}")
+    if image.dtype == np.uint8 and vmin is None and vmax is None:
+        return np.ascontiguousarray(image)
+    rows = max(1, chunk_rows // max(1, image.shape[1]))
+    if vmin is None or vmax is None:
+        if np.issubdtype(image.dtype, np.floating) or image.dtype == np.bool_:
+            lo, hi = 0., 1.
+        else:
+            lo = min(np.min(image[i:i + rows]) for i in range(0, len(image), rows))
+            hi = max(np.max(image[i:i + rows]) for i in range(0, len(image), rows))
+        vmin = lo if vmin is None else vmin
+        vmax = hi if vmax is None else vmax
+    span = float(vmax) - float(vmin)
+    span = span if span > 0 else 1.
+    out = np.empty(image.shape, dtype=np.uint8)
+    for start in range(0, len(image), rows):
+        chunk = np.asarray(image[start:start + rows], dtype=np.float32)
+        out[start:start + rows] = np.clip((chunk - vmin) * (255 / span) + 0.5, 0, 255)
+    return out
+
+
+def _downsample(image, chunk_rows=_CHUNK_ROWS):
+    """
+    Halve a uint8 image by averaging 2x2 blocks of pixels. An odd last row
+    or column is averaged with itself.
+    """
+    h, w = image.shape[:2]
+    out = np.empty(((h + 1) // 2, (w + 1) // 2) + image.shape[2:], dtype=np.uint8)
+    rows = max(2, chunk_rows // max(1, w) // 2 * 2)
+    for start in range(0, h, rows):
+        block = np.asarray(image[start:start + rows], dtype=np.uint16)
+        if len(block) % 2:
+            block = np.concatenate([block, block[-1:]])
+        if w % 2:
+            block = np.concatenate([block, block[:, -1:]], axis=1)
+        total = block[0::2, 0::2] + block[1::2, 0::2] + block[0::2, 1::2] + block[1::2, 1::2]
+        out[start // 2:start // 2 + len(total)] = (total + 2) // 4
+    return out
+
+
+def _index_dtype(n_vertices):
+    """
+    The narrowest WebGL index type that can address n_vertices vertices.
+    """
+    return np.uint16 if n_vertices <= 2 ** 16 else np.uint32
+
+
+def _as_index_buffer(indices, n_vertices):
+    """
+    Flatten an array of vertex indices into a WebGL index buffer.
+
+    The buffer is uint16 when n_vertices fits, else uint32.
+
+    Arguments:
+        indices: Integer array-like of vertex indices, of any shape
+        n_vertices (int): The number of vertices being indexed
+
+    Returns:
+        np.ndarray
+
+    """
+    indices = np.asarray(indices)
+    if indices.size and (indices.min() < 0 or indices.max() >= n_vertices):
+        raise ValueError(f"Indices out of range for {n_vertices} vertices")
+    return _as_contiguous(indices, _index_dtype(n_vertices)).ravel()
+
+
+def graph_to_arrays(graph, pos_attribute=None, pos=None):
+    """
+    Convert a networkx graph to node, position and edge-index arrays.
+
+    Positions are read in a single pass over the nodes. Edges are mapped to
+    node indices with one dict lookup per endpoint, or with no lookups at
+    all when the nodes are already the integers 0..N-1 in order.
+
+    Arguments:
+        graph (nx.Graph): The graph to convert
+        pos_attribute (str): The node attribute to use as a 3coord. Defaults
+            to "pos" if pos is also None.
+        pos: Positions for each node, as a dict keyed by node or as an
+            (N, 3) array-like in graph.nodes() order
+
+    Returns:
+        nodes (list): The node keys, in index order
+        positions (np.ndarray): (N, 3) float32 node positions
+        edges (np.ndarray): (E, 2) node indices
+
+    """
+    nodes = list(graph.nodes())
+    if pos is None:
+        attr = "pos" if pos_attribute is None else pos_attribute
+        pos = graph.nodes(data=attr)
+        try:
+            positions = np.array([p for _, p in pos], dtype=np.float32)
+        except (TypeError, ValueError) as e:
+            raise ValueError("You must pass a valid position argument.") from e
+    elif isinstance(pos, Mapping):
+        positions = np.array([pos[n] for n in nodes], dtype=np.float32)
+    else:
+        positions = _as_contiguous(pos, np.float32)
+    positions = positions.reshape(-1, 3)
+    if len(positions) != len(nodes):
+        raise ValueError(
+            f"Got {len(positions)} positions for {len(nodes)} nodes"
+        )
+
+    n_edges = graph.number_of_edges()
+    endpoints = chain.from_iterable(graph.edges())
+    if nodes == list(range(len(nodes))):
+        flat = np.fromiter(endpoints, dtype=np.int64, count=2 * n_edges)
+    else:
+        index = {n: i for i, n in enumerate(nodes)}
+        flat = np.fromiter(
+            (index[n] for n in endpoints), dtype=np.int64, count=2 * n_edges
+        )
+    return nodes, positions, flat.reshape(-1, 2)
+
+
+def _is_swc_text(swc: str) -> bool:
+    """
+    Whether a string is SWC text rather than a path: it is not an existing
+    file, and it has several lines, or is a comment or a row of numbers.
+    """
+    if os.path.exists(swc):
+        return False
+    line = swc.strip()
+    if "\n" in line or line.startswith("#"):
+        return True
+    try:
+        [float(v) for v in line.split()]
+    except ValueError:
+        return False
+    return bool(line)
+
+
+def read_swc(swc):
+    """
+    Read an SWC morphology into an (N, 7) array.
+
+    Columns are id, type, x, y, z, radius and parent id, as in the file.
+
+    Arguments:
+        swc: An SWC file path (str or os.PathLike), the text of an SWC
+            file, or an (N, 7) array-like, which is returned as a float64
+            array
+
+    Returns:
+        np.ndarray
+
+    """
+    if isinstance(swc, os.PathLike) or (isinstance(swc, str) and not _is_swc_text(swc)):
+        data = np.loadtxt(swc, comments="#", ndmin=2)
+    elif isinstance(swc, str):
+        data = np.loadtxt(io.StringIO(swc), comments="#", ndmin=2)
+    else:
+        data = np.asarray(swc, dtype=np.float64)
+    if data.size == 0:
+        return data.reshape(0, 7)
+    if data.ndim != 2 or data.shape[1] != 7:
+        raise ValueError(f"Expected SWC rows of shape (N, 7), but got {data.shape}")
+    return data
+
+
+def _swc_edges(data):
+    """
+    Find (parent, child) row-index pairs for an (N, 7) SWC array.
+
+    Nodes whose parent is -1 or is not in the array are roots.
+    """
+    ids = data[:, 0].astype(np.int64)
+    parents = data[:, 6].astype(np.int64)
+    order = np.argsort(ids, kind="stable")
+    found = np.searchsorted(ids, parents, sorter=order)
+    found = np.minimum(found, len(ids) - 1)
+    parent_rows = order[found]
+    has_parent = ids[parent_rows] == parents
+    children = np.flatnonzero(has_parent)
+    return np.stack([parent_rows[children], children], axis=1)
+
+
+def swc_to_arrays(swc):
+    """
+    Read one or more SWC morphologies into node and edge arrays.
+
+    Several morphologies (a directory of .swc files, or a list of sources)
+    are read one at a time and concatenated, with edge indices offset so
+    that they can all be drawn as a single layer.
+
+    Arguments:
+        swc: An SWC file path or text, an (N, 7) array, a directory of .swc
+            files, or a list of any of these
+
+    Returns:
+        data (np.ndarray): (N, 7) SWC rows
+        edges (np.ndarray): (E, 2) parent, child row indices into data
+
+    """
+    if isinstance(swc, str) and "\n" not in swc and os.path.isdir(swc):
+        swc = sorted(glob(os.path.join(swc, "*.swc")))
+    if isinstance(swc, (list, tuple)):
+        datas, edges, offset = [], [], 0
+        for source in swc:
+            data = read_swc(source)
+            datas.append(data)
+            edges.append(_swc_edges(data) + offset)
+            offset += len(data)
+        if not datas:
+            raise ValueError("No SWC morphologies to read")
+        return np.concatenate(datas), np.concatenate(edges)
+    data = read_swc(swc)
+    return data, _swc_edges(data)
+
+
+def _vertex_normals(vertices, faces):
+    """
+    Compute unit vertex normals as the area-weighted sum of face normals.
+
+    This matches three.js BufferGeometry#computeVertexNormals.
+
+    Arguments:
+        vertices (np.ndarray): (N, 3) vertex positions
+        faces (np.ndarray): (F, 3) vertex indices
+
+    Returns:
+        np.ndarray of shape (N, 3), float32
+
+    """
+    faces = np.asarray(faces, dtype=np.intp)
+    corners = vertices[faces]
+    face_normals = np.cross(
+        corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]
+    )
+    flat = faces.ravel()
+    normals = np.empty((len(vertices), 3), dtype=np.float32)
+    for axis in range(3):
+        normals[:, axis] = np.bincount(
+            flat, weights=np.repeat(face_normals[:, axis], 3), minlength=len(vertices)
+        )
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, lengths, out=normals, where=lengths > 0)
+    return normals
+
+
+def _quaternion_matrix(quaternion):
+    """
+    The 3x3 rotation matrix of an (x, y, z, w) unit quaternion.
+    """
+    x, y, z, w = quaternion
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+
+
+def _euler_quaternion(rotation):
+    """
+    The (x, y, z, w) quaternion of a three.js Euler rotation: x, y, z angles
+    in radians, and optionally the order ("XYZ") they are applied in.
+    """
+    x, y, z, *order = rotation
+    angles = {"X": x, "Y": y, "Z": z}
+    q = np.array([0., 0., 0., 1.])
+    for axis in (order[0] if order else "XYZ"):
+        half = angles[axis] / 2
+        r = np.zeros(4)
+        r["XYZ".index(axis)] = np.sin(half)
+        r[3] = np.cos(half)
+        # q = q * r
+        q = np.array([
+            q[3] * r[0] + q[0] * r[3] + q[1] * r[2] - q[2] * r[1],
+            q[3] * r[1] - q[0] * r[2] + q[1] * r[3] + q[2] * r[0],
+            q[3] * r[2] + q[0] * r[1] - q[1] * r[0] + q[2] * r[3],
+            q[3] * r[3] - q[0] * r[0] - q[1] * r[1] - q[2] * r[2],
+        ])
+    return q
+
+
+def _object_quaternion(obj):
+    """
+    The (x, y, z, w) rotation of a pythreejs object. three.js keeps its
+    rotation and quaternion in step, but from Python either may have been
+    the one set; an Euler rotation counts if the quaternion is unset.
+    """
+    quaternion = tuple(obj.quaternion)
+    if quaternion == (0, 0, 0, 1) and any(obj.rotation[:3]):
+        quaternion = tuple(_euler_quaternion(obj.rotation))
+    return quaternion
+
+
+def _object_matrix(obj) -> np.ndarray:
+    """
+    The 4x4 affine transform of a pythreejs object, from its position,
+    rotation and scale, or from its matrix if that is not updated from them
+    (matrixAutoUpdate is off, as after Layer#set_affine).
+    """
+    if not obj.matrixAutoUpdate:
+        # three.js matrices are stored column-major
+        return np.array(obj.matrix, dtype=np.float64).reshape(4, 4).T
+    matrix = np.eye(4)
+    matrix[:3, :3] = _quaternion_matrix(_object_quaternion(obj)) * np.asarray(obj.scale)
+    matrix[:3, 3] = obj.position
+    return matrix
+
+
+def _point_triangle_distances(point, triangles):
+    """
+    The distance from a point to each of a set of triangles.
+
+    Arguments:
+        point: 3-coordinate
+        triangles (np.ndarray): (M, 3, 3) triangle corners
+
+    Returns:
+        np.ndarray of shape (M,)
+
+    """
+    p = np.asarray(point, dtype=np.float64)
+    a, b, c = (triangles[:, i].astype(np.float64) for i in range(3))
+    ab, ac = b - a, c - a
+    normal = np.cross(ab, ac)
+    area2 = np.einsum("ij,ij->i", normal, normal)
+    # Barycentric coordinates of the point's projection onto each plane
+    ap = p - a
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = np.einsum("ij,ij->i", np.cross(ap, ac), normal) / area2
+        w = np.einsum("ij,ij->i", np.cross(ab, ap), normal) / area2
+        plane = np.abs(np.einsum("ij,ij->i", ap, normal)) / np.sqrt(area2)
+    inside = (v >= 0) & (w >= 0) & (v + w <= 1)
+    # Outside (or degenerate): the nearest point lies on an edge
+    edges = np.full(len(triangles), np.inf)
+    for start, end in ((a, b), (b, c), (c, a)):
+        d = end - start
+        length2 = np.maximum(np.einsum("ij,ij->i", d, d), np.finfo(np.float64).tiny)
+        t = np.clip(np.einsum("ij,ij->i", p - start, d) / length2, 0, 1)
+        edges = np.minimum(edges, np.linalg.norm(start + t[:, np.newaxis] * d - p, axis=1))
+    return np.where(inside, plane, edges)
+
+
+def _geometry_buffers(geometry):
+    """
+    Yield (name, array) for each data buffer of a pythreejs geometry.
+    """
+    if geometry is None:
+        return
+    attributes = getattr(geometry, "attributes", None)
+    if attributes:
+        for name, attribute in attributes.items():
+            yield name, attribute.array
+        return
+    for name in ("positions", "colors"):
+        array = getattr(geometry, name, None)
+        if isinstance(array, np.ndarray):
+            yield name, array
@@ -21,7 +21,6 @@ setup(
         "Topic :: Software Development :: Build Tools",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
@@ -30,7 +29,7 @@ setup(
     keywords="sample, setuptools, development",
     package_dir={"": "."},
     packages=["pytri"],
-    python_requires=">=3.6, <4",
+    python_requires=">=3.7, <4",
     install_requires=["numpy", "networkx", "trimesh", "pythreejs>=2.2.1"],
     project_urls={
         "Source": "https://github.com/aplbrain/pytri",
@@ -0,0 +1,23 @@
+import warnings
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _quiet():
+    # pythreejs warns about array dtypes it converts; keep test output clean
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def sphere():
+    trimesh = pytest.importorskip("trimesh")
+    return trimesh.creation.icosphere(subdivisions=3)
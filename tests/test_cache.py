@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+
+from pytri.cache import MeshCache
+
+
+@pytest.fixture
+def mesh_files(sphere, tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"mesh{i}.ply"
+        sphere.copy().apply_translation((i, 0, 0)).export(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_cache_round_trip(sphere, mesh_files, tmp_path):
+    cache = MeshCache(tmp_path / "cache")
+    first = cache.load(mesh_files[0])
+    again = cache.load(mesh_files[0])
+    assert len(cache.entries()) == 1
+    assert isinstance(again.vertices, np.memmap)
+    assert again.faces.dtype == np.uint16
+    assert np.allclose(again.vertices, sphere.vertices, atol=1e-6)
+    assert np.array_equal(first.faces, again.faces)
+
+
+def test_cache_evicts_least_recently_used(mesh_files, tmp_path):
+    cache = MeshCache(tmp_path / "cache")
+    cache.load(mesh_files[0])
+    entry = cache.size()
+    cache.max_bytes = 2 * entry
+    keys = [cache._key(p) for p in mesh_files]
+    cache.load(mesh_files[1])
+    # Make the second entry the least recently used, whatever the clock's
+    # resolution, then use the first again
+    os.utime(os.path.join(cache.directory, keys[1]), (0, 0))
+    cache.load(mesh_files[0])
+    cache.load(mesh_files[2])
+    assert sorted(e["key"] for e in cache.entries()) == sorted([keys[0], keys[2]])
+    assert cache.size() <= cache.max_bytes
+
+
+def test_cache_misses_do_not_list_entries(mesh_files, tmp_path):
+    cache = MeshCache(tmp_path / "cache")
+    listings = []
+    entries = cache.entries
+    cache.entries = lambda: listings.append(1) or entries()
+    for path in mesh_files:
+        cache.load(path)
+    # Once for the first miss; later misses update a running total
+    assert len(listings) == 1
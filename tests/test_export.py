@@ -0,0 +1,90 @@
+import base64
+import io
+import json
+import struct
+
+import numpy as np
+
+from pytri import Figure
+from pytri.export import write_glb, write_html
+
+
+def _read_glb(figure):
+    f = io.BytesIO()
+    write_glb(figure, f)
+    data = f.getvalue()
+    magic, version, length = struct.unpack("<4sII", data[:12])
+    assert (magic, version, length) == (b"glTF", 2, len(data))
+    json_length, kind = struct.unpack("<I4s", data[12:20])
+    assert kind == b"JSON"
+    gltf = json.loads(data[20:20 + json_length])
+    binary = data[28 + json_length:]
+    return gltf, binary
+
+
+def _accessor(gltf, binary, index):
+    accessor = gltf["accessors"][index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = {5120: np.int8, 5121: np.uint8, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+    width = {"SCALAR": 1, "VEC3": 3, "VEC4": 4}[accessor["type"]]
+    start = view["byteOffset"] + accessor.get("byteOffset", 0)
+    array = np.frombuffer(binary, dtype[accessor["componentType"]], accessor["count"] * width, start)
+    return array.reshape(accessor["count"], width)
+
+
+def test_mesh_round_trips(sphere):
+    fig = Figure()
+    fig.mesh(sphere)
+    gltf, binary = _read_glb(fig)
+    primitive = gltf["meshes"][0]["primitives"][0]
+    positions = _accessor(gltf, binary, primitive["attributes"]["POSITION"])
+    indices = _accessor(gltf, binary, primitive["indices"])
+    assert np.allclose(positions, sphere.vertices)
+    assert np.array_equal(indices.reshape(-1, 3), sphere.faces)
+
+
+def test_points_write_uint8_colors(rng):
+    fig = Figure()
+    points = rng.random((100, 3)).astype(np.float32)
+    fig.scatter(points)
+    gltf, binary = _read_glb(fig)
+    primitive = gltf["meshes"][0]["primitives"][0]
+    assert primitive["mode"] == 0
+    colors = gltf["accessors"][primitive["attributes"]["COLOR_0"]]
+    assert colors["componentType"] == 5121 and colors["normalized"]
+    assert np.allclose(_accessor(gltf, binary, primitive["attributes"]["POSITION"]), points)
+
+
+def test_layer_transforms_are_written():
+    fig = Figure()
+    moved = fig.scatter(np.zeros((2, 3), dtype=np.float32))
+    moved.translate(1, 2, 3)
+    moved.rotate(0, 0, np.pi / 2)
+    scaled = fig.scatter(np.zeros((2, 3), dtype=np.float32))
+    scaled.set_affine(np.diag([10., 10., 10., 1.]))
+    gltf, _ = _read_glb(fig)
+    nodes = [n for n in gltf["nodes"] if n.get("name") == "scatter"]
+    assert nodes[0]["translation"] == [1, 2, 3]
+    assert np.allclose(nodes[0]["rotation"], [0, 0, np.sin(np.pi / 4), np.cos(np.pi / 4)])
+    assert nodes[1]["matrix"] == [10, 0, 0, 0, 0, 10, 0, 0, 0, 0, 10, 0, 0, 0, 0, 1]
+    assert "translation" not in nodes[1]
+
+
+def test_named_material_colors(sphere):
+    fig = Figure()
+    fig.mesh(sphere, color="red")
+    gltf, _ = _read_glb(fig)
+    assert gltf["materials"][0]["pbrMetallicRoughness"]["baseColorFactor"][:3] == [1, 0, 0]
+
+
+def test_html_embeds_the_scene(sphere):
+    fig = Figure()
+    fig.mesh(sphere)
+    page = io.StringIO()
+    write_html(fig, page, title="<cell>")
+    page = page.getvalue()
+    assert "<title>&lt;cell&gt;</title>" in page
+    assert "three@0.160.0" in page
+    glb = io.BytesIO()
+    write_glb(fig, glb)
+    assert base64.b64encode(glb.getvalue()).decode() in page.replace("\n", "")
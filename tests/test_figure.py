@@ -0,0 +1,179 @@
+import asyncio
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from pytri import _DEFAULT_LAYERS, Figure
+
+_SEGMENT = np.array([[0, 0, 0], [1, 0, 0]], dtype=np.float32)
+
+
+def test_bounds_skip_decorations_and_follow_translation():
+    fig = Figure()
+    fig.axes()
+    # With only decorations, they are bounded
+    assert fig.bounds() is not None
+    layer = fig.scatter(_SEGMENT)
+    assert np.allclose(fig.bounds(), [(0, 0, 0), (1, 0, 0)])
+    layer.translate(0, 0, 5)
+    assert np.allclose(fig.bounds(), [(0, 0, 5), (1, 0, 5)])
+
+
+def test_bounds_follow_rotate():
+    fig = Figure()
+    layer = fig.scatter(_SEGMENT)
+    assert np.allclose(fig.bounds(), [(0, 0, 0), (1, 0, 0)])
+    layer.rotate(0, 0, np.pi / 2)
+    assert np.allclose(fig.bounds(), [(0, 0, 0), (0, 1, 0)], atol=1e-6)
+
+
+def test_bounds_follow_set_affine():
+    fig = Figure()
+    layer = fig.scatter(_SEGMENT)
+    fig.bounds()
+    layer.set_affine(np.diag([10., 10., 10., 1.]))
+    assert np.allclose(fig.bounds(), [(0, 0, 0), (10, 0, 0)])
+    assert not layer.group.matrixAutoUpdate
+
+
+def test_fit_camera_frames_every_layer():
+    fig = Figure()
+    fig.scatter(_SEGMENT * 100)
+    fig.fit_camera()
+    assert np.allclose(fig.controls[0].target, (50, 0, 0))
+    distance = np.linalg.norm(np.subtract(fig._camera.position, (50, 0, 0)))
+    assert distance > 50 / np.sin(np.radians(fig._camera.fov) / 2)
+
+
+def test_camera_sync_updates_budgeted_scatter_once(rng):
+    fig = Figure()
+    layer = fig.scatter(rng.random((100000, 3)).astype(np.float32) * 100, point_budget=5000)
+    sends = []
+    send_shown = layer._send_shown
+    layer._send_shown = lambda: sends.append(send_shown())
+    fig._camera.set_state({"position": [50, 50, 150], "quaternion": [0, 0, 0, 1]})
+    assert len(sends) == 1
+    # A tiny move keeps the points already sent
+    fig._camera.set_state({"position": [50, 50, 150.0001], "quaternion": [0, 0, 0, 1]})
+    assert len(sends) == 1
+    assert len(layer._points.geometry.attributes["position"].array) == 5000
+
+
+def test_default_layers_are_listed_before_first_use():
+    import pytri
+    fig = Figure()
+    assert {"mesh", "scatter", "merged_lines", "show"} <= set(dir(fig))
+    assert "mesh" not in fig.__dict__
+    assert {"MeshLayer", "Figure"} <= set(dir(pytri))
+    assert Figure(register_default=False).__dir__().count("mesh") == 0
+
+
+def test_import_defers_heavy_modules():
+    code = "import sys, pytri; assert not {'pythreejs', 'trimesh'} & set(sys.modules)"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_views_share_one_scene():
+    fig = Figure()
+    layer = fig.scatter(_SEGMENT)
+    first, second = fig.view(), fig.view()
+    assert first.scene is second.scene
+    assert first.camera is second.camera is fig._camera
+    assert fig._root.children == (layer.group,)
+    pickers = [c for c in fig.controls if type(c).__name__ == "Picker"]
+    assert len(pickers) == 1
+    # Layers added after the first view are in every view
+    added = fig.scatter(_SEGMENT)
+    assert fig._root.children == (layer.group, added.group)
+
+
+def test_unlinked_view_has_its_own_camera():
+    fig = Figure()
+    fig.scatter(_SEGMENT)
+    linked, unlinked = fig.view(), fig.view(linked=False)
+    assert unlinked.camera is not fig._camera
+    assert unlinked.scene is linked.scene
+    assert unlinked.controls[0].controlling is unlinked.camera
+
+
+def test_remove_many_layers_in_one_update():
+    fig = Figure()
+    layers = [fig.scatter(_SEGMENT) for _ in range(5)]
+    fig.view()
+    updates = []
+    fig._root.observe(updates.append, names=["children"])
+    fig.remove(layers[1:4])
+    assert len(updates) == 1
+    assert fig._root.children == (layers[0].group, layers[4].group)
+    assert list(fig._layers.values()) == [layers[0], layers[4]]
+
+
+def test_add_meshes_keeps_order_and_colors(sphere):
+    fig = Figure()
+    meshes = [(sphere.vertices + i, sphere.faces) for i in range(4)]
+    layers = fig.add_meshes(meshes, colors=["red", "#00ff00", (0, 0, 1), "navy"], workers=1)
+    lows = [float(layer._coords[:, 0].min()) for layer in layers]
+    assert lows == sorted(lows)
+    assert layers[1]._mesh.material.color == "#00ff00"
+    assert layers[0]._faces.dtype == np.uint16
+
+
+def test_add_meshes_in_threads(sphere):
+    fig = Figure()
+    meshes = [(sphere.vertices * (i + 1), sphere.faces) for i in range(6)]
+    layers = fig.add_meshes(meshes, workers=2, processes=False, max_in_flight=2)
+    widths = [np.ptp(layer._coords[:, 0]) for layer in layers]
+    assert widths == sorted(widths)
+    assert len(fig._layers) == 6
+
+
+def test_add_meshes_empty():
+    fig = Figure()
+    assert fig.add_meshes([]) == []
+    assert fig.add_meshes([], colors=[]) == []
+    assert fig.add_meshes(iter([]), colors="red") == []
+    assert not fig._layers
+
+
+def test_add_async_replaces_placeholder(sphere):
+    fig = Figure()
+
+    async def load():
+        task = asyncio.ensure_future(fig.add_async("mesh", sphere))
+        await asyncio.sleep(0)
+        shown = [type(layer).__name__ for layer in fig._layers.values()]
+        return shown, await task
+
+    shown, layer = asyncio.run(load())
+    assert shown == ["_PlaceholderLayer"]
+    assert list(fig._layers.values()) == [layer]
+
+
+_SWC_TEXT = "1 1 0 0 0 1 -1\n2 3 1 0 0 1 1\n3 3 2 0 0 1 2\n"
+
+
+def _layer_args(name, sphere):
+    segments = np.array([[[0, 0, 0], [1, 1, 1]]], dtype=np.float64)
+    return {
+        "mesh": (sphere,),
+        "scatter": (np.random.default_rng(0).random((100, 3)),),
+        "lines": (segments,),
+        "axes": (),
+        "graph": (np.array([[0, 1], [1, 0]]), None, np.eye(2, 3)),
+        "imshow": (np.zeros((8, 8)),),
+        "volume": (np.zeros((4, 4, 4)),),
+        "grid": (),
+        "swc": (_SWC_TEXT,),
+        "merged_mesh": ([sphere, (sphere.vertices + 2, sphere.faces)],),
+        "merged_lines": ([segments, segments + 1],),
+    }[name]
+
+
+@pytest.mark.parametrize("name", sorted(_DEFAULT_LAYERS))
+def test_add_async_every_layer(name, sphere):
+    fig = Figure()
+    layer = asyncio.run(fig.add_async(name, *_layer_args(name, sphere)))
+    assert isinstance(layer, getattr(fig, name)._layer_class)
+    assert list(fig._layers.values()) == [layer]
@@ -0,0 +1,358 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pytri import Figure
+from pytri.utils import _broadcast_line_colors
+
+_SEGMENTS = np.array([[[0, 0, 0], [1, 0, 0]], [[0, 1, 0], [0, 1, 2]]], dtype=np.float32)
+
+
+def test_lines_use_float32_segments_without_copying():
+    layer = Figure().lines(_SEGMENTS)
+    assert np.shares_memory(layer._lines.geometry.positions, _SEGMENTS)
+    assert np.allclose(layer._coords, _SEGMENTS.reshape(-1, 3))
+
+
+def test_lines_bounds():
+    fig = Figure()
+    fig.lines(_SEGMENTS.astype(np.float64).tolist())
+    assert np.allclose(fig.bounds(), [(0, 0, 0), (1, 1, 2)])
+
+
+@pytest.mark.parametrize("colors", [
+    (1, 0, 0),
+    [(1, 0, 0), (1, 0, 0)],
+    np.ones((2, 2, 3)) * [1, 0, 0],
+    [(1, 0, 0), [(1, 0, 0), (1, 0, 0)]],
+])
+def test_line_colors_broadcast_to_every_vertex(colors):
+    broadcast = _broadcast_line_colors(colors, 2)
+    assert broadcast.shape == (2, 2, 3) and broadcast.dtype == np.float32
+    assert np.array_equal(broadcast, np.broadcast_to([1, 0, 0], (2, 2, 3)))
+
+
+def test_line_colors_default_to_black():
+    assert not _broadcast_line_colors(None, 3).any()
+
+
+def test_line_colors_of_the_wrong_length():
+    with pytest.raises(ValueError, match="broadcast"):
+        Figure().lines(_SEGMENTS, np.ones((3, 3)))
+
+
+_POINTS = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8]], dtype=np.float32)
+
+
+def _structured():
+    table = np.zeros(3, dtype=[("id", "i4"), ("x", "f8"), ("y", "f8"), ("z", "f8")])
+    table["x"], table["y"], table["z"] = _POINTS.T
+    return table
+
+
+@pytest.mark.parametrize("args, kwargs", [
+    ((_POINTS,), {}),
+    (tuple(_POINTS.T.astype(np.float64)), {}),
+    ((), {"xs": _POINTS[:, 0], "ys": _POINTS[:, 1], "zs": _POINTS[:, 2]}),
+    ((_structured(),), {}),
+    ((_structured().view(np.recarray),), {}),
+    (("x", "y", "z", _structured()), {}),
+])
+def test_scatter_columnar_inputs(args, kwargs):
+    layer = Figure().scatter(*args, **kwargs)
+    assert layer._coords.dtype == np.float32
+    assert np.array_equal(layer._coords, _POINTS)
+
+
+def test_scatter_float32_points_are_not_copied():
+    assert Figure().scatter(_POINTS)._coords is _POINTS
+
+
+def test_scatter_dataframe():
+    pandas = pytest.importorskip("pandas")
+    frame = pandas.DataFrame({"depth": _POINTS[:, 2], "x": _POINTS[:, 0], "y": _POINTS[:, 1]})
+    assert np.array_equal(Figure().scatter("x", "y", "depth", frame)._coords, _POINTS)
+    frame = frame.rename(columns={"depth": "z"})
+    assert np.array_equal(Figure().scatter(frame)._coords, _POINTS)
+
+
+def test_scatter_single_color_is_set_on_the_material():
+    layer = Figure().scatter(_POINTS, color="red")
+    assert layer._colors is None
+    assert layer._points.material.color == "red"
+    assert "color" not in layer._points.geometry.attributes
+
+
+_NODES = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+_EDGES = np.array([[0, 1], [1, 2], [2, 3]])
+
+
+def _graph_edges(layer):
+    if layer._indexed:
+        return layer._lines.geometry.attributes["index"].array.reshape(-1, 2)
+    return layer._lines.geometry.positions
+
+
+def test_graph_from_edge_array():
+    layer = Figure().graph(_EDGES, pos=_NODES)
+    assert np.array_equal(layer._edges, _EDGES)
+    assert np.array_equal(_graph_edges(layer), _NODES[_EDGES])
+
+
+def test_graph_from_sparse_matrix():
+    sparse = pytest.importorskip("scipy.sparse")
+    adjacency = sparse.coo_matrix((np.ones(3), (_EDGES[:, 0], _EDGES[:, 1])), shape=(4, 4))
+    layer = Figure().graph(adjacency.tocsr(), pos=_NODES)
+    assert sorted(map(tuple, layer._edges.tolist())) == sorted(map(tuple, _EDGES.tolist()))
+
+
+def test_graph_indexed_edges_share_the_node_buffer():
+    layer = Figure().graph(_EDGES, pos=_NODES, indexed_edges=True)
+    assert layer._indexed
+    edges = _graph_edges(layer)
+    assert edges.dtype == np.uint16
+    assert np.array_equal(edges, _EDGES)
+    assert np.array_equal(layer._lines.geometry.attributes["position"].array, _NODES)
+
+
+def test_graph_from_networkx():
+    networkx = pytest.importorskip("networkx")
+    graph = networkx.Graph()
+    for i, p in enumerate(_NODES):
+        graph.add_node(f"n{i}", pos=p)
+    graph.add_edges_from((f"n{u}", f"n{v}") for u, v in _EDGES)
+    layer = Figure().graph(graph, pos_attribute="pos")
+    assert len(layer._edges) == 3
+    assert layer.nearest_node((0, 0, 0.9)) == "n3"
+
+
+def test_graph_arrays_need_positions():
+    with pytest.raises(ValueError, match="position"):
+        Figure().graph(_EDGES)
+
+
+def test_mesh_index_dtype_follows_vertex_count(sphere):
+    layer = Figure().mesh((sphere.vertices, sphere.faces))
+    index = layer._mesh.geometry.attributes["index"].array
+    assert index.dtype == np.uint16
+    assert np.array_equal(index.reshape(-1, 3), sphere.faces)
+    vertices = np.zeros((2 ** 16 + 1, 3), dtype=np.float32)
+    layer = Figure().mesh((vertices, np.array([[0, 1, 2 ** 16]])))
+    assert layer._mesh.geometry.attributes["index"].array.dtype == np.uint32
+
+
+def test_mesh_normals_are_sent_when_computed(sphere):
+    assert "normal" not in Figure().mesh(sphere).buffer_sizes()
+    layer = Figure().mesh((sphere.vertices * 2, sphere.faces), compute_normals=True)
+    normals = layer._mesh.geometry.attributes["normal"].array
+    assert normals.dtype == np.float32
+    # A sphere's vertex normals point away from its center
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1, atol=1e-5)
+    assert ((normals * sphere.vertices).sum(axis=1) > 0.99).all()
+    assert layer.buffer_sizes()["normal"] == normals.nbytes
+
+
+def test_scatter_updates_in_place():
+    points = _POINTS.copy()
+    fig = Figure()
+    layer = fig.scatter(points)
+    attribute = layer._points.geometry.attributes["position"]
+    fig.bounds()
+    layer.update_positions([[10, 10, 10]], start=1)
+    assert layer._points.geometry.attributes["position"] is attribute
+    assert np.array_equal(attribute.array[1], [10, 10, 10])
+    # The array passed in is not modified
+    assert np.array_equal(points, _POINTS)
+    assert np.allclose(fig.bounds(), [(0, 1, 2), (10, 10, 10)])
+    layer.update_colors(np.ones((1, 3)), start=2)
+    assert (layer._colors[2] == 255).all() and not (layer._colors[:2] == 255).all()
+    layer.update_size(3)
+    assert layer._points.material.size == 3
+
+
+def test_lines_update_in_place():
+    layer = Figure().lines(_SEGMENTS.copy())
+    geometry = layer._lines.geometry
+    layer.update_positions(_SEGMENTS[:1] + 5, start=1)
+    layer.update_colors((1, 0, 0), start=1)
+    assert layer._lines.geometry is geometry
+    assert np.array_equal(geometry.positions[1], _SEGMENTS[0] + 5)
+    assert np.array_equal(geometry.colors[:, 0, 0], [0, 1])
+    assert np.array_equal(_SEGMENTS[1], [[0, 1, 0], [0, 1, 2]])
+    with pytest.raises(ValueError):
+        layer.update_positions(np.zeros((2, 2, 3)), start=1)
+
+
+def test_graph_update_moves_touching_edges():
+    layer = Figure().graph(_EDGES, pos=_NODES)
+    layer.update_positions([[5, 5, 5]], start=3)
+    assert np.array_equal(layer._lines.geometry.positions[2], [[0, 1, 0], [5, 5, 5]])
+    assert np.array_equal(layer._lines.geometry.positions[:2], _NODES[_EDGES[:2]])
+
+
+def test_mesh_update_positions(sphere):
+    layer = Figure().mesh((sphere.vertices, sphere.faces))
+    attribute = layer._mesh.geometry.attributes["position"]
+    layer.update_positions(sphere.vertices * 2)
+    assert layer._mesh.geometry.attributes["position"] is attribute
+    assert np.allclose(attribute.array, sphere.vertices * 2)
+
+
+def test_scatter_append_grows_past_capacity(rng):
+    fig = Figure()
+    layer = fig.scatter(_POINTS, capacity=4)
+    attribute = layer._points.geometry.attributes["position"]
+    assert len(attribute.array) == 4
+    layer.append([[-1, -1, -1]])
+    assert layer._points.geometry.attributes["position"] is attribute
+    more = rng.random((10, 3)).astype(np.float32)
+    layer.extend(more[i:i + 5] for i in range(0, 10, 5))
+    # 4 -> 9 (the 9 points needed) -> 18 (doubled)
+    assert layer._point_capacity == 18
+    assert np.array_equal(layer._coords, np.concatenate([_POINTS, [[-1, -1, -1]], more]))
+    assert np.allclose(fig.bounds()[0], (-1, -1, -1))
+    # Updates past the points added so far are refused
+    with pytest.raises(ValueError, match="out of range"):
+        layer.update_positions(np.zeros((2, 3)), start=13)
+
+
+def test_lines_append_grows_past_capacity():
+    layer = Figure().lines(_SEGMENTS, capacity=2)
+    layer.append(_SEGMENTS + 1, colors=(1, 0, 0))
+    assert layer._segment_capacity == 4
+    assert np.array_equal(layer._coords, np.concatenate([_SEGMENTS, _SEGMENTS + 1]).reshape(-1, 3))
+    assert np.array_equal(layer._lines.geometry.colors[2:4, :, 0], np.ones((2, 2)))
+
+
+def test_append_needs_a_capacity():
+    with pytest.raises(ValueError, match="capacity"):
+        Figure().scatter(_POINTS).append(_POINTS)
+    with pytest.raises(ValueError, match="capacity"):
+        Figure().lines(_SEGMENTS).append(_SEGMENTS)
+    with pytest.raises(ValueError, match="point_budget"):
+        Figure().scatter(_POINTS, capacity=4, point_budget=2)
+
+
+def test_merged_mesh_maps_faces_to_objects(sphere):
+    layer = Figure().merged_mesh(
+        [sphere, (sphere.vertices + 3, sphere.faces)], colors=["red", "blue"], keys=["a", "b"],
+    )
+    faces = len(sphere.faces)
+    assert layer.object_at(SimpleNamespace(indices=[faces + 1, 0, 0])) == "b"
+    layer.update_colors((0, 1, 0), keys=["a"])
+    colors = layer._mesh.geometry.attributes["color"].array
+    assert np.allclose(colors[0], (0, 1, 0)) and np.allclose(colors[-1], (0, 0, 1))
+
+
+def test_merged_lines_map_segments_to_objects():
+    layer = Figure().merged_lines([_SEGMENTS, _SEGMENTS[:1] + 1], colors=["red", "blue"])
+    assert len(layer._coords) == 6
+    assert layer.object_at(SimpleNamespace(faceIndex=2)) == 1
+    layer.update_colors("white", keys=[1])
+    assert np.array_equal(layer._lines.geometry.colors[:, 0], [(1, 0, 0), (1, 0, 0), (1, 1, 1)])
+    with pytest.raises(ValueError, match="keys"):
+        Figure().merged_lines([_SEGMENTS], keys=["a", "b"])
+
+
+def test_glyph_scatter_is_one_instanced_mesh():
+    layer = Figure().scatter(_POINTS, glyph="sphere", size=[1, 2, 3], color="red")
+    geometry = layer._points.geometry
+    assert geometry.maxInstancedCount == 3
+    assert np.array_equal(geometry.attributes["offset"].array, _POINTS)
+    assert np.array_equal(geometry.attributes["scale"].array, [1, 2, 3])
+    assert np.array_equal(geometry.attributes["instanceColor"].array, np.tile((1, 0, 0), (3, 1)))
+    assert layer.element_counts()["points"] == 3
+
+
+def test_glyph_scatter_updates():
+    layer = Figure().scatter(_POINTS, glyph="cube", color="red")
+    geometry = layer._points.geometry
+    layer.update_colors("blue", start=2)
+    layer.update_colors([(0, 1, 0)], start=1)
+    assert np.array_equal(
+        geometry.attributes["instanceColor"].array, [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
+    )
+    layer.update_positions([[9, 9, 9]], start=0)
+    assert np.array_equal(geometry.attributes["offset"].array[0], [9, 9, 9])
+    layer.update_size(4)
+    assert np.array_equal(geometry.attributes["scale"].array, [4, 4, 4])
+
+
+def test_glyph_graph_nodes():
+    layer = Figure().graph(_EDGES, pos=_NODES, glyph="sphere", node_size=0.5)
+    assert np.array_equal(layer._points.geometry.attributes["offset"].array, _NODES)
+    assert len(layer._lines.geometry.positions) == 3
+
+
+def test_glyphs_cannot_be_combined_with_a_budget():
+    with pytest.raises(ValueError, match="glyph"):
+        Figure().scatter(_POINTS, glyph="sphere", point_budget=2)
+
+
+def _camera(position):
+    return SimpleNamespace(position=position, quaternion=(0, 0, 0, 1), fov=50, aspect=1.5, zoom=1)
+
+
+def test_imshow_sends_uint8_textures():
+    layer = Figure().imshow(np.linspace(-1, 2, 12).reshape(3, 4), vmin=0, vmax=1)
+    texture = layer._objects[0].material.map
+    assert texture.data.dtype == np.uint8 and texture.format == "LuminanceFormat"
+    assert texture.data.shape == (3, 4)
+    assert texture.data.min() == 0 and texture.data.max() == 255
+
+
+def _shown_tiles(layer):
+    return sorted(k for k, tile in layer._tiles.items() if tile.visible)
+
+
+def test_imshow_shows_tiles_in_view():
+    image = np.arange(64 * 64, dtype=np.uint8).reshape(64, 64)
+    layer = Figure().imshow(image, tile_size=16)
+    # A 64 pixel image in 16 pixel tiles has levels of 4x4, 2x2 and 1 tiles
+    assert layer._levels == 3
+    layer._on_camera_move(_camera((0, 0, 1000)))
+    assert _shown_tiles(layer) == [(2, 0, 0)]
+    # Close to the top left corner, only the full resolution tiles near it
+    layer._on_camera_move(_camera((-4, 4, 1)))
+    assert _shown_tiles(layer) == [(0, 0, 0), (0, 0, 1), (0, 1, 0)]
+    assert np.array_equal(layer._tiles[(0, 0, 1)].material.map.data, image[:16, 16:32])
+
+
+def test_volume_shows_cached_slices():
+    volume = np.arange(4 * 5 * 6, dtype=np.float32).reshape(4, 5, 6) / 120
+    layer = Figure().volume(volume, slices={"z": 1}, prefetch=1, spacing=(1, 1, 2))
+    plane = layer._planes["z"]
+    assert np.abs(plane.material.map.data - volume[1] * 255).max() <= 0.5 + 1e-4
+    assert plane.position == (3, 2.5, 3)
+    # The neighboring slices were read ahead
+    assert {("z", 0), ("z", 2)} <= set(layer._slices)
+    first = plane.material.map
+    layer.set_slice("z", 2)
+    layer.set_slice(0, 1)
+    assert plane.material.map is first
+    assert layer.slices == {"z": 1}
+    with pytest.raises(IndexError):
+        layer.set_slice("x", 6)
+
+
+def test_volume_cache_is_bounded():
+    layer = Figure().volume(np.zeros((20, 4, 4)), slices={"z": 0}, cache_size=4, prefetch=0)
+    for index in range(20):
+        layer.set_slice("z", index)
+    assert len(layer._slices) == len(layer._textures) == 4
+
+
+def test_removing_a_volume_stops_its_thread():
+    fig = Figure()
+    layer = fig.volume(np.zeros((8, 4, 4)), slices={"z": 4, "x": 1})
+    executor = layer._executor
+    fig.remove(layer)
+    assert layer._executor is None and executor._shutdown
+    assert set(layer._slices) == {("z", 4), ("x", 1)}
+    # A removed layer can be added back, and reads slices again
+    fig._attach_layer(layer)
+    layer.set_slice("z", 5)
+    assert layer._executor is not None
+    fig.clear()
+    assert layer._executor is None
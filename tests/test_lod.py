@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from pytri.lod import PointOctree, simplify_mesh
+
+_CAMERA = SimpleNamespace(position=(0.5, 0.5, 3), quaternion=(0, 0, 0, 1), fov=50, aspect=1.5, zoom=1)
+
+
+def test_octree_coarse_is_within_budget(rng):
+    octree = PointOctree(rng.random((50000, 3)), leaf_size=512)
+    shown = octree.coarse(1000)
+    assert len(shown) == 1000
+    assert len(np.unique(shown)) == 1000
+
+
+def test_octree_select_fills_budget_with_distinct_points(rng):
+    octree = PointOctree(rng.random((50000, 3)), leaf_size=512)
+    take = octree.leaf_budget(_CAMERA, 2000)
+    assert take.sum() == 2000
+    assert (take <= octree.counts).all()
+    shown = octree.gather(take)
+    assert len(np.unique(shown)) == 2000
+
+
+def test_octree_select_prefers_nearby_leaves(rng):
+    points = rng.random((50000, 3)) * [1, 1, 10]
+    octree = PointOctree(points, leaf_size=512)
+    camera = SimpleNamespace(**{**vars(_CAMERA), "position": (0.5, 0.5, 12)})
+    shown = points[octree.select(camera, 2000)]
+    # Points near the camera are shown more densely than far ones
+    assert (shown[:, 2] > 5).sum() > (shown[:, 2] < 5).sum()
+
+
+def test_octree_select_follows_layer_transform(rng):
+    points = rng.random((50000, 3))
+    octree = PointOctree(points, leaf_size=512)
+    # The same camera pose relative to the points, with the points scaled up
+    matrix = np.diag([100., 100., 100., 1.])
+    camera = SimpleNamespace(**{**vars(_CAMERA), "position": (50, 50, 300)})
+    assert np.array_equal(octree.leaf_budget(camera, 2000, matrix), octree.leaf_budget(_CAMERA, 2000))
+
+
+def test_simplify_mesh_reduces_faces(sphere):
+    vertices, faces = simplify_mesh(sphere.vertices, sphere.faces, 0.25)
+    assert len(faces) < len(sphere.faces)
+    assert faces.max() < len(vertices)
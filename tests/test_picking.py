@@ -0,0 +1,50 @@
+import numpy as np
+
+from pytri import Figure
+from pytri.spatial import PointIndex
+from pytri.utils import _point_triangle_distances
+
+
+def test_point_index_matches_brute_force(rng):
+    points = rng.random((5000, 3)).astype(np.float32)
+    index = PointIndex(points, leaf_size=64)
+    for query in rng.random((50, 3)) * 1.2 - 0.1:
+        i, d = index.nearest(query)
+        brute = np.linalg.norm(points - query, axis=1)
+        assert i == int(np.argmin(brute))
+        assert np.isclose(d, brute.min())
+
+
+def test_point_index_empty():
+    assert PointIndex(np.zeros((0, 3))).nearest((0, 0, 0)) == (-1, np.inf)
+
+
+def test_nearest_face_matches_brute_force(rng, sphere):
+    layer = Figure().mesh(sphere)
+    for query in rng.random((20, 3)) * 2 - 1:
+        brute = _point_triangle_distances(query, sphere.vertices[sphere.faces])
+        assert np.isclose(
+            _point_triangle_distances(query, sphere.vertices[sphere.faces[[layer.nearest_face(query)]]])[0],
+            brute.min(),
+        )
+
+
+def test_picking_on_translated_layer():
+    layer = Figure().scatter(np.array([[0, 0, 0], [1, 0, 0]], dtype=np.float32))
+    layer.translate(10, 0, 0)
+    assert layer.nearest_vertex(layer._to_local((11, 0, 0))) == 1
+
+
+def test_picking_on_rotated_layer():
+    layer = Figure().scatter(np.array([[0, 0, 0], [1, 0, 0]], dtype=np.float32))
+    layer.rotate(0, 0, np.pi / 2)
+    # (1, 0, 0) is rotated onto (0, 1, 0)
+    assert np.allclose(layer._to_local((0, 1, 0)), (1, 0, 0))
+    assert layer.nearest_vertex(layer._to_local((0, 0.9, 0))) == 1
+
+
+def test_picking_on_affine_layer():
+    layer = Figure().scatter(np.array([[0, 0, 0], [1, 0, 0]], dtype=np.float32))
+    layer.set_affine(np.diag([10., 10., 10., 1.]))
+    assert np.allclose(layer._to_local((9, 0, 0)), (0.9, 0, 0))
+    assert layer.nearest_vertex(layer._to_local((9, 0, 0))) == 1
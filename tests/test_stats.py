@@ -0,0 +1,38 @@
+import numpy as np
+
+from pytri import Figure, stats
+
+_POINTS = np.zeros((10, 3), dtype=np.float32)
+
+
+def test_recording_reports_a_row_per_layer():
+    rows = []
+    fig = Figure()
+    with stats.recording(rows.append):
+        layer = fig.scatter(_POINTS)
+        fig.lines(np.zeros((4, 2, 3), dtype=np.float32))
+    assert not stats.is_enabled()
+    assert [r["layer"] for r in rows] == ["scatter", "lines"]
+    row = rows[0]
+    assert row["id"] == layer._id and row["class"] == "ScatterLayer"
+    assert row["seconds"] >= row["buffers_seconds"] >= 0
+    assert row["points"] == 10 and row["segments"] == 0
+    assert fig.stats() == rows
+
+
+def test_stats_without_recording():
+    fig = Figure()
+    fig.scatter(_POINTS, color="red")
+    row, = fig.stats()
+    assert row["seconds"] is None and row["input_seconds"] is None
+    assert row["bytes"] == _POINTS.nbytes
+    # Without recording, phases share one no-op context
+    assert stats.phase(object(), "buffers") is stats.phase(object(), "bounds")
+
+
+def test_stats_by_buffer(sphere):
+    fig = Figure()
+    fig.mesh((sphere.vertices, sphere.faces))
+    rows = {(r["attribute"], r["dtype"]): r for r in fig.stats(by_buffer=True)}
+    assert rows["position", "float32"]["bytes"] == len(sphere.vertices) * 12
+    assert rows["index", "uint16"]["bytes"] == sphere.faces.size * 2
@@ -0,0 +1,112 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from pytri.layers import MergedMeshLayer, ScatterLayer
+from pytri.utils import (_quantization_frame, _quantize_positions, _scaled_colors,
+                         _to_rgb, read_swc, swc_to_arrays)
+
+_SWC = """# a comment
+1 1 0 0 0 1 -1
+2 3 1 0 0 1 1
+3 3 2 0 0 1 2
+4 3 1 1 0 1 2
+"""
+
+
+def test_read_swc_text_and_path(tmp_path):
+    path = tmp_path / "cell.swc"
+    path.write_text(_SWC)
+    assert read_swc(_SWC).shape == (4, 7)
+    assert np.array_equal(read_swc(str(path)), read_swc(_SWC))
+    assert np.array_equal(read_swc(path), read_swc(_SWC))
+
+
+def test_read_swc_single_line():
+    assert np.array_equal(read_swc("1 1 0 0 0 1 -1"), [[1, 1, 0, 0, 0, 1, -1]])
+
+
+def test_read_swc_missing_file():
+    with pytest.raises(FileNotFoundError):
+        read_swc("missing.swc")
+
+
+def test_read_swc_rejects_wrong_columns():
+    with pytest.raises(ValueError):
+        read_swc("1 2 3")
+
+
+def test_swc_edges(tmp_path):
+    data, edges = swc_to_arrays(_SWC)
+    assert sorted(map(tuple, edges.tolist())) == [(0, 1), (1, 2), (1, 3)]
+    for i in range(2):
+        (tmp_path / f"{i}.swc").write_text(_SWC)
+    data, edges = swc_to_arrays(str(tmp_path))
+    assert len(data) == 8
+    assert sorted(map(tuple, edges.tolist()))[-3:] == [(4, 5), (5, 6), (5, 7)]
+
+
+def test_scaled_colors_match_floats(rng):
+    points = rng.random((1000, 3)).astype(np.float32)
+    colors = _scaled_colors(points, points.max(), chunk_rows=128)
+    assert colors.dtype == np.uint8
+    assert np.abs(colors / 255 - points / points.max()).max() <= 0.5 / 255 + 1e-6
+
+
+def test_default_scatter_colors_are_uint8(rng, tmp_path):
+    path = tmp_path / "points.npy"
+    np.save(path, rng.random((1000, 3)).astype(np.float32))
+    layer = ScatterLayer(np.load(path, mmap_mode="r"))
+    attribute = layer._points.geometry.attributes["color"]
+    assert attribute.array.dtype == np.uint8 and attribute.normalized
+    layer.update_colors(np.ones((2, 3)), start=0)
+    assert (layer._colors[:2] == 255).all()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"glyph": "cube"}, {"capacity": 10}])
+def test_default_colors_of_points_at_the_origin(kwargs):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        layer = ScatterLayer(np.zeros((4, 3), dtype=np.float32), **kwargs)
+        if "capacity" in kwargs:
+            layer.append(np.zeros((2, 3)))
+    assert not np.asarray(layer._colors).any()
+
+
+def test_to_rgb():
+    assert np.allclose(_to_rgb("red"), (1, 0, 0))
+    assert np.allclose(_to_rgb("#00f"), (0, 0, 1))
+    assert np.allclose(_to_rgb((0.5, 0.5, 0.5)), 0.5)
+    with pytest.raises(ValueError, match="CSS color name"):
+        _to_rgb("notacolor")
+
+
+def test_named_per_object_colors(sphere):
+    layer = MergedMeshLayer([(sphere.vertices, sphere.faces)] * 2, colors="red")
+    layer.update_colors(["navy", "teal"])
+
+
+def test_quantization_round_trip(rng):
+    points = rng.random((1000, 3)) * [100, 1, 0]
+    center, scale = _quantization_frame(points.min(axis=0), points.max(axis=0))
+    quantized, error = _quantize_positions(points, center, scale)
+    assert quantized.dtype == np.int16
+    restored = quantized * scale + center
+    assert np.abs(restored - points).max() <= np.max(scale)
+    assert np.isclose(error, np.linalg.norm(restored - points, axis=1).max())
+
+
+def test_quantized_scatter_reports_savings(rng):
+    points = rng.random((100, 3)).astype(np.float32)
+    layer = ScatterLayer(points, color=points, quantize=True)
+    # int16 positions and uint8 colors instead of float32
+    assert layer.quantization.bytes_saved == 100 * 3 * (2 + 3)
+    assert layer.quantization.max_error < 1e-4
+    assert layer._points.geometry.attributes["position"].array.dtype == np.int16
+
+
+def test_quantizing_uint8_colors_saves_nothing(rng):
+    points = rng.random((100, 3)).astype(np.float32)
+    layer = ScatterLayer(points, color=(points * 255).astype(np.uint8), quantize=True)
+    assert layer.quantization.bytes_saved == 100 * 3 * 2